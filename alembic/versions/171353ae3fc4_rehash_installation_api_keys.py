@@ -0,0 +1,27 @@
+"""Rehash installation api keys
+
+Revision ID: 171353ae3fc4
+Revises: 1f8d4a7c5e93
+Create Date: 2026-10-22 09:14:37.215804
+
+b41e9c07d5a2 hashed api_key::bytea, which parses backslash escapes, so keys
+containing a backslash got a hash that hash_api_key() never produces.
+Recompute every hash from the UTF-8 bytes of the key.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '171353ae3fc4'
+down_revision = '1f8d4a7c5e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE installations SET api_key_hash = encode(sha256(convert_to(api_key, 'UTF8')), 'hex')")
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,41 @@
+"""Tune monitoring_logs indexes
+
+Revision ID: 1f8d4a7c5e93
+Revises: 9e3c6f0b8d21
+Create Date: 2026-10-21 10:31:26.905417
+
+Drops indexes that duplicate others (created_at DESC mirrors the created_at
+B-tree read backwards, id mirrors the primary key) or that the planner does
+not use (alert_level has four values), adds a BRIN index for wide time
+ranges and a partial index for alert_triggered rows. Indexes are built and
+dropped CONCURRENTLY, so writes to the table are not blocked; run
+benchmarks/explain_logs.py before and after to compare the plans.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f8d4a7c5e93'
+down_revision = '9e3c6f0b8d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_monitoring_logs_created_brin', 'monitoring_logs', ['created_at'], unique=False, postgresql_using='brin', postgresql_with={'autosummarize': 'on'}, postgresql_concurrently=True)
+        op.create_index('ix_monitoring_logs_alerts', 'monitoring_logs', ['created_at'], unique=False, postgresql_where=sa.text('alert_triggered'), postgresql_concurrently=True)
+        op.drop_index('ix_monitoring_logs_created_desc', table_name='monitoring_logs', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_monitoring_logs_id'), table_name='monitoring_logs', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_monitoring_logs_alert_level'), table_name='monitoring_logs', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_monitoring_logs_alert_level'), 'monitoring_logs', ['alert_level'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_monitoring_logs_id'), 'monitoring_logs', ['id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_monitoring_logs_created_desc', 'monitoring_logs', [sa.literal_column('created_at DESC')], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_monitoring_logs_alerts', table_name='monitoring_logs', postgresql_where=sa.text('alert_triggered'), postgresql_concurrently=True)
+        op.drop_index('ix_monitoring_logs_created_brin', table_name='monitoring_logs', postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""Add probe nodes and slots
+
+Revision ID: 2f6c9a1d4e07
+Revises: e8a3f1d29b64
+Create Date: 2026-10-19 09:41:05.218733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6c9a1d4e07'
+down_revision = 'e8a3f1d29b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('probe_nodes',
+    sa.Column('id', sa.String(length=255), nullable=False),
+    sa.Column('hostname', sa.String(length=255), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('probe_slots',
+    sa.Column('slot', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('node_id', sa.String(length=255), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('slot')
+    )
+    op.create_index('ix_probe_slots_node_id', 'probe_slots', ['node_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_probe_slots_node_id', table_name='probe_slots')
+    op.drop_table('probe_slots')
+    op.drop_table('probe_nodes')
@@ -0,0 +1,33 @@
+"""Add anomaly baselines
+
+Revision ID: 4b7e2d9c1a58
+Revises: c5d81e3f6a20
+Create Date: 2026-10-20 09:47:12.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d9c1a58'
+down_revision = 'c5d81e3f6a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('anomaly_baselines',
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('state', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['endpoint_id'], ['endpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('installation_id', 'endpoint_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('anomaly_baselines')
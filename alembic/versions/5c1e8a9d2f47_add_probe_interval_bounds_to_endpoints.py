@@ -0,0 +1,26 @@
+"""Add probe interval bounds to endpoints
+
+Revision ID: 5c1e8a9d2f47
+Revises: 3408675a3b59
+Create Date: 2026-10-18 23:20:04.512371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a9d2f47'
+down_revision = '3408675a3b59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('endpoints', sa.Column('min_probe_interval_s', sa.Integer(), nullable=True))
+    op.add_column('endpoints', sa.Column('max_probe_interval_s', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('endpoints', 'max_probe_interval_s')
+    op.drop_column('endpoints', 'min_probe_interval_s')
@@ -0,0 +1,49 @@
+"""Add alert outbox and client webhook URL
+
+Revision ID: 7d2f4b6a1c93
+Revises: 5c1e8a9d2f47
+Create Date: 2026-10-18 23:58:41.207113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4b6a1c93'
+down_revision = '5c1e8a9d2f47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('clients', sa.Column('webhook_url', sa.String(length=1024), nullable=True))
+    op.create_table('alert_outbox',
+    sa.Column('client_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('event', sa.String(length=20), nullable=False),
+    sa.Column('alert_level', sa.String(length=20), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['endpoint_id'], ['endpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alert_outbox_id'), 'alert_outbox', ['id'], unique=False)
+    op.create_index('ix_alert_outbox_pending', 'alert_outbox', ['next_attempt_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_outbox_pending', table_name='alert_outbox', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_index(op.f('ix_alert_outbox_id'), table_name='alert_outbox')
+    op.drop_table('alert_outbox')
+    op.drop_column('clients', 'webhook_url')
@@ -0,0 +1,33 @@
+"""Add sla_stale
+
+Revision ID: 890218e77cec
+Revises: 171353ae3fc4
+Create Date: 2026-10-22 11:02:54.390127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '890218e77cec'
+down_revision = '171353ae3fc4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sla_stale',
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('marked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['endpoint_id'], ['endpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('installation_id', 'endpoint_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sla_stale')
@@ -0,0 +1,89 @@
+"""Add incidents
+
+Revision ID: 9e3c6f0b8d21
+Revises: 4b7e2d9c1a58
+Create Date: 2026-10-20 16:05:48.772934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3c6f0b8d21'
+down_revision = '4b7e2d9c1a58'
+branch_labels = None
+depends_on = None
+
+# Incidents of the logs already stored: runs of non-ok rows between ok rows.
+# Every ok row starts a new group, so a run ends at the ok row of the next group.
+# Only heartbeat rows count for extra_data.count probes, as in track_incidents.
+BACKFILL = """
+WITH marked AS (
+    SELECT installation_id, endpoint_id, created_at, alert_level, status_code, error_message,
+           CASE WHEN extra_data->>'kind' = 'heartbeat' THEN COALESCE((extra_data->>'count')::int, 1) ELSE 1 END AS samples,
+           alert_level IN ('warning', 'error', 'critical') AS failing,
+           COUNT(*) FILTER (WHERE alert_level IS NULL OR alert_level NOT IN ('warning', 'error', 'critical'))
+               OVER (PARTITION BY installation_id, endpoint_id ORDER BY created_at) AS grp
+    FROM monitoring_logs
+),
+runs AS (
+    SELECT installation_id, endpoint_id, grp,
+           MIN(created_at) AS started_at,
+           MAX(created_at) AS last_failure_at,
+           MAX(CASE alert_level WHEN 'critical' THEN 3 WHEN 'error' THEN 2 ELSE 1 END) AS peak,
+           SUM(samples) AS samples,
+           (ARRAY_AGG(status_code ORDER BY created_at DESC))[1] AS last_status_code,
+           (ARRAY_AGG(error_message ORDER BY created_at DESC))[1] AS last_error_message
+    FROM marked
+    WHERE failing
+    GROUP BY installation_id, endpoint_id, grp
+)
+INSERT INTO incidents (id, installation_id, endpoint_id, started_at, last_failure_at, ended_at,
+                       peak_level, samples, last_status_code, last_error_message)
+SELECT md5(random()::text || clock_timestamp()::text)::uuid,
+       runs.installation_id, runs.endpoint_id, runs.started_at, runs.last_failure_at, ok.created_at,
+       CASE runs.peak WHEN 3 THEN 'critical' WHEN 2 THEN 'error' ELSE 'warning' END,
+       runs.samples, runs.last_status_code, runs.last_error_message
+FROM runs
+LEFT JOIN marked ok
+    ON ok.installation_id = runs.installation_id
+    AND ok.endpoint_id = runs.endpoint_id
+    AND ok.grp = runs.grp + 1
+    AND NOT ok.failing
+"""
+
+
+def upgrade() -> None:
+    op.create_table('incidents',
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_failure_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ended_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('peak_level', sa.String(length=20), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('last_status_code', sa.Integer(), nullable=True),
+    sa.Column('last_error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.ForeignKeyConstraint(['endpoint_id'], ['endpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_incidents_id'), 'incidents', ['id'], unique=False)
+    op.create_index('ix_incidents_started_at', 'incidents', ['started_at'], unique=False)
+    op.create_index('ix_incidents_target_started', 'incidents', ['installation_id', 'endpoint_id', 'started_at'], unique=False)
+    op.execute(BACKFILL)
+    # Created after the backfill, which leaves at most one open run per target
+    op.create_index('uq_incidents_open', 'incidents', ['installation_id', 'endpoint_id'], unique=True, postgresql_where=sa.text('ended_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_incidents_open', table_name='incidents', postgresql_where=sa.text('ended_at IS NULL'))
+    op.drop_index('ix_incidents_target_started', table_name='incidents')
+    op.drop_index('ix_incidents_started_at', table_name='incidents')
+    op.drop_index(op.f('ix_incidents_id'), table_name='incidents')
+    op.drop_table('incidents')
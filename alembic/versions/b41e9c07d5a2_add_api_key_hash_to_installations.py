@@ -0,0 +1,27 @@
+"""Add api_key_hash to installations
+
+Revision ID: b41e9c07d5a2
+Revises: 7d2f4b6a1c93
+Create Date: 2026-10-19 00:31:12.840517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e9c07d5a2'
+down_revision = '7d2f4b6a1c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('installations', sa.Column('api_key_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE installations SET api_key_hash = encode(sha256(api_key::bytea), 'hex')")
+    op.create_index(op.f('ix_installations_api_key_hash'), 'installations', ['api_key_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_installations_api_key_hash'), table_name='installations')
+    op.drop_column('installations', 'api_key_hash')
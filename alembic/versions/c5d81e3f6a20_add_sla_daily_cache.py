@@ -0,0 +1,44 @@
+"""Add SLA daily cache
+
+Revision ID: c5d81e3f6a20
+Revises: 2f6c9a1d4e07
+Create Date: 2026-10-19 14:22:31.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d81e3f6a20'
+down_revision = '2f6c9a1d4e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sla_daily',
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('probes', sa.Integer(), nullable=False),
+    sa.Column('failures', sa.Integer(), nullable=False),
+    sa.Column('observed_seconds', sa.Float(), nullable=False),
+    sa.Column('downtime_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['endpoint_id'], ['endpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('installation_id', 'endpoint_id', 'day')
+    )
+    op.create_index(op.f('ix_sla_daily_day'), 'sla_daily', ['day'], unique=False)
+    op.create_table('sla_days',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sla_days')
+    op.drop_index(op.f('ix_sla_daily_day'), table_name='sla_daily')
+    op.drop_table('sla_daily')
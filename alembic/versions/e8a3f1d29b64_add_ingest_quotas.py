@@ -0,0 +1,33 @@
+"""Add ingest quotas
+
+Revision ID: e8a3f1d29b64
+Revises: b41e9c07d5a2
+Create Date: 2026-10-19 01:12:47.361904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3f1d29b64'
+down_revision = 'b41e9c07d5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingest_quotas',
+    sa.Column('installation_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('accepted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rejected', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['installation_id'], ['installations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('installation_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_quotas')
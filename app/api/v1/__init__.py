@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from .endpoints import (
     clients, instances, modules, installations, 
-    endpoints as endpoint_routes, thresholds, monitoring_logs, health
+    endpoints as endpoint_routes, thresholds, monitoring_logs, health, live, ingest, sla, incidents
 )
 
 api_router = APIRouter()
@@ -14,5 +14,9 @@ api_router.include_router(installations.router, prefix="/installations", tags=["
 api_router.include_router(endpoint_routes.router, prefix="/endpoints", tags=["endpoints"])
 api_router.include_router(thresholds.router, prefix="/thresholds", tags=["thresholds"])
 api_router.include_router(monitoring_logs.router, prefix="/monitoring-logs", tags=["monitoring-logs"])
+api_router.include_router(live.router, prefix="/live", tags=["live"])
+api_router.include_router(ingest.router, prefix="/ingest", tags=["ingest"])
+api_router.include_router(sla.router, prefix="/sla", tags=["sla"])
+api_router.include_router(incidents.router, prefix="/incidents", tags=["incidents"])
 
 api_router.include_router(health.router, prefix="/health", tags=["health"])
\ No newline at end of file
@@ -0,0 +1,160 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc, func, Float
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+
+from app.core.database import get_async_db
+from app.core.fast_json import as_dicts, rows_response, json_response
+from app.core.projection import FIELDS_QUERY, parse_fields
+from app.models import Incident, Installation, Instance
+from app.schemas import IncidentResponse
+
+router = APIRouter()
+
+# Open incidents last until now
+_duration = func.extract("epoch", func.coalesce(Incident.ended_at, func.now()) - Incident.started_at).cast(Float)
+_COLUMNS = {**dict(Incident.__table__.c.items()), "duration_seconds": _duration.label("duration_seconds")}
+
+
+def _target_filters(client_id: Optional[UUID], installation_id: Optional[UUID], endpoint_id: Optional[UUID]):
+    conditions = []
+    if client_id is not None:
+        conditions.append(Incident.installation_id.in_(
+            select(Installation.id).join(Instance, Installation.instance_id == Instance.id).where(Instance.client_id == client_id)
+        ))
+    if installation_id is not None:
+        conditions.append(Incident.installation_id == installation_id)
+    if endpoint_id is not None:
+        conditions.append(Incident.endpoint_id == endpoint_id)
+    return conditions
+
+
+@router.get("/", response_model=List[IncidentResponse])
+async def list_incidents(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    client_id: Optional[UUID] = None,
+    installation_id: Optional[UUID] = None,
+    endpoint_id: Optional[UUID] = None,
+    is_open: Optional[bool] = Query(None, alias="open", description="Only open (true) or only ended (false) incidents"),
+    peak_level: Optional[str] = None,
+    start_date: Optional[datetime] = Query(None, description="Incidents still going on at or after this time"),
+    end_date: Optional[datetime] = Query(None, description="Incidents started before this time"),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Incidents, most recent first"""
+    selected = parse_fields(fields, IncidentResponse)
+    query = select(*(_COLUMNS[name] for name in selected)).where(
+        *_target_filters(client_id, installation_id, endpoint_id)
+    ).order_by(desc(Incident.started_at))
+
+    if is_open is not None:
+        query = query.where(Incident.ended_at.is_(None) if is_open else Incident.ended_at.is_not(None))
+
+    if peak_level is not None:
+        query = query.where(Incident.peak_level == peak_level)
+
+    if start_date is not None:
+        query = query.where((Incident.ended_at.is_(None)) | (Incident.ended_at >= start_date))
+
+    if end_date is not None:
+        query = query.where(Incident.started_at < end_date)
+
+    result = await db.execute(query.offset(skip).limit(limit))
+    return rows_response(as_dicts(result.all(), selected))
+
+
+@router.get("/mttr")
+async def get_mttr_report(
+    client_id: Optional[UUID] = None,
+    installation_id: Optional[UUID] = None,
+    endpoint_id: Optional[UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mean time to recover per target, over incidents that ended in the window (default: last 30 days)"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    conditions = _target_filters(client_id, installation_id, endpoint_id)
+
+    resolved = (await db.execute(
+        select(
+            Incident.installation_id,
+            Incident.endpoint_id,
+            func.count().label("resolved"),
+            func.sum(_duration).label("total_seconds"),
+            func.max(_duration).label("max_seconds"),
+        ).where(
+            Incident.ended_at >= start,
+            Incident.ended_at < end,
+            *conditions
+        ).group_by(Incident.installation_id, Incident.endpoint_id)
+    )).all()
+
+    # Served by the partial index on open incidents
+    still_open = (await db.execute(
+        select(Incident.installation_id, Incident.endpoint_id, Incident.started_at).where(
+            Incident.ended_at.is_(None),
+            *conditions
+        )
+    )).all()
+
+    targets = {}
+    for row in resolved:
+        targets[(row.installation_id, row.endpoint_id)] = {
+            "installation_id": row.installation_id,
+            "endpoint_id": row.endpoint_id,
+            "resolved": row.resolved,
+            "mttr_seconds": round(row.total_seconds / row.resolved, 1),
+            "max_seconds": round(row.max_seconds, 1),
+            "total_seconds": round(row.total_seconds, 1),
+            "open_since": None,
+        }
+    for row in still_open:
+        entry = targets.setdefault((row.installation_id, row.endpoint_id), {
+            "installation_id": row.installation_id,
+            "endpoint_id": row.endpoint_id,
+            "resolved": 0,
+            "mttr_seconds": None,
+            "max_seconds": None,
+            "total_seconds": 0.0,
+        })
+        entry["open_since"] = row.started_at
+
+    resolved_count = sum(entry["resolved"] for entry in targets.values())
+    total_seconds = sum(entry["total_seconds"] for entry in targets.values())
+    return json_response({
+        "start": start,
+        "end": end,
+        "resolved": resolved_count,
+        "open": len(still_open),
+        "mttr_seconds": round(total_seconds / resolved_count, 1) if resolved_count else None,
+        "targets": sorted(targets.values(), key=lambda entry: (str(entry["installation_id"]), str(entry["endpoint_id"]))),
+    })
+
+
+@router.get("/{incident_id}", response_model=IncidentResponse)
+async def get_incident(
+    incident_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = tuple(IncidentResponse.model_fields)
+    result = await db.execute(
+        select(*(_COLUMNS[name] for name in fields)).where(Incident.id == incident_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident with id {incident_id} not found"
+        )
+    return json_response(as_dicts([row], fields)[0])
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models import MonitoringLog
+from app.schemas import IngestBatch, IngestResponse
+from app.services.api_keys import InstallationScope, get_installation_scope
+from app.services.alert_rules import client_extra_data
+from app.services.health_checker import evaluate_thresholds
+from app.services.ingest_limits import enforce_ingest_limits, ingest_limiter
+from app.services.live_relay import relay_pushed_results
+from app.services.live_updates import broadcaster
+from app.services.sla import mark_stale
+from app.services.incidents import track_incidents
+
+router = APIRouter()
+
+
+@router.post("/results", response_model=IngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_results(
+    batch: IngestBatch,
+    scope: InstallationScope = Depends(get_installation_scope),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Results pushed by an installation, authenticated by its X-API-Key"""
+    rows = []
+    now = datetime.now(timezone.utc)
+    for result in batch.results:
+        resolved = scope.resolve(result.endpoint_id, result.installation_id)
+        if resolved is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Endpoint {result.endpoint_id} is not reportable with this API key"
+            )
+        installation_id, thresholds = resolved
+        
+        alert_level = evaluate_thresholds(thresholds, result.status_code, result.response_time_ms)
+        # Naive timestamps are taken as UTC
+        created_at = result.created_at or now
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        rows.append({
+            # Known before the insert, so the probe runner can write the rule verdict back
+            "id": uuid4(),
+            "installation_id": installation_id,
+            "endpoint_id": result.endpoint_id,
+            "response_time_ms": result.response_time_ms,
+            "status_code": result.status_code,
+            "response_body": result.response_body[:settings.PROBE_RESPONSE_BODY_MAX] if result.response_body else None,
+            "error_message": result.error_message,
+            "alert_level": alert_level,
+            "alert_triggered": alert_level != "ok",
+            # Heartbeat, anomaly and alert keys are the pipeline's own; clients cannot fake them
+            "extra_data": {**(client_extra_data(result.extra_data) or {}), "source": "push"},
+            "created_at": created_at,
+        })
+    
+    # Limits are checked before any write, so a flooding agent costs no database time
+    counts = {}
+    for row in rows:
+        counts[row["installation_id"]] = counts.get(row["installation_id"], 0) + 1
+    await enforce_ingest_limits(counts, scope.clients)
+    
+    try:
+        await db.execute(insert(MonitoringLog), rows)
+        # Late results change the figures of target-days the SLA cache may already hold
+        await mark_stale(db, rows, now)
+        if settings.INCIDENTS_ENABLED:
+            await track_incidents(db, rows)
+        if settings.ALERT_RULES_ENABLED:
+            # The windowed rules live in the probe runner, which gets the rows once they commit
+            await relay_pushed_results(db, rows)
+        await db.commit()
+    except Exception:
+        # Results that were not stored must not use up the installation's limits
+        ingest_limiter.release(counts, scope.clients)
+        raise
+    
+    if settings.LIVE_UPDATES_ENABLED:
+        # API-only processes do not schedule targets, so the key's scope names the clients
+        broadcaster.publish_results(rows, scope.clients)
+    
+    return IngestResponse(accepted=len(rows), alerts=sum(1 for row in rows if row["alert_triggered"]))
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.core.database import get_async_db
+from app.core.fast_json import as_dicts, rows_response
+from app.core.projection import FIELDS_QUERY, parse_fields, columns
 from app.models import Installation, Module, Instance
 from app.schemas import InstallationCreate, InstallationUpdate, InstallationResponse, InstallationWithDetails
+from app.services.api_keys import invalidate_installation
 
 router = APIRouter()
 
@@ -63,9 +66,11 @@ async def list_installations(
     module_id: UUID = None,
     instance_id: UUID = None,
     is_active: bool = None,
+    fields: Optional[str] = FIELDS_QUERY,
     db: AsyncSession = Depends(get_async_db)
 ):
-    query = select(Installation)
+    selected = parse_fields(fields, InstallationResponse)
+    query = select(*columns(Installation.__table__, selected))
     
     if module_id is not None:
         query = query.where(Installation.module_id == module_id)
@@ -78,8 +83,7 @@ async def list_installations(
     
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
-    installations = result.scalars().all()
-    return installations
+    return rows_response(as_dicts(result.all(), selected))
 
 
 @router.get("/{installation_id}", response_model=InstallationWithDetails)
@@ -148,6 +152,7 @@ async def update_installation(
     for field, value in installation_data.model_dump(exclude_unset=True).items():
         setattr(installation, field, value)
     
+    await invalidate_installation(db, installation_id)
     await db.commit()
     await db.refresh(installation)
     return installation
@@ -171,6 +176,7 @@ async def delete_installation(
     
     # Soft delete
     installation.is_active = False
+    await invalidate_installation(db, installation_id)
     await db.commit()
 
 
@@ -196,6 +202,8 @@ async def regenerate_api_key(
     new_api_key = f"inst_{secrets.token_urlsafe(32)}"
     installation.api_key = new_api_key
     
+    # The old key must stop authenticating right away, in every process
+    await invalidate_installation(db, installation_id)
     await db.commit()
     await db.refresh(installation)
     return installation
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.fast_json import dumps
+from app.services.live_updates import broadcaster
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_status(
+    client_id: Optional[UUID] = None,
+    installation_id: Optional[UUID] = None
+):
+    """Server-Sent Events stream of status transitions and alerts"""
+    if not settings.LIVE_UPDATES_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live updates are disabled"
+        )
+    
+    async def events():
+        # Subscribing inside the generator ties the subscription to the stream's lifetime
+        subscription = broadcaster.subscribe(client_id, installation_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscription.get(timeout=settings.LIVE_KEEPALIVE_INTERVAL)
+                if event is None:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {dumps(event).decode()}\n\n"
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,62 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, func, case, Float
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
+from app.core.config import settings
 from app.core.database import get_async_db
+from app.core.fast_json import as_dicts, rows_response, json_response
+from app.core.projection import FIELDS_QUERY, parse_fields, columns
 from app.models import MonitoringLog, Installation, Endpoint
 from app.schemas import MonitoringLogCreate, MonitoringLogResponse, MonitoringLogWithDetails, MonitoringLogQuery
+from app.services.change_storage import expand_logs, heartbeat_value
+from app.services.series import pick_bucket, load_series, lttb
+from app.services.incidents import track_incidents
+from app.services.alert_rules import client_extra_data
+from app.services.api_keys import InstallationScope, get_installation_scope
+from app.services.ingest_limits import enforce_ingest_limits, ingest_limiter
 
 router = APIRouter()
 
+# List endpoints select the requested columns as Core rows and encode them
+# directly; response_model documents the full shape
+LOG_FIELDS = tuple(MonitoringLogResponse.model_fields)
 
-@router.post("/", response_model=MonitoringLogResponse, status_code=status.HTTP_201_CREATED)
-async def create_monitoring_log(
-    log_data: MonitoringLogCreate,
-    db: AsyncSession = Depends(get_async_db)
-):
-    # Check if installation exists
-    installation_result = await db.execute(
-        select(Installation).where(Installation.id == log_data.installation_id)
-    )
-    if not installation_result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Installation with id {log_data.installation_id} does not exist"
-        )
-    
-    # Check if endpoint exists
-    endpoint_result = await db.execute(
-        select(Endpoint).where(Endpoint.id == log_data.endpoint_id)
-    )
-    if not endpoint_result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Endpoint with id {log_data.endpoint_id} does not exist"
-        )
-    
-    monitoring_log = MonitoringLog(**log_data.model_dump())
-    db.add(monitoring_log)
-    await db.commit()
-    await db.refresh(monitoring_log)
-    return monitoring_log
 
+def _log_columns(fields, expand: bool):
+    # Expanding heartbeats needs every column; the projection is applied afterwards
+    return columns(MonitoringLog.__table__, LOG_FIELDS if expand else fields)
 
-@router.get("/", response_model=List[MonitoringLogResponse])
-async def list_monitoring_logs(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+
+def log_list_query(
+    log_columns,
     installation_id: Optional[UUID] = None,
     endpoint_id: Optional[UUID] = None,
     alert_level: Optional[str] = None,
     alert_triggered: Optional[bool] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    db: AsyncSession = Depends(get_async_db)
+    end_date: Optional[datetime] = None
 ):
-    query = select(MonitoringLog).order_by(desc(MonitoringLog.created_at))
+    """Newest-first log query shared by the list and search endpoints"""
+    query = select(*log_columns).order_by(desc(MonitoringLog.created_at))
     
     if installation_id is not None:
         query = query.where(MonitoringLog.installation_id == installation_id)
@@ -68,7 +52,9 @@ async def list_monitoring_logs(
         query = query.where(MonitoringLog.alert_level == alert_level)
     
     if alert_triggered is not None:
-        query = query.where(MonitoringLog.alert_triggered == alert_triggered)
+        # A literal condition, not "= $1", so the partial index on alert_triggered
+        # also matches generic prepared-statement plans
+        query = query.where(MonitoringLog.alert_triggered if alert_triggered else ~MonitoringLog.alert_triggered)
     
     if start_date is not None:
         query = query.where(MonitoringLog.created_at >= start_date)
@@ -76,10 +62,75 @@ async def list_monitoring_logs(
     if end_date is not None:
         query = query.where(MonitoringLog.created_at <= end_date)
     
+    return query
+
+
+def _log_list_response(rows, fields, expand: bool, limit: int):
+    if expand:
+        rows = as_dicts(expand_logs(rows)[:limit], LOG_FIELDS)
+    return rows_response(as_dicts(rows, fields))
+
+
+@router.post("/", response_model=MonitoringLogResponse, status_code=status.HTTP_201_CREATED)
+async def create_monitoring_log(
+    log_data: MonitoringLogCreate,
+    scope: InstallationScope = Depends(get_installation_scope),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Single result reported by an installation, authenticated by its X-API-Key; prefer POST /ingest/results"""
+    # The key must belong to the installation the log is filed under
+    if scope.resolve(log_data.endpoint_id, log_data.installation_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Endpoint {log_data.endpoint_id} is not reportable by installation "
+                   f"{log_data.installation_id} with this API key"
+        )
+    
+    # Same per-installation and per-client limits as /ingest/results
+    await enforce_ingest_limits({log_data.installation_id: 1}, scope.clients)
+    
+    values = {**log_data.model_dump(), "extra_data": client_extra_data(log_data.extra_data), "created_at": datetime.now(timezone.utc)}
+    monitoring_log = MonitoringLog(**values)
+    db.add(monitoring_log)
+    try:
+        if settings.INCIDENTS_ENABLED:
+            await track_incidents(db, [values])
+        await db.commit()
+    except Exception:
+        ingest_limiter.release({log_data.installation_id: 1}, scope.clients)
+        raise
+    await db.refresh(monitoring_log)
+    return monitoring_log
+
+
+@router.get("/", response_model=List[MonitoringLogResponse])
+async def list_monitoring_logs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    installation_id: Optional[UUID] = None,
+    endpoint_id: Optional[UUID] = None,
+    alert_level: Optional[str] = None,
+    alert_triggered: Optional[bool] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    expand: bool = Query(False, description="Expand heartbeat summaries into one entry per probe"),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    selected = parse_fields(fields, MonitoringLogResponse)
+    query = log_list_query(
+        _log_columns(selected, expand),
+        installation_id=installation_id,
+        endpoint_id=endpoint_id,
+        alert_level=alert_level,
+        alert_triggered=alert_triggered,
+        start_date=start_date,
+        end_date=end_date
+    )
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
-    logs = result.scalars().all()
-    return logs
+    # skip/limit page over stored rows; the expanded page is capped at limit
+    return _log_list_response(result.all(), selected, expand, limit)
 
 
 @router.get("/search", response_model=List[MonitoringLogResponse])
@@ -87,30 +138,71 @@ async def search_monitoring_logs(
     query_params: MonitoringLogQuery = Depends(),
     db: AsyncSession = Depends(get_async_db)
 ):
-    query = select(MonitoringLog).order_by(desc(MonitoringLog.created_at))
-    
-    if query_params.installation_id is not None:
-        query = query.where(MonitoringLog.installation_id == query_params.installation_id)
-    
-    if query_params.endpoint_id is not None:
-        query = query.where(MonitoringLog.endpoint_id == query_params.endpoint_id)
-    
-    if query_params.alert_level is not None:
-        query = query.where(MonitoringLog.alert_level == query_params.alert_level)
-    
-    if query_params.alert_triggered is not None:
-        query = query.where(MonitoringLog.alert_triggered == query_params.alert_triggered)
+    selected = parse_fields(query_params.fields, MonitoringLogResponse)
+    query = log_list_query(
+        _log_columns(selected, query_params.expand),
+        installation_id=query_params.installation_id,
+        endpoint_id=query_params.endpoint_id,
+        alert_level=query_params.alert_level,
+        alert_triggered=query_params.alert_triggered,
+        start_date=query_params.start_date,
+        end_date=query_params.end_date
+    )
+    query = query.offset(query_params.offset).limit(query_params.limit)
+    result = await db.execute(query)
+    return _log_list_response(result.all(), selected, query_params.expand, query_params.limit)
+
+
+@router.get("/series")
+async def get_monitoring_series(
+    endpoint_id: List[UUID] = Query(..., description="One or more endpoints (repeat the parameter)"),
+    installation_id: Optional[UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Optional[int] = Query(None, ge=1, description="Bucket width in seconds (default: picked from the range)"),
+    points: Optional[int] = Query(None, ge=3, description="Downsample each series to at most this many timed points (LTTB); buckets where every probe failed are always kept"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Latency and failure aggregates per time bucket, for charts"""
+    if len(endpoint_id) > settings.SERIES_MAX_ENDPOINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.SERIES_MAX_ENDPOINTS} endpoints per request"
+        )
     
-    if query_params.start_date is not None:
-        query = query.where(MonitoringLog.created_at >= query_params.start_date)
+    end = _as_utc(end) if end is not None else datetime.now(timezone.utc)
+    start = _as_utc(start) if start is not None else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
     
-    if query_params.end_date is not None:
-        query = query.where(MonitoringLog.created_at <= query_params.end_date)
+    max_buckets = settings.SERIES_MAX_BUCKETS
+    if bucket is None:
+        bucket = pick_bucket(start, end, max_buckets)
+    elif (end - start).total_seconds() / bucket > max_buckets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bucket of {bucket}s gives more than {max_buckets} buckets for this range"
+        )
     
-    query = query.offset(query_params.offset).limit(query_params.limit)
-    result = await db.execute(query)
-    logs = result.scalars().all()
-    return logs
+    series = await load_series(db, endpoint_id, start, end, bucket, installation_id)
+    if points is not None:
+        for entry in series:
+            entry["points"] = lttb(entry["points"], points)
+    
+    return json_response({
+        "start": start,
+        "end": end,
+        "bucket_seconds": bucket,
+        "series": series,
+    })
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are taken as UTC, like the stored ones
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
 
 
 @router.get("/{log_id}", response_model=MonitoringLogWithDetails)
@@ -159,27 +251,23 @@ async def get_monitoring_log(
     )
 
 
-@router.get("/stats/summary")
-async def get_monitoring_stats(
+def stats_summary_query(
+    start_time: datetime,
+    end_time: datetime,
     installation_id: Optional[UUID] = None,
-    endpoint_id: Optional[UUID] = None,
-    hours: int = Query(24, ge=1, le=168),  # Last 1-168 hours (1 week max)
-    db: AsyncSession = Depends(get_async_db)
+    endpoint_id: Optional[UUID] = None
 ):
-    from sqlalchemy import func
-    from datetime import timedelta
-    
-    # Calculate time window
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(hours=hours)
+    """Probe counts and latency per alert level over a time window"""
+    # Heartbeat rows (change-only storage) stand for extra_data.count probes
+    samples = heartbeat_value("count", 1)
+    timed = case((MonitoringLog.response_time_ms.is_not(None), samples), else_=0)
     
-    # Base query
     query = select(
         MonitoringLog.alert_level,
-        func.count(MonitoringLog.id).label('count'),
-        func.avg(MonitoringLog.response_time_ms).label('avg_response_time'),
-        func.max(MonitoringLog.response_time_ms).label('max_response_time'),
-        func.min(MonitoringLog.response_time_ms).label('min_response_time')
+        func.sum(samples).label('count'),
+        (func.sum(MonitoringLog.response_time_ms * samples).cast(Float) / func.nullif(func.sum(timed), 0)).label('avg_response_time'),
+        func.max(heartbeat_value("max_ms", MonitoringLog.response_time_ms)).label('max_response_time'),
+        func.min(heartbeat_value("min_ms", MonitoringLog.response_time_ms)).label('min_response_time')
     ).where(
         MonitoringLog.created_at >= start_time,
         MonitoringLog.created_at <= end_time
@@ -191,7 +279,21 @@ async def get_monitoring_stats(
     if endpoint_id:
         query = query.where(MonitoringLog.endpoint_id == endpoint_id)
     
-    query = query.group_by(MonitoringLog.alert_level)
+    return query.group_by(MonitoringLog.alert_level)
+
+
+@router.get("/stats/summary")
+async def get_monitoring_stats(
+    installation_id: Optional[UUID] = None,
+    endpoint_id: Optional[UUID] = None,
+    hours: int = Query(24, ge=1, le=168),  # Last 1-168 hours (1 week max)
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Calculate time window
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(hours=hours)
+    
+    query = stats_summary_query(start_time, end_time, installation_id, endpoint_id)
     
     result = await db.execute(query)
     stats = result.all()
@@ -205,7 +307,7 @@ async def get_monitoring_stats(
     
     for stat in stats:
         summary["stats_by_alert_level"][stat.alert_level or "unknown"] = {
-            "count": stat.count,
+            "count": int(stat.count),
             "avg_response_time_ms": float(stat.avg_response_time) if stat.avg_response_time else None,
             "max_response_time_ms": stat.max_response_time,
             "min_response_time_ms": stat.min_response_time
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+from uuid import UUID
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.fast_json import json_response
+from app.models import Client, Installation, Instance, Module, Endpoint
+from app.services.sla import load_totals, summarize, combine
+
+router = APIRouter()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are taken as UTC; days are UTC days
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _month_window(month: Optional[str], now: datetime):
+    if month is None:
+        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        try:
+            start = datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="month must be formatted as YYYY-MM"
+            )
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+@router.get("/")
+async def get_sla(
+    installation_id: Optional[UUID] = None,
+    endpoint_id: Optional[UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    objective_pct: Optional[float] = Query(None, gt=0, lt=100, description="Availability objective (default: SLA_OBJECTIVE_PCT)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Availability, downtime and error budget per target (default window: current month to date)"""
+    now = datetime.now(timezone.utc)
+    end = min(_as_utc(end), now) if end is not None else now
+    start = _as_utc(start) if start is not None else _month_window(None, now)[0]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end (and not in the future)"
+        )
+    objective = objective_pct if objective_pct is not None else settings.SLA_OBJECTIVE_PCT
+
+    totals = await load_totals(
+        db, start, end,
+        installation_ids=[installation_id] if installation_id is not None else None,
+        endpoint_id=endpoint_id,
+        now=now
+    )
+    return json_response({
+        "start": start,
+        "end": end,
+        "targets": [
+            {"installation_id": key[0], "endpoint_id": key[1], **summarize(entry, objective)}
+            for key, entry in sorted(totals.items())
+        ],
+    })
+
+
+@router.get("/clients/{client_id}/report")
+async def get_client_sla_report(
+    client_id: UUID,
+    month: Optional[str] = Query(None, description="Month as YYYY-MM (default: current month)"),
+    objective_pct: Optional[float] = Query(None, gt=0, lt=100, description="Availability objective (default: SLA_OBJECTIVE_PCT)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Monthly SLA of every installation of a client, per endpoint and overall"""
+    client = (await db.execute(select(Client.id, Client.name).where(Client.id == client_id))).one_or_none()
+    if client is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Client with id {client_id} not found"
+        )
+
+    now = datetime.now(timezone.utc)
+    start, end = _month_window(month, now)
+    if start >= now:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="month is in the future"
+        )
+    end = min(end, now)
+    objective = objective_pct if objective_pct is not None else settings.SLA_OBJECTIVE_PCT
+
+    installations = (await db.execute(
+        select(
+            Installation.id,
+            Instance.name.label("instance_name"),
+            Instance.environment,
+            Module.name.label("module_name"),
+        )
+        .join(Instance, Installation.instance_id == Instance.id)
+        .join(Module, Installation.module_id == Module.id)
+        .where(Instance.client_id == client_id)
+        .order_by(Instance.name, Module.name)
+    )).all()
+
+    totals = await load_totals(db, start, end, installation_ids=[row.id for row in installations], now=now)
+    endpoint_ids = {key[1] for key in totals}
+    endpoint_names = {}
+    if endpoint_ids:
+        result = await db.execute(select(Endpoint.id, Endpoint.name).where(Endpoint.id.in_(endpoint_ids)))
+        endpoint_names = dict(result.all())
+
+    report = []
+    for installation in installations:
+        entries = sorted(
+            ((key[1], entry) for key, entry in totals.items() if key[0] == installation.id),
+            key=lambda item: endpoint_names.get(item[0], "")
+        )
+        report.append({
+            "installation_id": installation.id,
+            "instance_name": installation.instance_name,
+            "environment": installation.environment,
+            "module_name": installation.module_name,
+            **summarize(combine(entry for _, entry in entries), objective),
+            "endpoints": [
+                {"endpoint_id": endpoint_id, "endpoint_name": endpoint_names.get(endpoint_id), **summarize(entry, objective)}
+                for endpoint_id, entry in entries
+            ],
+        })
+
+    return json_response({
+        "client_id": client.id,
+        "client_name": client.name,
+        "month": start.strftime("%Y-%m"),
+        "start": start,
+        "end": end,
+        "installations": report,
+    })
@@ -30,6 +30,150 @@ class Settings(BaseSettings):
     HEALTH_CHECK_INTERVAL: int = 30
     HEALTH_CHECK_TIMEOUT: int = 10
     
+    # Probing
+    PROBE_CONCURRENCY: int = 100
+    PROBE_RESPONSE_BODY_MAX: int = 1024
+    PROBE_WRITER_BATCH_SIZE: int = 500
+    PROBE_WRITER_FLUSH_INTERVAL: float = 1.0
+    PROBE_WRITER_QUEUE_SIZE: int = 10000
+    PROBE_TARGET_REFRESH_INTERVAL: int = 60
+    
+    # Adaptive probe frequency
+    PROBE_ADAPTIVE: bool = True
+    PROBE_TICK_INTERVAL: int = 5
+    PROBE_MIN_INTERVAL: int = 10
+    PROBE_MAX_INTERVAL: int = 300
+    PROBE_BACKOFF_FACTOR: float = 1.5
+    PROBE_MAX_OVERLAPPING_TICKS: int = 3
+    
+    # Startup: compare the database with the alembic head (strict | warn | off)
+    STARTUP_SCHEMA_CHECK: str = "strict"
+    
+    # Probing runs in python -m app.probe_runner; set true to probe inside a
+    # single API process (development without a separate runner)
+    SCHEDULER_EMBEDDED: bool = False
+    PROBE_RUNNER_METRICS_PORT: int = 9101  # 0 disables the probe runner's /metrics
+    
+    # Scheduler leader election: only the holder of this advisory lock probes
+    SCHEDULER_LEADER_ELECTION: bool = True
+    SCHEDULER_LOCK_KEY: int = 7300112
+    SCHEDULER_LEADER_RENEW_INTERVAL: float = 5.0
+    
+    # Probe sharding across scheduler nodes (replaces leader election when enabled)
+    PROBE_SHARDING_ENABLED: bool = False
+    PROBE_SHARD_SLOTS: int = 1024
+    PROBE_SHARD_VNODES: int = 64
+    PROBE_SHARD_RENEW_INTERVAL: float = 5.0
+    PROBE_SHARD_LEASE_TTL: float = 15.0
+    
+    # Per-host circuit breaker
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_BREAKER_CANARY_INTERVAL: int = 30
+    
+    # Probe transport: DNS cache and connection pre-warming
+    PROBE_DNS_CACHE_ENABLED: bool = True
+    DNS_CACHE_TTL: int = 300
+    DNS_NEGATIVE_TTL: int = 30
+    PROBE_KEEPALIVE_EXPIRY: float = 5.0  # httpx default; longer expiry measured slower in benchmarks.probe_throughput
+    PROBE_PREWARM_ENABLED: bool = True
+    PROBE_PREWARM_MAX_PER_HOST: int = 4
+    PROBE_PREWARM_MAX_AGE: float = 10.0
+    
+    # Probe result storage: "full" writes every result, "changes" only state
+    # changes plus periodic heartbeat summaries
+    PROBE_STORAGE_MODE: str = "full"
+    PROBE_HEARTBEAT_INTERVAL: int = 300
+    PROBE_LATENCY_BAND_PCT: float = 50.0
+    PROBE_LATENCY_BAND_MIN_MS: int = 50
+    
+    # Windowed alert rules (defaults for endpoints without their own rule config)
+    ALERT_RULES_ENABLED: bool = True
+    ALERT_FAILURES: int = 3
+    ALERT_WINDOW: int = 5
+    ALERT_RECOVERY: int = 2
+    ALERT_LATENCY_PERCENTILE: float = 95.0
+    ALERT_LATENCY_WINDOW: int = 300
+    ALERT_LATENCY_MIN_SAMPLES: int = 5
+    ALERT_HYSTERESIS_PCT: float = 10.0
+    ALERT_BUFFER_SIZE: int = 512
+    ALERT_REBUILD_LOOKBACK: int = 900
+    ALERT_PUSHED_CHANNEL: str = "pushed_results"  # API -> probe runner, results to evaluate
+    ALERT_PUSHED_QUEUE_SIZE: int = 10000
+    
+    # Latency anomaly detection against learned per-endpoint baselines
+    ANOMALY_DETECTION_ENABLED: bool = True
+    ANOMALY_ALPHA: float = 0.05  # Overall baseline smoothing per sample
+    ANOMALY_HOURLY_ALPHA: float = 0.02  # Hour of day baselines
+    ANOMALY_MIN_SAMPLES: int = 30
+    ANOMALY_Z_THRESHOLD: float = 4.0
+    ANOMALY_MIN_DELTA_MS: int = 50
+    ANOMALY_ALERT_FAILURES: int = 3  # Anomalous results among the last ANOMALY_ALERT_WINDOW to alert
+    ANOMALY_ALERT_WINDOW: int = 5
+    ANOMALY_PERSIST_INTERVAL: int = 300
+    
+    # Incidents (runs of non-ok results) maintained as results are written
+    INCIDENTS_ENABLED: bool = True
+    
+    # Alert notification outbox
+    ALERT_DISPATCH_ENABLED: bool = True
+    ALERT_DISPATCH_INTERVAL: int = 30
+    ALERT_DISPATCH_BATCH_SIZE: int = 1000
+    ALERT_DISPATCH_CONCURRENCY: int = 10
+    ALERT_DISPATCH_LEASE: int = 120  # Renewed before each webhook; keep well above ALERT_WEBHOOK_TIMEOUT
+    ALERT_DISPATCH_MAX_ATTEMPTS: int = 8
+    ALERT_RETRY_BASE_DELAY: int = 30
+    ALERT_RETRY_MAX_DELAY: int = 3600
+    ALERT_WEBHOOK_TIMEOUT: int = 10
+    
+    # Live status streaming
+    LIVE_UPDATES_ENABLED: bool = True
+    LIVE_SUBSCRIBER_QUEUE_SIZE: int = 100
+    LIVE_KEEPALIVE_INTERVAL: int = 15
+    
+    # Relay live events between processes (probe runner -> API workers)
+    LIVE_RELAY_ENABLED: bool = True
+    LIVE_RELAY_CHANNEL: str = "live_events"
+    LIVE_RELAY_QUEUE_SIZE: int = 10000
+    LIVE_RELAY_RECONNECT_DELAY: float = 5.0
+    
+    # Installation API key cache (push ingestion)
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL: int = 300
+    API_KEY_NEGATIVE_TTL: int = 30
+    
+    # Push ingestion limits (results per second; bursts must cover the largest batch)
+    INGEST_INSTALLATION_RATE: float = 20.0
+    INGEST_INSTALLATION_BURST: int = 1000
+    INGEST_CLIENT_RATE: float = 200.0
+    INGEST_CLIENT_BURST: int = 5000
+    INGEST_DAILY_QUOTA: int = 500000  # per installation, 0 = unlimited
+    INGEST_QUOTA_FLUSH_INTERVAL: int = 30
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    
+    # SQL query accounting
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_HEADERS: bool = True
+    SLOW_QUERY_MS: int = 200
+    N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # List responses with at least this many rows are sent in chunks
+    JSON_STREAM_THRESHOLD: int = 500
+    JSON_STREAM_CHUNK_SIZE: int = 100
+    
+    # Time-bucketed series endpoint
+    SERIES_MAX_BUCKETS: int = 2000
+    SERIES_MAX_ENDPOINTS: int = 50
+    
+    # Uptime / SLA
+    SLA_OBJECTIVE_PCT: float = 99.9
+    SLA_MAX_GAP: int = 600  # A result counts as observed time for at most this many seconds
+    SLA_CLOSE_DELAY: int = 3600  # Days are cached this long after they end
+    SLA_REFRESH_INTERVAL: int = 300  # Probe runner job caching closed days and recomputing stale ones
+    SLA_BACKFILL_DAYS: int = 92  # Closed days the refresh job keeps cached; older ones are read from the logs
+    
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
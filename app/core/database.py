@@ -18,7 +18,7 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
-# Sync engine and session (for Celery tasks)
+# Sync engine and session (for scripts and benchmarks)
 sync_engine = create_engine(
     settings.SYNC_DATABASE_URL,
     echo=settings.APP_ENV == "development"
@@ -0,0 +1,288 @@
+"""
+Prometheus metrics shared by the API, the probe pipeline and the scheduler.
+
+When several worker processes are running (uvicorn --workers, gunicorn), set
+PROMETHEUS_MULTIPROC_DIR to an empty, writable directory before the process
+starts. Every process then writes its samples to memory-mapped files in that
+directory and /metrics aggregates them, so any worker can answer a scrape.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+MULTIPROCESS_MODE = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Probe round-trips range from a few ms to the configured timeout
+PROBE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# HTTP API
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP requests handled by the API",
+    ["method", "route", "status"],
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+# Probes
+probes_total = Counter(
+    "probes_total",
+    "Probes executed, by outcome (alert level)",
+    ["module", "endpoint", "outcome"],
+)
+probe_duration_seconds = Histogram(
+    "probe_duration_seconds",
+    "Probe round-trip time",
+    ["module", "endpoint"],
+    buckets=PROBE_BUCKETS,
+)
+circuit_breaker_open_hosts = Gauge(
+    "circuit_breaker_open_hosts",
+    "Hosts whose probe circuit is open or half-open",
+    multiprocess_mode="livesum",
+)
+circuit_breaker_skipped_total = Counter(
+    "circuit_breaker_skipped_total",
+    "Probes skipped and recorded as DOWN because the host circuit was open",
+)
+probe_dns_seconds = Histogram(
+    "probe_dns_seconds",
+    "DNS resolution time of probe targets (cache misses only)",
+    buckets=PROBE_BUCKETS,
+)
+dns_cache_lookups_total = Counter(
+    "dns_cache_lookups_total",
+    "Probe DNS cache lookups",
+    ["result"],
+)
+prewarmed_connections_total = Counter(
+    "prewarmed_connections_total",
+    "Pre-opened probe connections, by whether a probe used them before they expired",
+    ["result"],
+)
+
+# Scheduler
+scheduler_cycles_total = Counter(
+    "scheduler_cycles_total",
+    "Health check cycles run by the scheduler",
+    ["result"],
+)
+scheduler_cycle_duration_seconds = Histogram(
+    "scheduler_cycle_duration_seconds",
+    "Wall time of a full health check cycle",
+    buckets=PROBE_BUCKETS,
+)
+scheduler_lag_seconds = Gauge(
+    "scheduler_lag_seconds",
+    "Delay between the planned and the actual start of the last cycle",
+    multiprocess_mode="livemax",
+)
+scheduler_leader = Gauge(
+    "scheduler_leader",
+    "Whether this process holds the scheduler leadership lock",
+    multiprocess_mode="livesum",
+)
+probe_shard_slots = Gauge(
+    "probe_shard_slots",
+    "Probe shard slots owned by this process",
+    multiprocess_mode="livesum",
+)
+probe_shard_nodes = Gauge(
+    "probe_shard_nodes",
+    "Live nodes on the probe shard ring",
+    multiprocess_mode="livemax",
+)
+probe_targets = Gauge(
+    "probe_targets",
+    "Active (installation, endpoint) pairs known to the scheduler",
+    multiprocess_mode="livesum",
+)
+probe_mean_interval_seconds = Gauge(
+    "probe_mean_interval_seconds",
+    "Mean adaptive probe interval across active targets",
+    multiprocess_mode="livemax",
+)
+
+# Result writer
+writer_queue_depth = Gauge(
+    "writer_queue_depth",
+    "Probe results waiting to be written to the database",
+    multiprocess_mode="livesum",
+)
+writer_batch_duration_seconds = Histogram(
+    "writer_batch_duration_seconds",
+    "Time spent writing one batch of monitoring logs",
+)
+writer_rows_total = Counter(
+    "writer_rows_total",
+    "Monitoring log rows written by the result writer",
+)
+probe_results_folded_total = Counter(
+    "probe_results_folded_total",
+    "Probe results folded into heartbeat summaries instead of stored (change-only mode)",
+)
+probe_anomalies_total = Counter(
+    "probe_anomalies_total",
+    "Probe results whose latency was anomalous against the endpoint baseline",
+)
+
+# Alert notifications
+alert_outbox_entries_total = Counter(
+    "alert_outbox_entries_total",
+    "Alert transitions written to the outbox",
+)
+alert_webhooks_total = Counter(
+    "alert_webhooks_total",
+    "Alert webhook deliveries (one per client and dispatch window)",
+    ["result"],
+)
+alert_dispatch_duration_seconds = Histogram(
+    "alert_dispatch_duration_seconds",
+    "Wall time of one alert dispatch pass",
+    buckets=PROBE_BUCKETS,
+)
+
+# Live updates
+live_subscribers = Gauge(
+    "live_subscribers",
+    "Open live status streams",
+    multiprocess_mode="livesum",
+)
+live_events_total = Counter(
+    "live_events_total",
+    "Status and alert events published to live subscribers",
+)
+live_events_dropped_total = Counter(
+    "live_events_dropped_total",
+    "Live events dropped because a subscriber queue was full",
+)
+live_relay_events_total = Counter(
+    "live_relay_events_total",
+    "Live events relayed between processes through LISTEN/NOTIFY",
+    ["result"],
+)
+
+# Push ingestion
+api_key_cache_lookups_total = Counter(
+    "api_key_cache_lookups_total",
+    "Installation API key lookups, by cache outcome",
+    ["result"],
+)
+ingest_rejections_total = Counter(
+    "ingest_rejections_total",
+    "Pushed result batches rejected by rate limits or quotas",
+    ["scope"],
+)
+
+# Database pool
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured size of the async connection pool",
+    multiprocess_mode="livesum",
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the async pool",
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Overflow connections currently open in the async pool",
+    multiprocess_mode="livesum",
+)
+
+
+def update_pool_metrics():
+    """Sample the async engine pool; cheap enough to run on every scrape"""
+    from app.core.database import async_engine
+
+    pool = async_engine.pool
+    # NullPool/StaticPool (tests, scripts) do not expose these counters
+    if not hasattr(pool, "checkedout"):
+        return
+    db_pool_size.set(pool.size())
+    db_pool_checked_out.set(pool.checkedout())
+    db_pool_overflow.set(max(pool.overflow(), 0))
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type"""
+    update_pool_metrics()
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def serve(port: int):
+    """Expose metrics on their own port, for processes without an HTTP API"""
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    start_http_server(port, registry=registry)
+
+
+def mark_process_dead():
+    """Drop this process' live gauges from the shared multiprocess directory"""
+    if MULTIPROCESS_MODE:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request.
+
+    Requests are labelled with the matched route template ("/clients/{client_id}")
+    rather than the raw path, which keeps label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_request_duration_seconds.labels(method, route_path).observe(time.perf_counter() - start)
+            http_requests_total.labels(method, route_path, str(status_code)).inc()
@@ -0,0 +1,39 @@
+"""
+Column projection for list endpoints.
+
+A ``fields`` query parameter (comma separated, e.g. "alert_level,response_time_ms")
+selects the response fields; only their columns are read from the database
+and only they are encoded. The ids in ``always`` are included regardless, so
+rows stay addressable. Without ``fields`` the full response model is returned.
+"""
+from typing import Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import Column, Table
+
+FIELDS_QUERY = Query(
+    None,
+    description="Comma separated response fields to return, e.g. alert_level,response_time_ms (default: all)"
+)
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel], always: Iterable[str] = ("id",)) -> Tuple[str, ...]:
+    """Requested fields in the response model's order; 400 on unknown names"""
+    names = tuple(model.model_fields)
+    if not fields:
+        return names
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(names)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; available: {', '.join(names)}"
+        )
+    requested.update(always)
+    return tuple(name for name in names if name in requested)
+
+
+def columns(table: Table, fields: Iterable[str]) -> List[Column]:
+    return [table.c[name] for name in fields]
+
@@ -0,0 +1,118 @@
+"""
+Per-request SQL accounting.
+
+SQLAlchemy cursor events time every statement and attribute it to the HTTP
+request being served (tracked with a context variable set by
+QueryStatsMiddleware). Each response gets the query count and total DB time
+as debug headers, slow statements are logged with their route, and a
+statement repeated N_PLUS_ONE_THRESHOLD times within one request is reported
+as a likely N+1 pattern.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Queries issued while serving one request"""
+    __slots__ = ("count", "total_time", "statements", "route")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Dict[str, int] = {}
+        self.route = "unmatched"
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated_statements(self, threshold: int) -> Dict[str, int]:
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, not the pooled connection: a statement that
+    # raises never reaches after_cursor_execute and would leave a stale start time
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._query_start_time
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if duration * 1000 >= settings.SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "background"
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms) on {route}: {statement[:1000]}")
+
+
+def install(engine):
+    """Attach the timing hooks to an engine (sync or async)"""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware that scopes query accounting to each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                if route is not None:
+                    stats.route = route.path
+                if settings.QUERY_STATS_HEADERS:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-query-time-ms", f"{stats.total_time * 1000:.1f}".encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats):
+        route = scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        metrics.http_request_db_queries.labels(scope["method"], route_path).observe(stats.count)
+
+        for statement, count in stats.repeated_statements(settings.N_PLUS_ONE_THRESHOLD).items():
+            logger.warning(
+                f"Possible N+1 on {scope['method']} {route_path}: "
+                f"statement executed {count} times in one request: {statement[:500]}"
+            )
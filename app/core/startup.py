@@ -0,0 +1,95 @@
+"""
+Startup checks and timing.
+
+Instead of running Base.metadata.create_all on every boot, the API and the
+probe runner compare the database's alembic_version with the head revision
+of alembic/versions: one query, and no DDL racing between processes that
+start together. STARTUP_SCHEMA_CHECK picks what a mismatch does: "strict"
+refuses to start, "warn" logs and continues, "off" skips the check.
+
+StartupTimer records how long each startup phase took and logs the
+breakdown once the process is ready.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent.parent / "alembic"
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+class StartupTimer:
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, since: float):
+        self.phases.append((name, time.perf_counter() - since))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def report(self, what: str = "Startup"):
+        total = time.perf_counter() - self.started
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        logger.info(f"{what} finished in {total * 1000:.0f} ms ({breakdown})")
+
+
+def head_revisions() -> Optional[Set[str]]:
+    """Head revisions of the migration scripts shipped with this code, None when they are not deployed"""
+    if not ALEMBIC_DIR.is_dir():
+        return None
+    # Alembic is only needed here, not on the request path
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def current_revisions(engine: AsyncEngine) -> Set[str]:
+    async with engine.connect() as conn:
+        exists = (await conn.execute(text("SELECT to_regclass('alembic_version') IS NOT NULL"))).scalar()
+        if not exists:
+            return set()
+        return set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all())
+
+
+async def check_schema_version(engine: AsyncEngine):
+    """Make sure the database was migrated to the revision this code expects"""
+    mode = settings.STARTUP_SCHEMA_CHECK
+    if mode == "off":
+        return
+    expected = head_revisions()
+    if expected is None:
+        logger.warning(f"Migration scripts not found in {ALEMBIC_DIR}, schema version not checked")
+        return
+    current = await current_revisions(engine)
+    if current == expected:
+        logger.info(f"Database schema at revision {', '.join(sorted(current))}")
+        return
+    message = (
+        f"Database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+        f"expected {', '.join(sorted(expected))}; run 'alembic upgrade head'"
+    )
+    if mode == "strict":
+        raise SchemaVersionError(message)
+    logger.warning(message)
@@ -1,13 +1,17 @@
-from fastapi import FastAPI
+import time
+_started = time.perf_counter()
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core import metrics, query_stats
 from app.core.database import async_engine
-from app.models import Base
-from app.services.background_scheduler import BackgroundScheduler
+from app.core.startup import StartupTimer, check_schema_version
+from app.services.ingest_limits import QuotaFlusher
 
 # Configure logging
 logging.basicConfig(
@@ -16,8 +20,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize background scheduler
-scheduler = BackgroundScheduler()
+timer = StartupTimer(_started)
+timer.record("imports", _started)
+
+# Probing, alert delivery and the live relay are only imported when this
+# process runs them
+scheduler = None
+dispatcher = None
+relay_enabled = settings.LIVE_UPDATES_ENABLED and settings.LIVE_RELAY_ENABLED
+with timer.phase("services"):
+    if settings.SCHEDULER_EMBEDDED:
+        from app.services.background_scheduler import BackgroundScheduler
+        from app.services.alert_dispatcher import AlertDispatcher
+        scheduler = BackgroundScheduler()
+        if settings.ALERT_DISPATCH_ENABLED:
+            dispatcher = AlertDispatcher()
+    quota_flusher = QuotaFlusher()
+    if relay_enabled:
+        from app.services.live_relay import LiveNotifier, LiveListener
+        live_notifier = LiveNotifier()
+        live_listener = LiveListener()
 
 
 @asynccontextmanager
@@ -25,24 +47,46 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting application...")
     
-    # Create database tables
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created/verified")
+    # Schema changes are applied by alembic, never at startup
+    with timer.phase("schema check"):
+        await check_schema_version(async_engine)
     
-    # Start background scheduler
-    scheduler.start()
-    logger.info("Background scheduler started")
+    with timer.phase("background tasks"):
+        if relay_enabled:
+            live_listener.start()
+            live_notifier.start()
+        
+        # Start background scheduler
+        if scheduler is not None:
+            scheduler.start()
+            logger.info("Background scheduler started")
+        else:
+            logger.info("Probing disabled in this process; run python -m app.probe_runner to probe")
+        
+        # Alert notifications are delivered outside the probe loop
+        if dispatcher is not None:
+            dispatcher.start()
+        quota_flusher.start()
+    timer.report()
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
-    scheduler.shutdown()
-    logger.info("Background scheduler stopped")
+    if scheduler is not None:
+        await scheduler.shutdown()
+        logger.info("Background scheduler stopped")
+    if dispatcher is not None:
+        await dispatcher.stop()
+    await quota_flusher.stop()
+    if relay_enabled:
+        await live_notifier.stop()
+        await live_listener.stop()
+    metrics.mark_process_dead()
 
 
 # Create FastAPI app
+_app_started = time.perf_counter()
 app = FastAPI(
     title="Multi-Client Monitoring System",
     description="Sistema de monitoramento multi-cliente com health checks automatizados",
@@ -59,6 +103,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if settings.QUERY_STATS_ENABLED:
+    query_stats.install(async_engine)
+    app.add_middleware(query_stats.QueryStatsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -73,6 +124,15 @@ async def root():
     }
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        payload, content_type = metrics.render_latest()
+        return Response(content=payload, media_type=content_type)
+
+timer.record("app setup", _app_started)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
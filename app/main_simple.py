@@ -1,12 +1,18 @@
-from fastapi import FastAPI
+import time
+_started = time.perf_counter()
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core import metrics, query_stats
 from app.core.database import async_engine
-from app.models import Base
+from app.core.startup import StartupTimer, check_schema_version
+from app.services.ingest_limits import QuotaFlusher
+from app.services.live_relay import LiveNotifier, LiveListener
 
 # Configure logging
 logging.basicConfig(
@@ -15,20 +21,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+timer = StartupTimer(_started)
+timer.record("imports", _started)
+
+quota_flusher = QuotaFlusher()
+relay_enabled = settings.LIVE_UPDATES_ENABLED and settings.LIVE_RELAY_ENABLED
+live_notifier = LiveNotifier() if relay_enabled else None
+live_listener = LiveListener() if relay_enabled else None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting application...")
     
-    # Create database tables (if needed)
-    # async with async_engine.begin() as conn:
-    #     await conn.run_sync(Base.metadata.create_all)
-    # logger.info("Database tables created/verified")
+    # Schema changes are applied by alembic, never at startup
+    with timer.phase("schema check"):
+        await check_schema_version(async_engine)
+    
+    # Probe results arrive from the probe runner through the live relay
+    with timer.phase("background tasks"):
+        if relay_enabled:
+            live_listener.start()
+            live_notifier.start()
+        quota_flusher.start()
+    timer.report()
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await quota_flusher.stop()
+    if relay_enabled:
+        await live_notifier.stop()
+        await live_listener.stop()
+    metrics.mark_process_dead()
 
 # Create FastAPI app
 app = FastAPI(
@@ -47,6 +73,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if settings.QUERY_STATS_ENABLED:
+    query_stats.install(async_engine)
+    app.add_middleware(query_stats.QueryStatsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -59,6 +92,12 @@ async def root():
         "redoc": "/redoc"
     }
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        payload, content_type = metrics.render_latest()
+        return Response(content=payload, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
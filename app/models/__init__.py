@@ -6,6 +6,12 @@ from .installation import Installation
 from .endpoint import Endpoint
 from .threshold import Threshold
 from .monitoring_log import MonitoringLog
+from .alert_outbox import AlertOutbox
+from .ingest_quota import IngestQuota
+from .probe_node import ProbeNode, ProbeSlot
+from .sla import SlaDaily, SlaDay, SlaStale
+from .anomaly_baseline import AnomalyBaseline
+from .incident import Incident
 
 __all__ = [
     "Base",
@@ -19,5 +25,14 @@ __all__ = [
     "Installation",
     "Endpoint",
     "Threshold",
-    "MonitoringLog"
+    "MonitoringLog",
+    "AlertOutbox",
+    "IngestQuota",
+    "ProbeNode",
+    "ProbeSlot",
+    "SlaDaily",
+    "SlaDay",
+    "SlaStale",
+    "AnomalyBaseline",
+    "Incident"
 ]
\ No newline at end of file
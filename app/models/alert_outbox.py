@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, Index, DateTime, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base, UUIDMixin
+
+
+class AlertOutbox(Base, UUIDMixin):
+    __tablename__ = "alert_outbox"
+    
+    # Foreign keys
+    client_id = Column(UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), nullable=False)
+    endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), nullable=False)
+    
+    # Alert transition
+    event = Column(String(20), nullable=False)  # triggered, resolved
+    alert_level = Column(String(20), nullable=True)
+    payload = Column(JSON, nullable=True)
+    
+    # Delivery state
+    status = Column(String(20), default="pending", server_default="pending", nullable=False)  # pending, sent, failed, skipped
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Only pending entries are scanned by the dispatcher
+    __table_args__ = (
+        Index(
+            'ix_alert_outbox_pending', 'next_attempt_at',
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, ForeignKey, DateTime, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class AnomalyBaseline(Base):
+    __tablename__ = "anomaly_baselines"
+    
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), primary_key=True)
+    endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Packed float32 EWMA mean / variance / sample count per hour of day plus overall
+    state = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
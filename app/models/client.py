@@ -12,5 +12,8 @@ class Client(BaseModel, SoftDeleteMixin):
     phone = Column(String(50), nullable=True)
     timezone = Column(String(50), default="America/Sao_Paulo", nullable=False)
     
+    # Alert notifications
+    webhook_url = Column(String(1024), nullable=True)
+    
     # Relationships
     instances = relationship("Instance", back_populates="client", cascade="all, delete-orphan")
\ No newline at end of file
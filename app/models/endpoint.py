@@ -20,6 +20,10 @@ class Endpoint(BaseModel):
     expected_response_time_ms = Column(Integer, default=1000, nullable=False)
     timeout_ms = Column(Integer, default=30000, nullable=False)
     
+    # Adaptive probing bounds (fall back to PROBE_MIN_INTERVAL/PROBE_MAX_INTERVAL)
+    min_probe_interval_s = Column(Integer, nullable=True)
+    max_probe_interval_s = Column(Integer, nullable=True)
+    
     # Relationships
     module = relationship("Module", back_populates="endpoints")
     thresholds = relationship("Threshold", back_populates="endpoint", cascade="all, delete-orphan")
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, Index, DateTime, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base, UUIDMixin
+
+
+class Incident(Base, UUIDMixin):
+    __tablename__ = "incidents"
+    
+    # Foreign keys
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), nullable=False)
+    endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), nullable=False)
+    
+    # Consecutive non-ok results of one target
+    started_at = Column(DateTime(timezone=True), nullable=False)  # First non-ok result
+    last_failure_at = Column(DateTime(timezone=True), nullable=False)  # Latest non-ok result
+    ended_at = Column(DateTime(timezone=True), nullable=True)  # First ok result afterwards; open while null
+    peak_level = Column(String(20), nullable=False)  # warning, error, critical
+    samples = Column(Integer, nullable=False)  # Non-ok probes, heartbeat rows counting their folded probes
+    last_status_code = Column(Integer, nullable=True)
+    last_error_message = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # At most one open incident per target; also the lookup of the write path
+        Index(
+            'uq_incidents_open', 'installation_id', 'endpoint_id',
+            unique=True, postgresql_where=text("ended_at IS NULL")
+        ),
+        Index('ix_incidents_target_started', 'installation_id', 'endpoint_id', 'started_at'),
+        Index('ix_incidents_started_at', 'started_at'),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class IngestQuota(Base):
+    __tablename__ = "ingest_quotas"
+    
+    # One row per installation and UTC day
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    
+    # Counters, flushed periodically from the API processes
+    accepted = Column(Integer, default=0, server_default="0", nullable=False)
+    rejected = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
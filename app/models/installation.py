@@ -1,9 +1,15 @@
 from sqlalchemy import Column, Boolean, ForeignKey, JSON, UniqueConstraint, String
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+import hashlib
 from .base import BaseModel, SoftDeleteMixin
 
 
+def hash_api_key(api_key: str) -> str:
+    """SHA-256 of an API key; keys are random tokens, so a fast hash is enough"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
 class Installation(BaseModel, SoftDeleteMixin):
     __tablename__ = "installations"
     
@@ -11,8 +17,10 @@ class Installation(BaseModel, SoftDeleteMixin):
     module_id = Column(UUID(as_uuid=True), ForeignKey("modules.id", ondelete="CASCADE"), nullable=False, index=True)
     instance_id = Column(UUID(as_uuid=True), ForeignKey("instances.id", ondelete="CASCADE"), nullable=False, index=True)
     
-    # Authentication
+    # Authentication. The plaintext key is kept: probes send it to the installation.
+    # api_key_hash is only the lookup index for pushed results, not at-rest protection.
     api_key = Column(String(255), nullable=False, index=True)
+    api_key_hash = Column(String(64), nullable=True, index=True)
     
     # Configuration
     config = Column(JSON, nullable=True)  # Configuration specific to this installation
@@ -23,6 +31,11 @@ class Installation(BaseModel, SoftDeleteMixin):
     thresholds = relationship("Threshold", back_populates="installation", cascade="all, delete-orphan")
     monitoring_logs = relationship("MonitoringLog", back_populates="installation", cascade="all, delete-orphan")
     
+    @validates("api_key")
+    def _hash_api_key(self, key, value):
+        self.api_key_hash = hash_api_key(value) if value else None
+        return value
+    
     # Constraints
     __table_args__ = (
         UniqueConstraint('module_id', 'instance_id', name='_module_instance_uc'),
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Text, JSON, Index, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Text, JSON, Index, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+import uuid
 from .base import Base, UUIDMixin
 
 
 class MonitoringLog(Base, UUIDMixin):
     __tablename__ = "monitoring_logs"
     
+    # The primary key index is enough; no second index on id for the busiest table
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
     # Foreign keys
     installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), nullable=False)
     endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), nullable=False)
@@ -19,21 +23,31 @@ class MonitoringLog(Base, UUIDMixin):
     error_message = Column(Text, nullable=True)
     
     # Alert levels
-    alert_level = Column(String(20), nullable=True, index=True)  # ok, warning, error, critical
+    alert_level = Column(String(20), nullable=True)  # ok, warning, error, critical
     alert_triggered = Column(Boolean, default=False, nullable=False)
     
     # Additional metadata
     extra_data = Column(JSON, nullable=True)
     
-    # Timestamp (only created_at, no updated_at for logs)
+    # Timestamp (only created_at, no updated_at for logs); its B-tree serves
+    # newest-first pages in both directions
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
     # Relationships
     installation = relationship("Installation", back_populates="monitoring_logs")
     endpoint = relationship("Endpoint", back_populates="monitoring_logs")
     
-    # Indexes for performance
+    # Indexes for performance (benchmarks/explain_logs.py checks the hot queries use them)
     __table_args__ = (
         Index('ix_monitoring_logs_installation_endpoint_created', 'installation_id', 'endpoint_id', 'created_at'),
-        Index('ix_monitoring_logs_created_desc', created_at.desc()),
+        # Block range summaries for wide time ranges: a few pages, cheap to keep up on an append-only table
+        Index(
+            'ix_monitoring_logs_created_brin', 'created_at',
+            postgresql_using='brin', postgresql_with={'autosummarize': 'on'}
+        ),
+        # Alert feed and incident drill-downs without walking healthy rows
+        Index(
+            'ix_monitoring_logs_alerts', 'created_at',
+            postgresql_where=text('alert_triggered')
+        ),
     )
\ No newline at end of file
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class ProbeNode(Base):
+    __tablename__ = "probe_nodes"
+    
+    # hostname:pid:random, unique per scheduler process
+    id = Column(String(255), primary_key=True)
+    hostname = Column(String(255), nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # The node takes part in the hash ring while its lease is valid
+    lease_expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ProbeSlot(Base):
+    __tablename__ = "probe_slots"
+    
+    # Targets hash into a fixed number of slots; a slot has at most one owner
+    slot = Column(Integer, primary_key=True, autoincrement=False)
+    node_id = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_probe_slots_node_id", "node_id"),
+    )
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Date, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class SlaDaily(Base):
+    __tablename__ = "sla_daily"
+    
+    # One row per target and closed UTC day
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), primary_key=True)
+    endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    
+    # Probe counts (heartbeat rows count for every probe they fold)
+    probes = Column(Integer, nullable=False)
+    failures = Column(Integer, nullable=False)
+    
+    # Time each state was held, from one result to the next
+    observed_seconds = Column(Float, nullable=False)
+    downtime_seconds = Column(Float, nullable=False)
+
+
+class SlaDay(Base):
+    __tablename__ = "sla_days"
+    
+    # Marks a closed day as computed for every target, including targets without logs
+    day = Column(Date, primary_key=True)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SlaStale(Base):
+    __tablename__ = "sla_stale"
+    
+    # Cached target-day that late results changed, recomputed by the SLA refresh job
+    installation_id = Column(UUID(as_uuid=True), ForeignKey("installations.id", ondelete="CASCADE"), primary_key=True)
+    endpoint_id = Column(UUID(as_uuid=True), ForeignKey("endpoints.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    marked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,74 @@
+"""
+Standalone probe runner: python -m app.probe_runner
+
+Runs the BackgroundScheduler (scheduling, probing, threshold and alert rule
+evaluation, log writing) and the alert dispatcher in their own process, so
+the API can run with SCHEDULER_EMBEDDED=false and never share its event loop
+with probe cycles. Several runners can run side by side: leader election or
+PROBE_SHARDING_ENABLED decides which of them probes what. Live events reach
+the API workers through the LISTEN/NOTIFY relay.
+"""
+import time
+_started = time.perf_counter()
+
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core import metrics
+from app.core.database import async_engine
+from app.core.startup import StartupTimer, check_schema_version
+from app.services.background_scheduler import BackgroundScheduler
+from app.services.alert_dispatcher import AlertDispatcher
+from app.services.live_relay import LiveNotifier
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO if settings.APP_ENV == "production" else logging.DEBUG,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+timer = StartupTimer(_started)
+timer.record("imports", _started)
+
+
+async def run():
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    if settings.METRICS_ENABLED and settings.PROBE_RUNNER_METRICS_PORT:
+        metrics.serve(settings.PROBE_RUNNER_METRICS_PORT)
+
+    scheduler = BackgroundScheduler()
+    dispatcher = AlertDispatcher()
+    notifier = LiveNotifier() if settings.LIVE_UPDATES_ENABLED and settings.LIVE_RELAY_ENABLED else None
+
+    logger.info("Starting probe runner...")
+    with timer.phase("schema check"):
+        await check_schema_version(async_engine)
+    with timer.phase("background tasks"):
+        if notifier is not None:
+            notifier.start()
+        scheduler.start()
+        if settings.ALERT_DISPATCH_ENABLED:
+            dispatcher.start()
+    timer.report("Probe runner startup")
+
+    await stopping.wait()
+
+    logger.info("Shutting down probe runner...")
+    await scheduler.shutdown()
+    await dispatcher.stop()
+    # Last, so events of the final writer flush are still relayed
+    if notifier is not None:
+        await notifier.stop()
+    metrics.mark_process_dead()
+    logger.info("Probe runner stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
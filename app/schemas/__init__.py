@@ -5,10 +5,25 @@ from .installation import InstallationCreate, InstallationUpdate, InstallationRe
 from .endpoint import EndpointCreate, EndpointUpdate, EndpointResponse
 from .threshold import ThresholdCreate, ThresholdUpdate, ThresholdResponse
 from .monitoring_log import MonitoringLogCreate, MonitoringLogResponse, MonitoringLogWithDetails, MonitoringLogQuery
+from .ingest import IngestResult, IngestBatch, IngestResponse
+from .incident import IncidentResponse
 
-# Legacy schemas (will be removed/updated)
-from .service import ServiceCreate, ServiceUpdate, ServiceResponse
-from .health_check import HealthCheckResponse
+# Legacy schemas (will be removed/updated) are only imported on first use
+_LEGACY = {
+    "ServiceCreate": ".service",
+    "ServiceUpdate": ".service",
+    "ServiceResponse": ".service",
+    "HealthCheckResponse": ".health_check",
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY:
+        import importlib
+        value = getattr(importlib.import_module(_LEGACY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     # New schemas
@@ -36,6 +51,10 @@ __all__ = [
     "MonitoringLogResponse",
     "MonitoringLogWithDetails",
     "MonitoringLogQuery",
+    "IngestResult",
+    "IngestBatch",
+    "IngestResponse",
+    "IncidentResponse",
     # Legacy schemas
     "ServiceCreate",
     "ServiceUpdate",
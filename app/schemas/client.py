@@ -9,6 +9,7 @@ class ClientBase(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = Field(None, max_length=50)
     timezone: str = Field("America/Sao_Paulo", max_length=50)
+    webhook_url: Optional[str] = Field(None, max_length=1024)
 
 
 class ClientCreate(ClientBase):
@@ -20,6 +21,7 @@ class ClientUpdate(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = Field(None, max_length=50)
     timezone: Optional[str] = Field(None, max_length=50)
+    webhook_url: Optional[str] = Field(None, max_length=1024)
     is_active: Optional[bool] = None
 
 
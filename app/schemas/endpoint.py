@@ -11,6 +11,8 @@ class EndpointBase(BaseModel):
     type: Optional[str] = Field(None, max_length=50)
     expected_response_time_ms: int = Field(1000, ge=1)
     timeout_ms: int = Field(30000, ge=1000)
+    min_probe_interval_s: Optional[int] = Field(None, ge=1)
+    max_probe_interval_s: Optional[int] = Field(None, ge=1)
 
 
 class EndpointCreate(EndpointBase):
@@ -24,6 +26,8 @@ class EndpointUpdate(BaseModel):
     type: Optional[str] = Field(None, max_length=50)
     expected_response_time_ms: Optional[int] = Field(None, ge=1)
     timeout_ms: Optional[int] = Field(None, ge=1000)
+    min_probe_interval_s: Optional[int] = Field(None, ge=1)
+    max_probe_interval_s: Optional[int] = Field(None, ge=1)
 
 
 class EndpointResponse(EndpointBase):
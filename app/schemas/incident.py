@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class IncidentResponse(BaseModel):
+    id: UUID
+    installation_id: UUID
+    endpoint_id: UUID
+    started_at: datetime
+    last_failure_at: datetime
+    ended_at: Optional[datetime] = None
+    peak_level: str
+    samples: int
+    last_status_code: Optional[int] = None
+    last_error_message: Optional[str] = None
+    duration_seconds: float  # Until now while the incident is open
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from uuid import UUID
+
+
+class IngestResult(BaseModel):
+    endpoint_id: UUID
+    installation_id: Optional[UUID] = Field(None, description="Required when the API key is shared by several installations")
+    response_time_ms: Optional[int] = Field(None, ge=0)
+    status_code: Optional[int] = None
+    response_body: Optional[str] = None
+    error_message: Optional[str] = None
+    extra_data: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+
+
+class IngestBatch(BaseModel):
+    results: List[IngestResult] = Field(..., min_length=1, max_length=1000)
+
+
+class IngestResponse(BaseModel):
+    accepted: int
+    alerts: int
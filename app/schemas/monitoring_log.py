@@ -42,4 +42,6 @@ class MonitoringLogQuery(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     limit: int = Field(100, ge=1, le=1000)
-    offset: int = Field(0, ge=0)
\ No newline at end of file
+    offset: int = Field(0, ge=0)
+    expand: bool = False
+    fields: Optional[str] = Field(None, description="Comma separated response fields to return (default: all)")
\ No newline at end of file
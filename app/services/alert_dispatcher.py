@@ -0,0 +1,253 @@
+"""
+Alert notification outbox and its dispatcher.
+
+The probe loop never sends notifications: alert transitions are attached to
+their result rows and inserted into alert_outbox by the ResultWriter, in the
+same transaction as the monitoring logs (for pushed results, as their rule
+verdicts are written back). AlertDispatcher runs as a separate
+task: every ALERT_DISPATCH_INTERVAL seconds it claims pending entries
+(FOR UPDATE SKIP LOCKED, so several dispatchers can run side by side),
+groups them by client, keeps the latest transition per endpoint and sends
+one webhook per client, with bounded concurrency and exponential retries.
+The lease of a client's entries is renewed right before its webhook is
+sent, and outcomes are only recorded for entries no other dispatcher has
+re-claimed meanwhile.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select, update, func, tuple_
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import AlertOutbox, Client
+from app.services.result_writer import OUTBOX_KEY
+
+logger = logging.getLogger(__name__)
+
+
+def attach_alert_events(targets: List, rows: List[Dict[str, Any]]):
+    """Attach an outbox entry to every result row that flipped alert_triggered"""
+    for target, row in zip(targets, rows):
+        extra_data = row["extra_data"] or {}
+        event = extra_data.get("alert_event")
+        if event is None:
+            continue
+        row[OUTBOX_KEY] = {
+            "client_id": target.client_id,
+            "installation_id": target.installation_id,
+            "endpoint_id": target.endpoint_id,
+            "event": event,
+            "alert_level": row["alert_level"],
+            "payload": {
+                "module": target.module_name,
+                "endpoint": target.endpoint_name,
+                "url": target.url,
+                "rules": extra_data.get("alert_rules", []),
+                "status_code": row["status_code"],
+                "response_time_ms": row["response_time_ms"],
+                "error_message": row["error_message"],
+                "occurred_at": row["created_at"].isoformat(),
+            },
+        }
+
+
+def group_alerts(entries: List) -> Dict[UUID, List[Dict[str, Any]]]:
+    """Group claimed entries by client, keeping the latest transition per endpoint"""
+    latest: Dict[UUID, Dict[tuple, Dict[str, Any]]] = defaultdict(dict)
+    for entry in sorted(entries, key=lambda e: e.created_at):
+        key = (entry.installation_id, entry.endpoint_id)
+        previous = latest[entry.client_id].get(key)
+        latest[entry.client_id][key] = {
+            "installation_id": str(entry.installation_id),
+            "endpoint_id": str(entry.endpoint_id),
+            "event": entry.event,
+            "alert_level": entry.alert_level,
+            "occurrences": previous["occurrences"] + 1 if previous else 1,
+            "first_at": previous["first_at"] if previous else entry.created_at.isoformat(),
+            "last_at": entry.created_at.isoformat(),
+            **(entry.payload or {}),
+        }
+    return {client_id: list(alerts.values()) for client_id, alerts in latest.items()}
+
+
+class AlertDispatcher:
+    def __init__(self):
+        self.interval = settings.ALERT_DISPATCH_INTERVAL
+        self.batch_size = settings.ALERT_DISPATCH_BATCH_SIZE
+        self.max_attempts = settings.ALERT_DISPATCH_MAX_ATTEMPTS
+        self.semaphore = asyncio.Semaphore(settings.ALERT_DISPATCH_CONCURRENCY)
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self.http_client = httpx.AsyncClient(timeout=settings.ALERT_WEBHOOK_TIMEOUT)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Alert dispatcher started (every {self.interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Alert dispatch failed: {str(e)}")
+            metrics.alert_dispatch_duration_seconds.observe(time.perf_counter() - start)
+            await asyncio.sleep(self.interval)
+
+    async def claim(self, db) -> List:
+        """Lease a batch of due entries; a crashed dispatcher's lease simply expires"""
+        due = (
+            select(AlertOutbox.id)
+            .where(AlertOutbox.status == "pending", AlertOutbox.next_attempt_at <= func.now())
+            .order_by(AlertOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(AlertOutbox)
+            .where(AlertOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=AlertOutbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=settings.ALERT_DISPATCH_LEASE)
+            )
+            .returning(
+                AlertOutbox.id,
+                AlertOutbox.client_id,
+                AlertOutbox.installation_id,
+                AlertOutbox.endpoint_id,
+                AlertOutbox.event,
+                AlertOutbox.alert_level,
+                AlertOutbox.payload,
+                AlertOutbox.attempts,
+                AlertOutbox.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        entries = result.all()
+        await db.commit()
+        return entries
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of pending alerts; returns the number of entries handled"""
+        async with AsyncSessionLocal() as db:
+            entries = await self.claim(db)
+            if not entries:
+                return 0
+            client_ids = {entry.client_id for entry in entries}
+            webhooks = dict((await db.execute(
+                select(Client.id, Client.webhook_url).where(Client.id.in_(client_ids))
+            )).all())
+
+        by_client = defaultdict(list)
+        for entry in entries:
+            by_client[entry.client_id].append(entry)
+
+        outcomes = await asyncio.gather(*(
+            self.deliver_client(client_id, webhooks.get(client_id), client_entries)
+            for client_id, client_entries in by_client.items()
+        ))
+
+        async with AsyncSessionLocal() as db:
+            for held, status, error in outcomes:
+                if held:
+                    await self.settle(db, held, status, error)
+            await db.commit()
+        return len(entries)
+
+    async def deliver_client(self, client_id: UUID, url: Optional[str], entries: List):
+        """Renew the lease of a client's entries, then deliver those still held; returns (held, status, error)"""
+        async with self.semaphore:
+            # The batch lease may have run out while earlier webhooks were slow;
+            # entries another dispatcher has re-claimed are left to it
+            held = await self.renew(entries)
+            if not held:
+                return held, None, None
+            status, error = await self.deliver(client_id, url, group_alerts(held)[client_id])
+            return held, status, error
+
+    async def renew(self, entries: List) -> List:
+        """Extend the lease of the entries this dispatcher still holds and return them"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(AlertOutbox)
+                .where(_held(entries), AlertOutbox.status == "pending")
+                .values(next_attempt_at=func.now() + timedelta(seconds=settings.ALERT_DISPATCH_LEASE))
+                .returning(AlertOutbox.id)
+                .execution_options(synchronize_session=False)
+            )
+            renewed = set(result.scalars().all())
+            await db.commit()
+        return [entry for entry in entries if entry.id in renewed]
+
+    async def deliver(self, client_id: UUID, url: Optional[str], alerts: List[Dict[str, Any]]):
+        """POST one grouped notification; returns (status, error)"""
+        if not url:
+            metrics.alert_webhooks_total.labels("skipped").inc()
+            return "skipped", None
+        body = {
+            "client_id": str(client_id),
+            "sent_at": datetime.now(timezone.utc).isoformat(),
+            "alerts": alerts,
+        }
+        try:
+            response = await self.http_client.post(url, json=body)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            metrics.alert_webhooks_total.labels("failed").inc()
+            logger.warning(f"Alert webhook for client {client_id} failed: {str(e)}")
+            return "failed", str(e) or type(e).__name__
+        metrics.alert_webhooks_total.labels("sent").inc()
+        return "sent", None
+
+    async def settle(self, db, entries: List, status: str, error: Optional[str]):
+        """Record the delivery outcome of a client's entries, unless another dispatcher has re-claimed them"""
+        if status != "failed":
+            await db.execute(
+                update(AlertOutbox)
+                .where(_held(entries))
+                .values(status=status, dispatched_at=func.now(), last_error=None)
+            )
+            return
+
+        exhausted = [entry for entry in entries if entry.attempts >= self.max_attempts]
+        retry = [entry for entry in entries if entry.attempts < self.max_attempts]
+        if exhausted:
+            await db.execute(
+                update(AlertOutbox)
+                .where(_held(exhausted))
+                .values(status="failed", last_error=error)
+            )
+        if retry:
+            attempts = min(entry.attempts for entry in retry)
+            delay = min(settings.ALERT_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.ALERT_RETRY_MAX_DELAY)
+            await db.execute(
+                update(AlertOutbox)
+                .where(_held(retry))
+                .values(next_attempt_at=func.now() + timedelta(seconds=delay), last_error=error)
+            )
+
+
+def _held(entries: List):
+    """Entries still leased by the claim that returned them: every claim bumps attempts"""
+    return tuple_(AlertOutbox.id, AlertOutbox.attempts).in_([(entry.id, entry.attempts) for entry in entries])
@@ -0,0 +1,283 @@
+"""
+Windowed alert rules evaluated against in-memory ring buffers.
+
+Each (installation, endpoint) keeps its recent results in memory, so rules
+over a window never query monitoring_logs. Two rules are derived from the
+endpoint thresholds:
+
+- availability: fire when ``failures`` of the last ``window`` probes failed
+  (alert level error or critical), clear after ``recovery`` consecutive
+  healthy probes. Configured through an ``availability`` threshold's
+  expected_values, e.g. {"failures": 3, "window": 5, "recovery": 2};
+  ALERT_* settings are the defaults.
+- response_time: the ``percentile`` of latencies over the last ``window_s``
+  seconds is compared with warning_max / error_max of the ``response_time``
+  threshold. A level only drops once the percentile falls
+  ``hysteresis_pct`` below the threshold that raised it.
+
+alert_triggered of a result is set when any rule is firing; the result that
+flips it carries extra_data["alert_event"] ("triggered" or "resolved").
+Pushed results are stored by the API and relayed to the probe runner, whose
+BackgroundScheduler feeds them to the same windows and writes the verdicts
+back to their logs.
+"""
+import bisect
+import math
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import MonitoringLog
+from app.services.change_storage import is_heartbeat, expand_heartbeat
+
+FAILED_LEVELS = ("error", "critical")
+LEVEL_RANK = {"ok": 0, "warning": 1, "error": 2}
+
+# extra_data keys written by the probe pipeline and read back from stored
+# logs (heartbeats, anomalies, alert transitions); clients may not set them
+RESERVED_EXTRA_KEYS = frozenset({"kind", "count", "anomaly", "alert_rules", "alert_event"})
+
+# Log-scaled latency buckets (1 ms to ~10 min, 5% apart): percentiles are
+# read from bucket counts in constant time whatever the window length
+LATENCY_BOUNDS = [1.05 ** i for i in range(int(math.log(600000) / math.log(1.05)) + 1)]
+
+
+class FailureWindow:
+    """N of the last M probes failed, with recovery after consecutive successes"""
+    __slots__ = ("failures_needed", "recovery", "buffer", "index", "filled", "failures", "ok_streak", "active")
+
+    def __init__(self, failures: int, window: int, recovery: int):
+        self.failures_needed = failures
+        self.recovery = recovery
+        self.buffer = [False] * window
+        self.index = 0
+        self.filled = 0
+        self.failures = 0
+        self.ok_streak = 0
+        self.active = False
+
+    def add(self, failed: bool) -> bool:
+        if self.filled == len(self.buffer):
+            self.failures -= self.buffer[self.index]
+        else:
+            self.filled += 1
+        self.buffer[self.index] = failed
+        self.failures += failed
+        self.index = (self.index + 1) % len(self.buffer)
+
+        self.ok_streak = 0 if failed else self.ok_streak + 1
+        if not self.active and self.failures >= self.failures_needed:
+            self.active = True
+        elif self.active and self.ok_streak >= self.recovery:
+            self.active = False
+        return self.active
+
+
+class LatencyWindow:
+    """Latency percentile over a sliding time window, with hysteresis"""
+    __slots__ = ("percentile", "seconds", "hysteresis", "warning_max", "error_max",
+                 "samples", "counts", "level", "value")
+
+    def __init__(self, percentile: float, seconds: float, hysteresis_pct: float,
+                 warning_max: Optional[float], error_max: Optional[float]):
+        self.percentile = percentile
+        self.seconds = seconds
+        self.hysteresis = hysteresis_pct / 100
+        self.warning_max = warning_max
+        self.error_max = error_max
+        self.samples: deque = deque()
+        self.counts = [0] * (len(LATENCY_BOUNDS) + 1)
+        self.level = "ok"
+        self.value = None
+
+    def add(self, at: float, latency_ms: Optional[int]) -> str:
+        if latency_ms is not None:
+            bucket = bisect.bisect_left(LATENCY_BOUNDS, latency_ms)
+            self.samples.append((at, bucket))
+            self.counts[bucket] += 1
+
+        horizon = at - self.seconds
+        while self.samples and (self.samples[0][0] < horizon or len(self.samples) > settings.ALERT_BUFFER_SIZE):
+            self.counts[self.samples.popleft()[1]] -= 1
+
+        if len(self.samples) < settings.ALERT_LATENCY_MIN_SAMPLES:
+            self.value = None
+            self.level = "ok"
+            return self.level
+
+        self.value = self.current_percentile()
+        raised = self.level_for(self.value, 1.0)
+        if LEVEL_RANK[raised] >= LEVEL_RANK[self.level]:
+            self.level = raised
+        else:
+            relaxed = self.level_for(self.value, 1 - self.hysteresis)
+            if LEVEL_RANK[relaxed] < LEVEL_RANK[self.level]:
+                self.level = relaxed
+        return self.level
+
+    def current_percentile(self) -> float:
+        rank = math.ceil(self.percentile / 100 * len(self.samples))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BOUNDS[min(bucket, len(LATENCY_BOUNDS) - 1)]
+        return LATENCY_BOUNDS[-1]
+
+    def level_for(self, value: float, scale: float) -> str:
+        if self.error_max is not None and value > self.error_max * scale:
+            return "error"
+        if self.warning_max is not None and value > self.warning_max * scale:
+            return "warning"
+        return "ok"
+
+
+class EndpointRules:
+    __slots__ = ("config", "availability", "latency", "anomaly", "triggered")
+
+    def __init__(self, config: Tuple):
+        self.config = config
+        self.triggered = False
+        availability, latency, anomaly = config
+        self.availability = FailureWindow(*availability)
+        self.latency = LatencyWindow(*latency) if latency is not None else None
+        self.anomaly = FailureWindow(*anomaly) if anomaly is not None else None
+
+
+def rule_config(target) -> Tuple:
+    """Rule parameters of a target, derived from its thresholds"""
+    availability = (target.thresholds.get("availability") or {}).get("expected_values") or {}
+    window = int(availability.get("window", settings.ALERT_WINDOW))
+    failures = min(int(availability.get("failures", settings.ALERT_FAILURES)), window)
+    recovery = int(availability.get("recovery", settings.ALERT_RECOVERY))
+
+    latency = None
+    response_time = target.thresholds.get("response_time")
+    if response_time and (response_time["warning_max"] is not None or response_time["error_max"] is not None):
+        options = response_time.get("expected_values") or {}
+        latency = (
+            float(options.get("percentile", settings.ALERT_LATENCY_PERCENTILE)),
+            float(options.get("window_s", settings.ALERT_LATENCY_WINDOW)),
+            float(options.get("hysteresis_pct", settings.ALERT_HYSTERESIS_PCT)),
+            response_time["warning_max"],
+            response_time["error_max"],
+        )
+
+    anomaly = None
+    options = (target.thresholds.get("anomaly") or {}).get("expected_values") or {}
+    if settings.ANOMALY_DETECTION_ENABLED and options.get("enabled", True):
+        anomaly_window = int(options.get("window", settings.ANOMALY_ALERT_WINDOW))
+        anomaly = (
+            min(int(options.get("failures", settings.ANOMALY_ALERT_FAILURES)), anomaly_window),
+            anomaly_window,
+            int(options.get("recovery", settings.ALERT_RECOVERY)),
+        )
+    return (failures, window, recovery), latency, anomaly
+
+
+def client_extra_data(extra_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Client-supplied extra_data without the reserved keys"""
+    if not extra_data:
+        return extra_data
+    return {key: value for key, value in extra_data.items() if key not in RESERVED_EXTRA_KEYS}
+
+
+class AlertRuleEngine:
+    """Per-endpoint ring buffers and the windowed rules evaluated on them"""
+
+    def __init__(self):
+        self._rules: Dict[Tuple[UUID, UUID], EndpointRules] = {}
+
+    def sync(self, targets: Iterable) -> Set[Tuple[UUID, UUID]]:
+        """Create rules for new targets, reset changed ones and drop inactive ones; returns the fresh keys"""
+        keep = set()
+        fresh = set()
+        for target in targets:
+            keep.add(target.key)
+            config = rule_config(target)
+            rules = self._rules.get(target.key)
+            if rules is None or rules.config != config:
+                self._rules[target.key] = EndpointRules(config)
+                fresh.add(target.key)
+        for key in list(self._rules):
+            if key not in keep:
+                del self._rules[key]
+        return fresh
+
+    def evaluate(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Feed one result row to its endpoint rules and set alert_triggered from them"""
+        rules = self._rules.get((row["installation_id"], row["endpoint_id"]))
+        if rules is None:
+            return row
+
+        firing = []
+        if rules.availability.add(row["alert_level"] in FAILED_LEVELS):
+            firing.append("availability")
+        if rules.latency is not None:
+            level = rules.latency.add(row["created_at"].timestamp(), row["response_time_ms"])
+            if level != "ok":
+                firing.append(f"response_time:{level}")
+        # Untimed results say nothing about latency and leave the window untouched
+        if rules.anomaly is not None and row["response_time_ms"] is not None:
+            if rules.anomaly.add("anomaly" in (row["extra_data"] or {})):
+                firing.append("anomaly")
+
+        row["alert_triggered"] = bool(firing)
+        extra_data = {}
+        if firing:
+            extra_data["alert_rules"] = firing
+        if row["alert_triggered"] != rules.triggered:
+            rules.triggered = row["alert_triggered"]
+            extra_data["alert_event"] = "triggered" if rules.triggered else "resolved"
+        if extra_data:
+            row["extra_data"] = {**(row["extra_data"] or {}), **extra_data}
+        return row
+
+    def evaluate_many(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.evaluate(row) for row in rows]
+
+    async def rebuild(self, db: AsyncSession, targets: Iterable):
+        """Sync, then replay recent monitoring logs into the fresh windows so they survive a restart"""
+        fresh = self.sync(targets)
+        if not fresh:
+            return
+        since = datetime.now(timezone.utc) - timedelta(seconds=settings.ALERT_REBUILD_LOOKBACK)
+        conditions = [MonitoringLog.created_at >= since]
+        if len(fresh) < len(self._rules):
+            conditions.append(tuple_(MonitoringLog.installation_id, MonitoringLog.endpoint_id).in_(list(fresh)))
+        recent = select(
+            MonitoringLog.id,
+            MonitoringLog.installation_id,
+            MonitoringLog.endpoint_id,
+            MonitoringLog.response_time_ms,
+            MonitoringLog.status_code,
+            MonitoringLog.error_message,
+            MonitoringLog.alert_level,
+            MonitoringLog.alert_triggered,
+            MonitoringLog.extra_data,
+            MonitoringLog.created_at,
+            func.row_number().over(
+                partition_by=(MonitoringLog.installation_id, MonitoringLog.endpoint_id),
+                order_by=MonitoringLog.created_at.desc()
+            ).label("position"),
+        ).where(*conditions).subquery()
+        rows = (await db.execute(
+            select(recent).where(recent.c.position <= settings.ALERT_BUFFER_SIZE)
+            .order_by(recent.c.created_at)
+        )).all()
+
+        for log in rows:
+            if (log.installation_id, log.endpoint_id) not in fresh:
+                continue
+            if is_heartbeat(log):
+                # Expanded entries come newest first
+                for entry in reversed(expand_heartbeat(log)):
+                    self.evaluate(entry)
+            else:
+                self.evaluate(dict(log._mapping))
+
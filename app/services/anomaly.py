@@ -0,0 +1,195 @@
+"""
+Latency anomaly detection against learned per-endpoint baselines.
+
+Every target keeps exponentially weighted moving averages of the mean and
+variance of its log latency, one per UTC hour of day plus an overall one.
+Each probe cycle scores all its results in one NumPy pass: a result is
+anomalous when its z-score against the hour's baseline (or the overall one
+while the hour has fewer than ANOMALY_MIN_SAMPLES samples) exceeds
+ANOMALY_Z_THRESHOLD and it is at least ANOMALY_MIN_DELTA_MS slower than the
+baseline. Anomalous results carry extra_data["anomaly"]:
+
+    {"z": 6.2, "baseline_ms": 48}
+
+and feed the "anomaly" alert rule. Updates are O(1) per result; anomalous
+values are clipped to the threshold and only move the mean, so a single
+spike barely shifts the baseline while a lasting change is learned over
+time. Failed results (error/critical) are neither scored nor learned.
+
+State is a (3, 25) float32 block per target (300 bytes), persisted to
+anomaly_baselines every ANOMALY_PERSIST_INTERVAL seconds and loaded back
+when a target becomes active, so restarts and shard handovers keep their
+baselines without replaying logs.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core import metrics
+from app.models import AnomalyBaseline
+from app.services.alert_rules import FAILED_LEVELS
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+OVERALL = HOURS  # Column of the overall baseline
+MEAN, VAR, COUNT = 0, 1, 2
+STATE_SHAPE = (3, HOURS + 1)
+STATE_BYTES = int(np.prod(STATE_SHAPE)) * 4
+
+# Floor of the log-latency standard deviation (about 5%), so very stable
+# endpoints do not flag ordinary jitter
+MIN_STD = 0.05
+MAX_COUNT = 1e6
+
+
+def pack_state(state: np.ndarray) -> bytes:
+    return state.astype("<f4").tobytes()
+
+
+def unpack_state(data: bytes) -> np.ndarray:
+    if len(data) != STATE_BYTES:
+        raise ValueError(f"Baseline state of {len(data)} bytes, expected {STATE_BYTES}")
+    return np.frombuffer(data, dtype="<f4").astype(np.float64).reshape(STATE_SHAPE)
+
+
+class AnomalyDetector:
+    """EWMA latency baselines of the active targets, scored in batches"""
+
+    def __init__(self):
+        self.z_threshold = settings.ANOMALY_Z_THRESHOLD
+        self.min_samples = settings.ANOMALY_MIN_SAMPLES
+        self.min_delta_ms = settings.ANOMALY_MIN_DELTA_MS
+        # Smoothing per sample; hour buckets see fewer samples, so they get their own factor
+        self.alpha = np.full(HOURS + 1, settings.ANOMALY_HOURLY_ALPHA)
+        self.alpha[OVERALL] = settings.ANOMALY_ALPHA
+        self._state = np.zeros((16,) + STATE_SHAPE)
+        self._index: Dict[Tuple[UUID, UUID], int] = {}
+        self._free: List[int] = []
+        self._dirty: Set[Tuple[UUID, UUID]] = set()
+
+    def _allocate(self, key: Tuple[UUID, UUID]) -> int:
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._index)
+            if row == len(self._state):
+                self._state = np.concatenate([self._state, np.zeros_like(self._state)])
+        self._state[row] = 0
+        self._index[key] = row
+        return row
+
+    def score(self, rows: List[Dict[str, Any]]) -> int:
+        """Score and learn a cycle's results (at most one per target); returns the number of anomalies"""
+        picked = [
+            row for row in rows
+            if row["response_time_ms"] is not None and row["alert_level"] not in FAILED_LEVELS
+            and (row["installation_id"], row["endpoint_id"]) in self._index
+        ]
+        if not picked:
+            return 0
+
+        index = np.fromiter((self._index[(row["installation_id"], row["endpoint_id"])] for row in picked),
+                            dtype=np.intp, count=len(picked))
+        hours = np.fromiter((row["created_at"].astimezone(timezone.utc).hour for row in picked),
+                            dtype=np.intp, count=len(picked))
+        latency = np.fromiter((row["response_time_ms"] for row in picked), dtype=np.float64, count=len(picked))
+        value = np.log1p(np.maximum(latency, 0))
+        state = self._state[index]
+        at = np.arange(len(picked))
+
+        # Hour of day baseline once it has enough samples, the overall one before that
+        column = np.where(state[at, COUNT, hours] >= self.min_samples, hours, OVERALL)
+        mean = state[at, MEAN, column]
+        std = np.maximum(np.sqrt(state[at, VAR, column]), MIN_STD)
+        ready = state[at, COUNT, column] >= self.min_samples
+        z = (value - mean) / std
+        baseline_ms = np.expm1(mean)
+        anomalous = ready & (z > self.z_threshold) & (latency - baseline_ms >= self.min_delta_ms)
+
+        # Clip to the threshold band, then update the hour and overall baselines
+        learned = np.where(ready, np.minimum(value, mean + self.z_threshold * std), value)
+        for columns in (hours, np.full(len(picked), OVERALL)):
+            count = state[at, COUNT, columns]
+            # Plain average while warming up, exponential weighting afterwards
+            alpha = np.maximum(self.alpha[columns], 1 / (count + 1))
+            diff = learned - state[at, MEAN, columns]
+            increment = alpha * diff
+            state[at, MEAN, columns] += increment
+            # Anomalous values only nudge the mean: widening the variance would let a slowdown hide itself
+            state[at, VAR, columns] = np.where(
+                anomalous, state[at, VAR, columns], (1 - alpha) * (state[at, VAR, columns] + diff * increment)
+            )
+            state[at, COUNT, columns] = np.minimum(count + 1, MAX_COUNT)
+        self._state[index] = state
+
+        for position in np.flatnonzero(anomalous):
+            row = picked[position]
+            row["extra_data"] = {
+                **(row["extra_data"] or {}),
+                "anomaly": {"z": round(float(z[position]), 1), "baseline_ms": round(float(baseline_ms[position]))},
+            }
+        self._dirty.update((row["installation_id"], row["endpoint_id"]) for row in picked)
+        found = int(anomalous.sum())
+        if found:
+            metrics.probe_anomalies_total.inc(found)
+        return found
+
+    async def sync(self, db: AsyncSession, targets: Iterable):
+        """Load baselines of new targets and save and drop those no longer active"""
+        keep = {target.key for target in targets}
+        dropped = [key for key in self._index if key not in keep]
+        await self.save(db, [key for key in dropped if key in self._dirty])
+        for key in dropped:
+            self._free.append(self._index.pop(key))
+            self._dirty.discard(key)
+
+        fresh = [key for key in keep if key not in self._index]
+        for key in fresh:
+            self._allocate(key)
+        if not fresh:
+            return
+        conditions = []
+        if len(fresh) < len(self._index):
+            conditions.append(tuple_(AnomalyBaseline.installation_id, AnomalyBaseline.endpoint_id).in_(fresh))
+        result = await db.execute(
+            select(AnomalyBaseline.installation_id, AnomalyBaseline.endpoint_id, AnomalyBaseline.state).where(*conditions)
+        )
+        for installation_id, endpoint_id, data in result.all():
+            row = self._index.get((installation_id, endpoint_id))
+            if row is None:
+                continue
+            try:
+                self._state[row] = unpack_state(data)
+            except ValueError as e:
+                logger.warning(f"Ignoring anomaly baseline of {installation_id}/{endpoint_id}: {e}")
+
+    async def save(self, db: AsyncSession, keys: Optional[Iterable[Tuple[UUID, UUID]]] = None):
+        """Persist baselines changed since the last save"""
+        keys = list(self._dirty if keys is None else keys)
+        if not keys:
+            return
+        now = datetime.now(timezone.utc)
+        values = [
+            {"installation_id": key[0], "endpoint_id": key[1], "state": pack_state(self._state[self._index[key]]), "updated_at": now}
+            for key in keys
+        ]
+        # Cleared before writing, so results scored meanwhile mark their targets again
+        self._dirty.difference_update(keys)
+        stmt = pg_insert(AnomalyBaseline)
+        try:
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[AnomalyBaseline.installation_id, AnomalyBaseline.endpoint_id],
+                set_={"state": stmt.excluded.state, "updated_at": stmt.excluded.updated_at}
+            ), values)
+            await db.commit()
+        except BaseException:
+            self._dirty.update(key for key in keys if key in self._index)
+            raise
@@ -0,0 +1,156 @@
+"""
+Installation API key authentication for pushed results.
+
+Keys are looked up by their SHA-256 (installations.api_key_hash). The
+resolved scope (installations sharing the key, the endpoints each may
+report and their thresholds) is kept in a bounded LRU cache, so a request
+with a known key costs no database query. Regenerate/update/delete of an
+installation invalidates its entries in this process and, through the live
+relay channel, in every other API process once the change commits. Entries
+also expire after API_KEY_CACHE_TTL seconds, which bounds how long a rotated
+key is honoured when the relay is disabled or a notification is lost.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.fast_json import dumps
+from app.models import Installation, Instance, Endpoint, Threshold
+from app.models.installation import hash_api_key
+from app.services.health_checker import HealthChecker, group_thresholds
+
+
+@dataclass
+class InstallationScope:
+    """What a key may report: endpoint_id -> {installation_id: thresholds}"""
+    installation_ids: frozenset
+    endpoints: Dict[UUID, Dict[UUID, Dict[str, Any]]] = field(default_factory=dict)
+    clients: Dict[UUID, UUID] = field(default_factory=dict)  # installation_id -> client_id
+
+    def resolve(self, endpoint_id: UUID, installation_id: Optional[UUID] = None) -> Optional[Tuple[UUID, Dict[str, Any]]]:
+        """(installation_id, thresholds) a result belongs to, or None if out of scope"""
+        installations = self.endpoints.get(endpoint_id)
+        if not installations:
+            return None
+        if installation_id is not None:
+            if installation_id not in installations:
+                return None
+            return installation_id, installations[installation_id]
+        if len(installations) != 1:
+            # Shared key: the caller has to say which installation reports
+            return None
+        return next(iter(installations.items()))
+
+
+class ApiKeyCache:
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_size = max_size or settings.API_KEY_CACHE_SIZE
+        self.ttl = ttl or settings.API_KEY_CACHE_TTL
+        self._entries: "OrderedDict[str, Tuple[float, Optional[InstallationScope]]]" = OrderedDict()
+
+    def get(self, key_hash: str) -> Tuple[bool, Optional[InstallationScope]]:
+        """(found, scope); a found None scope is a cached unknown key"""
+        entry = self._entries.get(key_hash)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.monotonic():
+            del self._entries[key_hash]
+            return False, None
+        self._entries.move_to_end(key_hash)
+        return True, entry[1]
+
+    def put(self, key_hash: str, scope: Optional[InstallationScope]):
+        # Unknown keys are remembered briefly so guessing does not hammer the database
+        ttl = self.ttl if scope is not None else min(self.ttl, settings.API_KEY_NEGATIVE_TTL)
+        self._entries[key_hash] = (time.monotonic() + ttl, scope)
+        self._entries.move_to_end(key_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_installation(self, installation_id: UUID):
+        """Forget every key of an installation, and every cached unknown key"""
+        for key_hash, (_, scope) in list(self._entries.items()):
+            if scope is None or installation_id in scope.installation_ids:
+                del self._entries[key_hash]
+
+    def clear(self):
+        self._entries.clear()
+
+
+api_key_cache = ApiKeyCache()
+
+# Relay event telling every process to drop an installation's cached keys
+INVALIDATE_EVENT = "api_keys_invalidated"
+
+
+async def invalidate_installation(db: AsyncSession, installation_id: UUID):
+    """Drop an installation's cached keys here and, when db commits, in every listening process"""
+    api_key_cache.invalidate_installation(installation_id)
+    if settings.LIVE_UPDATES_ENABLED and settings.LIVE_RELAY_ENABLED:
+        # NOTIFY is delivered on commit, so no process re-caches the old scope afterwards
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {
+                "channel": settings.LIVE_RELAY_CHANNEL,
+                "payload": dumps({"type": INVALIDATE_EVENT, "installation_id": installation_id}).decode(),
+            }
+        )
+
+
+async def load_scope(db: AsyncSession, key_hash: str) -> Optional[InstallationScope]:
+    rows = (await db.execute(
+        select(Installation.id, Instance.client_id, Endpoint.id.label("endpoint_id"))
+        .join(Instance, Instance.id == Installation.instance_id)
+        .outerjoin(Endpoint, Endpoint.module_id == Installation.module_id)
+        .where(Installation.api_key_hash == key_hash, Installation.is_active == True)
+    )).all()
+    if not rows:
+        return None
+
+    installation_ids = frozenset(row.id for row in rows)
+    threshold_rows = (await db.execute(
+        HealthChecker.thresholds_query().where(Threshold.installation_id.in_(installation_ids))
+    )).all()
+    thresholds = group_thresholds(threshold_rows)
+
+    scope = InstallationScope(installation_ids, clients={row.id: row.client_id for row in rows})
+    for row in rows:
+        if row.endpoint_id is None:
+            continue
+        scope.endpoints.setdefault(row.endpoint_id, {})[row.id] = thresholds.get((row.id, row.endpoint_id), {})
+    return scope
+
+
+async def get_installation_scope(
+    x_api_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> InstallationScope:
+    """Authenticate an installation by its X-API-Key header"""
+    if not x_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing X-API-Key header"
+        )
+
+    key_hash = hash_api_key(x_api_key)
+    found, scope = api_key_cache.get(key_hash)
+    metrics.api_key_cache_lookups_total.labels("hit" if found else "miss").inc()
+    if not found:
+        scope = await load_scope(db, key_hash)
+        api_key_cache.put(key_hash, scope)
+
+    if scope is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key"
+        )
+    return scope
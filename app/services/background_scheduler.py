@@ -1,10 +1,25 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
 from app.services import HealthChecker
+from app.services.probe_schedule import ProbeSchedule
+from app.services.result_writer import ResultWriter
+from app.services.change_storage import ChangeOnlyFilter
+from app.services.alert_rules import AlertRuleEngine
+from app.services.anomaly import AnomalyDetector
+from app.services.alert_dispatcher import attach_alert_events
+from app.services.live_updates import broadcaster
+from app.services.live_relay import LiveListener, decode_pushed_result
+from app.services.leader_election import LeaderElection
+from app.services.probe_shards import ShardCoordinator
+from app.services.sla import refresh_cache
+from app.services.incidents import close_inactive_incidents
 from app.core.config import settings
+from app.core import metrics
+import asyncio
 import logging
+import time
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -13,32 +28,278 @@ class BackgroundScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.health_checker = HealthChecker()
-    
+        self.schedule = ProbeSchedule()
+        self.writer = ResultWriter()
+        self.rules = AlertRuleEngine() if settings.ALERT_RULES_ENABLED else None
+        self.anomalies = AnomalyDetector() if settings.ANOMALY_DETECTION_ENABLED else None
+        # Results pushed to the API, relayed here for the windowed rules; the oldest are dropped when full
+        self._pushed: deque = deque(maxlen=settings.ALERT_PUSHED_QUEUE_SIZE)
+        self.pushed_listener = (
+            LiveListener(settings.ALERT_PUSHED_CHANNEL, self._offer_pushed) if self.rules is not None else None
+        )
+        self.change_filter = ChangeOnlyFilter() if settings.PROBE_STORAGE_MODE == "changes" else None
+        # Sharding splits targets between nodes, which makes a single leader unnecessary
+        self.shards = ShardCoordinator() if settings.PROBE_SHARDING_ENABLED else None
+        self.leader = LeaderElection() if settings.SCHEDULER_LEADER_ELECTION and self.shards is None else None
+        self.http_client = None
+        self._targets = []
+        self._targets_loaded_at = None
+        self._active = None
+        self._active_slots = None
+        self._expected_run = None
+        self._prewarm_task = None
+
+    def _record_lag(self):
+        """Track how late this tick started compared to the tick grid"""
+        interval = settings.PROBE_TICK_INTERVAL
+        now = time.monotonic()
+        if self._expected_run is None:
+            self._expected_run = now
+        lag = max(0.0, now - self._expected_run)
+        metrics.scheduler_lag_seconds.set(lag)
+        # Skipped runs push the grid forward
+        self._expected_run += (int(lag // interval) + 1) * interval
+
+    async def get_targets(self):
+        """Targets this process probes; all active ones are reloaded every PROBE_TARGET_REFRESH_INTERVAL seconds"""
+        now = time.monotonic()
+        if self._targets_loaded_at is None or now - self._targets_loaded_at >= settings.PROBE_TARGET_REFRESH_INTERVAL:
+            async with AsyncSessionLocal() as db:
+                self._targets = await self.health_checker.load_targets(db)
+                if settings.INCIDENTS_ENABLED:
+                    closed = await close_inactive_incidents(db, self.health_checker.targets_query())
+                    await db.commit()
+                    if closed:
+                        logger.info(f"Closed {closed} incidents of deactivated targets")
+            self._targets_loaded_at = now
+            self._active = None
+            broadcaster.set_installation_clients({target.installation_id: target.client_id for target in self._targets})
+            broadcaster.forget(target.key for target in self._targets)
+
+        slots = self.shards.owned() if self.shards is not None else None
+        if self._active is None or slots != self._active_slots:
+            await self.activate(self._targets if slots is None else self.shards.select(self._targets, slots))
+            self._active_slots = slots
+        return self._active
+
+    async def activate(self, targets):
+        """Make ``targets`` the probed set, dropping state of targets no longer probed here"""
+        if self.rules is not None:
+            # New targets replay their recent logs, e.g. after a restart or a shard handover
+            async with AsyncSessionLocal() as db:
+                await self.rules.rebuild(db, targets)
+        if self.anomalies is not None:
+            async with AsyncSessionLocal() as db:
+                await self.anomalies.sync(db, targets)
+        self.schedule.retain(target.key for target in targets)
+        if self.change_filter is not None:
+            await self.writer.put_many(self.change_filter.retain(target.key for target in targets))
+        self._active = targets
+        metrics.probe_targets.set(len(targets))
+
     async def health_check_job(self):
-        """Job to run health checks on all clients"""
-        async with AsyncSessionLocal() as db:
+        """Job to probe every target whose adaptive interval has elapsed"""
+        if self.leader is not None and not self.leader.is_leader:
+            return
+        self._record_lag()
+        start = time.perf_counter()
+        try:
+            targets = await self.get_targets()
+            now = time.monotonic()
+            due = self.schedule.due(targets, now)
+            self.start_prewarm(self.schedule.upcoming(targets, now, settings.PROBE_TICK_INTERVAL))
+            if not due:
+                return
             try:
-                await self.health_checker.check_all_clients(db)
-                logger.info("Health check job completed successfully")
-            except Exception as e:
-                logger.error(f"Health check job failed: {str(e)}")
-    
+                results = await self.health_checker.check_targets(self.http_client, due)
+            except BaseException:
+                for target in due:
+                    self.schedule.release(target)
+                raise
+
+            finished = time.monotonic()
+            for target, result in zip(due, results):
+                self.schedule.record(target, result["alert_level"], finished)
+            metrics.probe_mean_interval_seconds.set(self.schedule.mean_interval())
+
+            if self.anomalies is not None:
+                self.anomalies.score(results)
+            if self.rules is not None:
+                results = self.rules.evaluate_many(results)
+                attach_alert_events(due, results)
+            rows = self.change_filter.filter(results) if self.change_filter is not None else results
+            await self.writer.put_many(rows)
+            metrics.scheduler_cycles_total.labels("success").inc()
+            logger.info(
+                f"Health check job completed successfully "
+                f"({len(results)} of {len(targets)} targets due, {len(rows)} rows stored)"
+            )
+        except Exception as e:
+            metrics.scheduler_cycles_total.labels("failure").inc()
+            logger.error(f"Health check job failed: {str(e)}")
+        finally:
+            metrics.scheduler_cycle_duration_seconds.observe(time.perf_counter() - start)
+
+    def _offer_pushed(self, event):
+        self._pushed.append(decode_pushed_result(event))
+
+    async def pushed_rules_job(self):
+        """Evaluate the windowed rules on results pushed to the API since the last run"""
+        if not self._pushed:
+            return
+        rows = [self._pushed.popleft() for _ in range(len(self._pushed))]
+        # Only the node probing a target holds its windows; every other node ignores its results
+        if (self.leader is not None and not self.leader.is_leader) or not self._active:
+            return
+        targets = {target.key: target for target in self._active}
+        rows = sorted(
+            (row for row in rows if (row["installation_id"], row["endpoint_id"]) in targets),
+            key=lambda row: row["created_at"]
+        )
+        if not rows:
+            return
+        try:
+            stored = [row["alert_triggered"] for row in rows]
+            rows = self.rules.evaluate_many(rows)
+            attach_alert_events([targets[(row["installation_id"], row["endpoint_id"])] for row in rows], rows)
+            changed = [row for row, triggered in zip(rows, stored) if row["alert_triggered"] != triggered or row["extra_data"]]
+            if changed:
+                await self.writer.write_verdicts(changed)
+        except Exception as e:
+            logger.error(f"Evaluating {len(rows)} pushed results failed: {str(e)}")
+
+    async def save_baselines_job(self):
+        """Persist anomaly baselines changed since the last save"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.anomalies.save(db)
+        except Exception as e:
+            logger.error(f"Saving anomaly baselines failed: {str(e)}")
+
+    async def sla_refresh_job(self):
+        """Cache closed SLA days and recompute target-days changed by late results"""
+        # Sharded nodes all run it; the work is idempotent and stale rows are claimed with SKIP LOCKED
+        if self.leader is not None and not self.leader.is_leader:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                filled, recomputed = await refresh_cache(db)
+            if filled or recomputed:
+                logger.info(f"SLA cache refreshed ({filled} days filled, {recomputed} stale target-days recomputed)")
+        except Exception as e:
+            logger.error(f"SLA refresh failed: {str(e)}")
+
+    def start_prewarm(self, targets):
+        """Open connections for targets due on the next tick, without delaying this one"""
+        if not targets or (self._prewarm_task is not None and not self._prewarm_task.done()):
+            return
+        self._prewarm_task = asyncio.create_task(self.health_checker.prewarm(targets))
+        self._prewarm_task.add_done_callback(_log_prewarm_failure)
+
+    async def _on_elected(self):
+        """Start from fresh state: another process may have probed since we last led"""
+        self.schedule = ProbeSchedule()
+        if self.rules is not None:
+            self.rules = AlertRuleEngine()
+        if self.change_filter is not None:
+            self.change_filter = ChangeOnlyFilter()
+        if self.anomalies is not None:
+            # Baselines are reloaded from what the previous leader saved
+            self.anomalies = AnomalyDetector()
+        self._targets_loaded_at = None
+        self._active = None
+        self._expected_run = None
+
+    async def _on_deposed(self):
+        """Hand over quietly: store pending heartbeats and stop probing until re-elected"""
+        if self.change_filter is not None:
+            await self.writer.put_many(self.change_filter.flush())
+        if self.anomalies is not None:
+            await self.save_baselines_job()
+        metrics.probe_targets.set(0)
+
     def start(self):
         """Start the scheduler with configured jobs"""
-        # Add health check job
+        # Connections are kept alive between cycles instead of one client per probe
+        self.http_client = self.health_checker.create_client()
+        self.writer.start()
+        if self.pushed_listener is not None:
+            self.pushed_listener.start()
+
+        # Ticks are cheap when nothing is due; targets still being probed stay
+        # reserved, so overlapping ticks never probe the same target twice
         self.scheduler.add_job(
             self.health_check_job,
-            trigger=IntervalTrigger(seconds=settings.HEALTH_CHECK_INTERVAL),
+            trigger=IntervalTrigger(seconds=settings.PROBE_TICK_INTERVAL),
             id='health_check_job',
             name='Health Check Job',
-            replace_existing=True
+            replace_existing=True,
+            max_instances=settings.PROBE_MAX_OVERLAPPING_TICKS,
+            coalesce=True
+        )
+        if self.rules is not None:
+            self.scheduler.add_job(
+                self.pushed_rules_job,
+                trigger=IntervalTrigger(seconds=settings.PROBE_TICK_INTERVAL),
+                id='pushed_rules_job',
+                name='Pushed Results Rules Job',
+                replace_existing=True,
+                coalesce=True
+            )
+        if self.anomalies is not None:
+            self.scheduler.add_job(
+                self.save_baselines_job,
+                trigger=IntervalTrigger(seconds=settings.ANOMALY_PERSIST_INTERVAL),
+                id='save_baselines_job',
+                name='Save Anomaly Baselines Job',
+                replace_existing=True,
+                coalesce=True
+            )
+        self.scheduler.add_job(
+            self.sla_refresh_job,
+            trigger=IntervalTrigger(seconds=settings.SLA_REFRESH_INTERVAL),
+            id='sla_refresh_job',
+            name='SLA Refresh Job',
+            replace_existing=True,
+            coalesce=True
         )
-        
+
         self.scheduler.start()
-        logger.info(f"Background scheduler started with health check interval: {settings.HEALTH_CHECK_INTERVAL}s")
-    
-    def shutdown(self):
+        if self.leader is not None:
+            self.leader.start(on_elected=self._on_elected, on_deposed=self._on_deposed)
+        if self.shards is not None:
+            self.shards.start()
+        logger.info(
+            f"Background scheduler started (tick {settings.PROBE_TICK_INTERVAL}s, "
+            f"adaptive={settings.PROBE_ADAPTIVE}, interval {settings.PROBE_MIN_INTERVAL}-{settings.PROBE_MAX_INTERVAL}s)"
+        )
+
+    async def shutdown(self):
         """Shutdown the scheduler"""
         if self.scheduler.running:
             self.scheduler.shutdown()
-            logger.info("Background scheduler stopped")
\ No newline at end of file
+            logger.info("Background scheduler stopped")
+        if self.leader is not None:
+            await self.leader.stop()
+        if self.shards is not None:
+            await self.shards.stop()
+        if self.pushed_listener is not None:
+            await self.pushed_listener.stop()
+        # Windows already flushed on stepping down are empty, so this adds nothing twice
+        if self.change_filter is not None:
+            await self.writer.put_many(self.change_filter.flush())
+        if self.anomalies is not None:
+            await self.save_baselines_job()
+        await self.writer.stop()
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+        if self.health_checker.backend is not None:
+            await self.health_checker.backend.aclose()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+
+def _log_prewarm_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Connection pre-warm failed: {task.exception()}")
@@ -0,0 +1,205 @@
+"""
+Change-only storage of probe results.
+
+With PROBE_STORAGE_MODE=changes a monitoring log row is written only when a
+target changes state (status code, alert level or alert_triggered) or its
+latency leaves the band around the last stored latency. Unchanged results
+are folded into heartbeat rows, written every PROBE_HEARTBEAT_INTERVAL
+seconds, whose extra_data carries the window summary:
+
+    {"kind": "heartbeat", "count": 42, "min_ms": 31, "max_ms": 88,
+     "mean_ms": 47.3, "window_start": "2024-01-01T00:00:00+00:00"}
+
+The heartbeat's created_at is the time of the last folded probe, and
+response_time_ms holds the rounded mean. expand_logs turns heartbeat rows back
+into one entry per probe for the read APIs.
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, func
+
+from app.core.config import settings
+from app.core import metrics
+from app.models import MonitoringLog
+
+HEARTBEAT = "heartbeat"
+
+
+class TargetWindow:
+    __slots__ = ("status_code", "alert_level", "alert_triggered", "baseline_ms", "template", "count",
+                 "min_ms", "max_ms", "sum_ms", "timed", "window_start", "last_at")
+
+    def __init__(self, row: Dict[str, Any]):
+        self.status_code = row["status_code"]
+        self.alert_level = row["alert_level"]
+        self.alert_triggered = row["alert_triggered"]
+        self.baseline_ms = row["response_time_ms"]
+        self.reset(row["created_at"])
+
+    def reset(self, window_start: datetime):
+        self.template = None
+        self.count = 0
+        self.min_ms = None
+        self.max_ms = None
+        self.sum_ms = 0
+        self.timed = 0
+        self.window_start = window_start
+        self.last_at = window_start
+
+    def add(self, row: Dict[str, Any]):
+        self.template = row
+        self.count += 1
+        self.last_at = row["created_at"]
+        latency = row["response_time_ms"]
+        if latency is not None:
+            self.timed += 1
+            self.sum_ms += latency
+            self.min_ms = latency if self.min_ms is None else min(self.min_ms, latency)
+            self.max_ms = latency if self.max_ms is None else max(self.max_ms, latency)
+
+
+class ChangeOnlyFilter:
+    """Decides which probe results are stored and builds heartbeat summaries"""
+
+    def __init__(
+        self,
+        heartbeat_interval: Optional[float] = None,
+        band_pct: Optional[float] = None,
+        band_min_ms: Optional[int] = None
+    ):
+        self.heartbeat_interval = heartbeat_interval or settings.PROBE_HEARTBEAT_INTERVAL
+        self.band_pct = band_pct if band_pct is not None else settings.PROBE_LATENCY_BAND_PCT
+        self.band_min_ms = band_min_ms if band_min_ms is not None else settings.PROBE_LATENCY_BAND_MIN_MS
+        self._windows: Dict[Tuple[UUID, UUID], TargetWindow] = {}
+
+    def filter(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows to store for a batch of probe results"""
+        stored = []
+        folded = 0
+        for row in rows:
+            key = (row["installation_id"], row["endpoint_id"])
+            window = self._windows.get(key)
+
+            if window is None or self.is_change(window, row):
+                if window is not None and window.count:
+                    stored.append(self.heartbeat(window))
+                self._windows[key] = TargetWindow(row)
+                stored.append(row)
+                continue
+
+            window.add(row)
+            folded += 1
+            if (window.last_at - window.window_start).total_seconds() >= self.heartbeat_interval:
+                stored.append(self.heartbeat(window))
+                window.reset(window.last_at)
+
+        if folded:
+            metrics.probe_results_folded_total.inc(folded)
+        return stored
+
+    def is_change(self, window: TargetWindow, row: Dict[str, Any]) -> bool:
+        if (row["status_code"] != window.status_code or row["alert_level"] != window.alert_level
+                or row["alert_triggered"] != window.alert_triggered):
+            return True
+        # Anomalous results are always stored, so the detector's findings stay visible
+        if "anomaly" in (row["extra_data"] or {}):
+            return True
+        latency, baseline = row["response_time_ms"], window.baseline_ms
+        if latency is None or baseline is None:
+            return (latency is None) != (baseline is None)
+        band = max(baseline * self.band_pct / 100, self.band_min_ms)
+        return abs(latency - baseline) > band
+
+    def heartbeat(self, window: TargetWindow) -> Dict[str, Any]:
+        template = window.template
+        mean_ms = window.sum_ms / window.timed if window.timed else None
+        extra_data = {key: value for key, value in (template["extra_data"] or {}).items() if key != "dns_ms"}
+        extra_data.update({
+            "kind": HEARTBEAT,
+            "count": window.count,
+            "min_ms": window.min_ms,
+            "max_ms": window.max_ms,
+            "mean_ms": round(mean_ms, 1) if mean_ms is not None else None,
+            "window_start": window.window_start.isoformat(),
+        })
+        return {
+            **template,
+            "response_time_ms": round(mean_ms) if mean_ms is not None else None,
+            "response_body": None,
+            "extra_data": extra_data,
+            "created_at": window.last_at,
+        }
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Heartbeats for every open window, e.g. on shutdown"""
+        rows = [self.heartbeat(window) for window in self._windows.values() if window.count]
+        for window in self._windows.values():
+            window.reset(window.last_at)
+        return rows
+
+    def retain(self, keys: Iterable[Tuple[UUID, UUID]]) -> List[Dict[str, Any]]:
+        """Forget targets that are no longer active, returning their pending heartbeats"""
+        keep = set(keys)
+        rows = []
+        for key in list(self._windows):
+            if key not in keep:
+                window = self._windows.pop(key)
+                if window.count:
+                    rows.append(self.heartbeat(window))
+        return rows
+
+
+def heartbeat_value(key: str, default):
+    """SQL value of a heartbeat summary field, ``default`` for every other row
+
+    Only heartbeat rows are read, so extra_data pushed by clients never weights
+    or breaks aggregates.
+    """
+    return case(
+        (MonitoringLog.extra_data["kind"].as_string() == HEARTBEAT,
+         func.coalesce(MonitoringLog.extra_data[key].as_integer(), default)),
+        else_=default
+    )
+
+
+def is_heartbeat(log) -> bool:
+    extra_data = log.extra_data or {}
+    return extra_data.get("kind") == HEARTBEAT
+
+
+def expand_heartbeat(log) -> List[Dict[str, Any]]:
+    """One entry per folded probe, evenly spaced over the heartbeat window"""
+    extra_data = log.extra_data
+    count = int(extra_data.get("count") or 1)
+    window_start = datetime.fromisoformat(extra_data["window_start"])
+    step = (log.created_at - window_start) / count
+    entries = []
+    for i in range(count, 0, -1):
+        entries.append({
+            "id": uuid.uuid5(log.id, str(i)),
+            "installation_id": log.installation_id,
+            "endpoint_id": log.endpoint_id,
+            "response_time_ms": log.response_time_ms,
+            "status_code": log.status_code,
+            "response_body": None,
+            "error_message": log.error_message,
+            "alert_level": log.alert_level,
+            "alert_triggered": log.alert_triggered,
+            "extra_data": {**extra_data, "expanded_from": str(log.id)},
+            "created_at": window_start + step * i,
+        })
+    return entries
+
+
+def expand_logs(logs: Iterable) -> List[Any]:
+    """Replace heartbeat rows by per-probe entries, keeping newest-first order"""
+    expanded = []
+    for log in logs:
+        if is_heartbeat(log):
+            expanded.extend(expand_heartbeat(log))
+        else:
+            expanded.append(log)
+    return expanded
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class HostState:
+    __slots__ = ("state", "failures", "next_canary", "canary_key")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.next_canary = 0.0
+        self.canary_key = None
+
+
+class HostCircuitBreaker:
+    """
+    Per-host circuit breaker for probe targets.
+
+    After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive connect failures on
+    a host the circuit opens: its endpoints are no longer probed, except for
+    a single canary every CIRCUIT_BREAKER_CANARY_INTERVAL seconds. A
+    successful canary closes the circuit again; a failed one keeps it open.
+    A canary that reports nothing by its deadline is replaced by another.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, canary_interval: Optional[float] = None):
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.canary_interval = canary_interval or settings.CIRCUIT_BREAKER_CANARY_INTERVAL
+        # How long a half-open host waits for its canary's result
+        self.canary_deadline = self.canary_interval + settings.HEALTH_CHECK_TIMEOUT
+        self._hosts: Dict[str, HostState] = {}
+
+    def partition(self, targets: List, now: float) -> Tuple[List, List]:
+        """Split targets into those to probe and those skipped by an open circuit"""
+        probe, skipped = [], []
+        for target in targets:
+            host = self._hosts.get(target.host)
+            if host is None or host.state == CLOSED:
+                probe.append(target)
+            elif now >= host.next_canary:
+                # Open and due for a canary, or half-open with a canary whose
+                # result never came back (skipped tick, deactivated target,
+                # probe error): send a new one rather than stay half-open
+                host.state = HALF_OPEN
+                host.canary_key = target.key
+                host.next_canary = now + self.canary_deadline
+                probe.append(target)
+            else:
+                skipped.append(target)
+
+        if skipped:
+            metrics.circuit_breaker_skipped_total.inc(len(skipped))
+        return probe, skipped
+
+    def record(self, target, connect_failed: bool, now: float):
+        """Feed the outcome of a probe that was actually sent"""
+        host = self._hosts.get(target.host)
+        if host is None:
+            if not connect_failed:
+                return
+            host = self._hosts[target.host] = HostState()
+
+        if host.state == HALF_OPEN and host.canary_key == target.key:
+            host.canary_key = None
+            if connect_failed:
+                host.state = OPEN
+                host.next_canary = now + self.canary_interval
+            else:
+                self._close(target.host)
+            return
+
+        if not connect_failed:
+            if host.state == CLOSED:
+                host.failures = 0
+            return
+
+        host.failures += 1
+        if host.state == CLOSED and host.failures >= self.failure_threshold:
+            host.state = OPEN
+            host.next_canary = now + self.canary_interval
+            metrics.circuit_breaker_open_hosts.set(self.open_hosts())
+
+    def _close(self, host_name: str):
+        del self._hosts[host_name]
+        metrics.circuit_breaker_open_hosts.set(self.open_hosts())
+
+    def open_hosts(self) -> int:
+        return sum(1 for host in self._hosts.values() if host.state != CLOSED)
+
+    def is_open(self, host_name: str) -> bool:
+        host = self._hosts.get(host_name)
+        return host is not None and host.state != CLOSED
@@ -1,209 +1,350 @@
 import httpx
+import httpcore
 import asyncio
-from datetime import datetime
-from typing import Dict, Optional, Any
-from sqlalchemy.orm import Session
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlsplit
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.models import Client, Service, HealthCheck
+from app.models import Client, Instance, Module, Installation, Endpoint, Threshold
 from app.core.config import settings
+from app.core import metrics
+from app.services.circuit_breaker import HostCircuitBreaker
+from app.services.probe_transport import DNSCache, PrewarmingBackend, ProbeTransport
+
+# Alert levels ordered by severity
+ALERT_LEVELS = ["ok", "warning", "error", "critical"]
+
+
+@dataclass
+class ProbeTarget:
+    """One endpoint of one installation, with everything needed to probe it"""
+    installation_id: UUID
+    endpoint_id: UUID
+    client_id: UUID
+    host: str
+    url: str
+    method: str
+    api_key: str
+    timeout: float
+    module_name: str
+    endpoint_name: str
+    expected_response_time_ms: int
+    thresholds: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    min_interval: Optional[int] = None
+    max_interval: Optional[int] = None
+
+    @property
+    def key(self):
+        return (self.installation_id, self.endpoint_id)
+
+    @cached_property
+    def origin(self) -> Tuple[str, int]:
+        """(hostname, port) the probe connects to"""
+        parts = urlsplit(self.url)
+        return parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80)
+
+
+def build_url(host: str, *paths: Optional[str]) -> str:
+    """Join an instance host with module and endpoint relative paths"""
+    base = host if "://" in host else f"https://{host}"
+    parts = [p.strip("/") for p in paths if p and p.strip("/")]
+    return "/".join([base.rstrip("/")] + parts)
+
+
+def max_level(*levels: str) -> str:
+    return max(levels, key=ALERT_LEVELS.index)
+
+
+def evaluate_thresholds(
+    thresholds: Dict[str, Dict[str, Any]],
+    status_code: Optional[int],
+    response_time_ms: Optional[int]
+) -> str:
+    """Map a probe outcome to an alert level using the endpoint thresholds"""
+    if status_code is None:
+        return "critical"
+
+    level = "ok"
+
+    status_threshold = thresholds.get("status_code")
+    expected_codes = ((status_threshold or {}).get("expected_values") or {}).get("codes")
+    if expected_codes:
+        if status_code not in expected_codes:
+            level = "error"
+    elif status_code >= 400:
+        level = "error"
+
+    time_threshold = thresholds.get("response_time")
+    if time_threshold and response_time_ms is not None:
+        if _outside(response_time_ms, time_threshold["error_min"], time_threshold["error_max"]):
+            level = max_level(level, "error")
+        elif _outside(response_time_ms, time_threshold["warning_min"], time_threshold["warning_max"]):
+            level = max_level(level, "warning")
+
+    return level
+
+
+def group_thresholds(threshold_rows) -> Dict[tuple, Dict[str, Dict[str, Any]]]:
+    """Threshold rows keyed by (installation_id, endpoint_id), then metric type"""
+    thresholds: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+    for row in threshold_rows:
+        thresholds.setdefault((row.installation_id, row.endpoint_id), {})[row.metric_type] = {
+            "warning_min": _as_float(row.warning_min),
+            "warning_max": _as_float(row.warning_max),
+            "error_min": _as_float(row.error_min),
+            "error_max": _as_float(row.error_max),
+            "expected_values": row.expected_values,
+        }
+    return thresholds
+
+
+def _outside(value, low, high) -> bool:
+    return (low is not None and value < low) or (high is not None and value > high)
 
 
 class HealthChecker:
     def __init__(self):
         self.timeout = settings.HEALTH_CHECK_TIMEOUT
-    
-    async def check_service(self, service: Service, api_key: str) -> Dict[str, Any]:
-        """Check a single service health"""
-        start_time = datetime.utcnow()
-        
-        try:
-            headers = service.headers or {}
-            headers['X-API-Key'] = api_key
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.request(
-                    method=service.method,
-                    url=f"{service.endpoint}",
-                    headers=headers
-                )
-                
-                response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
-                
-                if response.status_code == service.expected_status:
-                    status = "UP"
-                elif 200 <= response.status_code < 400:
-                    status = "DEGRADED"
-                else:
-                    status = "DOWN"
-                
-                return {
-                    "status": status,
-                    "response_time": response_time,
-                    "status_code": response.status_code,
-                    "error_message": None
-                }
-                
-        except httpx.TimeoutException:
-            return {
-                "status": "DOWN",
-                "response_time": self.timeout * 1000,
-                "status_code": None,
-                "error_message": "Service timeout"
-            }
-        except httpx.RequestError as e:
-            return {
-                "status": "DOWN",
-                "response_time": None,
-                "status_code": None,
-                "error_message": str(e)
-            }
-        except Exception as e:
-            return {
-                "status": "DOWN",
-                "response_time": None,
-                "status_code": None,
-                "error_message": f"Unexpected error: {str(e)}"
-            }
-    
-    async def check_client_services(self, db: AsyncSession, client_id: int):
-        """Check all services for a client"""
-        # Get client
-        client_result = await db.execute(
-            select(Client).where(Client.id == client_id, Client.is_active == True)
+        self.breaker = HostCircuitBreaker() if settings.CIRCUIT_BREAKER_ENABLED else None
+        self.backend = PrewarmingBackend(DNSCache()) if settings.PROBE_DNS_CACHE_ENABLED else None
+
+    def create_client(self, **kwargs) -> httpx.AsyncClient:
+        """Shared keep-alive client used for every probe of a cycle"""
+        limits = httpx.Limits(
+            max_connections=settings.PROBE_CONCURRENCY,
+            keepalive_expiry=settings.PROBE_KEEPALIVE_EXPIRY
         )
-        client = client_result.scalar_one_or_none()
-        
-        if not client:
+        if self.backend is not None:
+            kwargs.setdefault("transport", ProbeTransport(self.backend, limits))
+        return httpx.AsyncClient(timeout=self.timeout, limits=limits, **kwargs)
+
+    async def resolve_hosts(self, targets: List[ProbeTarget]) -> Dict[str, float]:
+        """Resolve every target host up front so probe timings exclude DNS
+
+        Returns the lookup time of hosts that were not cached yet.
+        """
+        if self.backend is None:
+            return {}
+        hostnames = list({target.origin[0] for target in targets})
+
+        async def resolve(hostname):
+            try:
+                _, elapsed = await self.backend.dns.resolve(hostname)
+            except httpcore.ConnectError:
+                # The probe itself reports the failure
+                return 0.0
+            return elapsed
+
+        elapsed = await asyncio.gather(*(resolve(hostname) for hostname in hostnames))
+        return {hostname: seconds for hostname, seconds in zip(hostnames, elapsed) if seconds}
+
+    async def prewarm(self, targets: List[ProbeTarget]):
+        """Resolve and open connections to the hosts of targets about to be probed"""
+        if self.backend is None or not settings.PROBE_PREWARM_ENABLED:
             return
-        
-        # Get active services for this client
-        services_result = await db.execute(
-            select(Service).where(
-                Service.client_id == client_id,
-                Service.is_active == True
+        counts: Dict[Tuple[str, int], int] = {}
+        for target in targets:
+            if self.breaker is not None and self.breaker.is_open(target.host):
+                continue
+            counts[target.origin] = counts.get(target.origin, 0) + 1
+
+        semaphore = asyncio.Semaphore(settings.PROBE_CONCURRENCY)
+
+        async def warm(origin, count):
+            async with semaphore:
+                await self.backend.prewarm(
+                    origin[0], origin[1], min(count, settings.PROBE_PREWARM_MAX_PER_HOST), self.timeout
+                )
+
+        await self.backend.expire()
+        await asyncio.gather(*(warm(origin, count) for origin, count in counts.items()))
+
+    def targets_query(self, client_id: Optional[UUID] = None):
+        """Single joined query for every active (installation, endpoint) pair"""
+        query = (
+            select(
+                Installation.id.label("installation_id"),
+                Installation.api_key,
+                Instance.client_id,
+                Instance.host,
+                Module.name.label("module_name"),
+                Module.relative_path.label("module_path"),
+                Endpoint.id.label("endpoint_id"),
+                Endpoint.name.label("endpoint_name"),
+                Endpoint.relative_path.label("endpoint_path"),
+                Endpoint.method,
+                Endpoint.timeout_ms,
+                Endpoint.expected_response_time_ms,
+                Endpoint.min_probe_interval_s,
+                Endpoint.max_probe_interval_s,
             )
-        )
-        services = services_result.scalars().all()
-        
-        # Check each service
-        for service in services:
-            result = await self.check_service(service, client.api_key)
-            
-            # Save health check result
-            health_check = HealthCheck(
-                client_id=client_id,
-                service_id=service.id,
-                status=result["status"],
-                response_time=result["response_time"],
-                status_code=result["status_code"],
-                error_message=result["error_message"]
+            .join(Instance, Installation.instance_id == Instance.id)
+            .join(Client, Instance.client_id == Client.id)
+            .join(Module, Installation.module_id == Module.id)
+            .join(Endpoint, Endpoint.module_id == Module.id)
+            .where(
+                Installation.is_active == True,
+                Instance.is_active == True,
+                Client.is_active == True
             )
-            db.add(health_check)
-        
-        await db.commit()
-    
-    async def check_all_clients(self, db: AsyncSession):
-        """Check all active clients and their services"""
-        # Get all active clients
-        result = await db.execute(
-            select(Client).where(Client.is_active == True)
         )
-        clients = result.scalars().all()
-        
-        # Check each client's services concurrently
-        tasks = [
-            self.check_client_services(db, client.id)
-            for client in clients
+        if client_id is not None:
+            query = query.where(Client.id == client_id)
+        return query
+
+    @staticmethod
+    def thresholds_query():
+        return select(
+            Threshold.installation_id,
+            Threshold.endpoint_id,
+            Threshold.metric_type,
+            Threshold.warning_min,
+            Threshold.warning_max,
+            Threshold.error_min,
+            Threshold.error_max,
+            Threshold.expected_values,
+        ).where(Threshold.is_active == True)
+
+    def build_targets(self, rows, threshold_rows) -> List[ProbeTarget]:
+        thresholds = group_thresholds(threshold_rows)
+
+        return [
+            ProbeTarget(
+                installation_id=row.installation_id,
+                endpoint_id=row.endpoint_id,
+                client_id=row.client_id,
+                host=row.host,
+                url=build_url(row.host, row.module_path, row.endpoint_path),
+                method=row.method,
+                api_key=row.api_key,
+                timeout=min(row.timeout_ms / 1000, self.timeout),
+                module_name=row.module_name,
+                endpoint_name=row.endpoint_name,
+                expected_response_time_ms=row.expected_response_time_ms,
+                thresholds=thresholds.get((row.installation_id, row.endpoint_id), {}),
+                min_interval=row.min_probe_interval_s,
+                max_interval=row.max_probe_interval_s,
+            )
+            for row in rows
         ]
-        
-        if tasks:
-            await asyncio.gather(*tasks)
-    
-    def check_service_sync(self, service: Service, api_key: str) -> Dict[str, Any]:
-        """Synchronous version for Celery tasks"""
-        start_time = datetime.utcnow()
-        
+
+    async def load_targets(self, db: AsyncSession, client_id: Optional[UUID] = None) -> List[ProbeTarget]:
+        """Load every active probe target with its thresholds in two queries"""
+        rows = (await db.execute(self.targets_query(client_id))).all()
+        threshold_rows = (await db.execute(self.thresholds_query())).all()
+        return self.build_targets(rows, threshold_rows)
+
+    def build_result(
+        self,
+        target: ProbeTarget,
+        elapsed: Optional[float],
+        response: Optional[httpx.Response] = None,
+        error_message: Optional[str] = None,
+        failure: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Turn a probe outcome into a monitoring log row and record metrics"""
+        status_code = response.status_code if response is not None else None
+        response_time_ms = int(elapsed * 1000) if elapsed is not None else None
+        alert_level = evaluate_thresholds(target.thresholds, status_code, response_time_ms)
+
+        response_body = None
+        if response is not None and alert_level != "ok":
+            response_body = response.text[:settings.PROBE_RESPONSE_BODY_MAX]
+        if response is not None and alert_level != "ok" and error_message is None:
+            error_message = f"HTTP {status_code}"
+
+        if elapsed is not None:
+            metrics.probe_duration_seconds.labels(target.module_name, target.endpoint_name).observe(elapsed)
+        metrics.probes_total.labels(target.module_name, target.endpoint_name, alert_level).inc()
+
+        extra_data = {"url": target.url, "method": target.method}
+        if failure is not None:
+            extra_data["failure"] = failure
+
+        return {
+            "installation_id": target.installation_id,
+            "endpoint_id": target.endpoint_id,
+            "response_time_ms": response_time_ms,
+            "status_code": status_code,
+            "response_body": response_body,
+            "error_message": error_message,
+            "alert_level": alert_level,
+            "alert_triggered": alert_level != "ok",
+            "extra_data": extra_data,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    async def check_endpoint(self, client: httpx.AsyncClient, target: ProbeTarget) -> Dict[str, Any]:
+        """Probe a single endpoint"""
+        start = time.perf_counter()
         try:
-            headers = service.headers or {}
-            headers['X-API-Key'] = api_key
-            
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.request(
-                    method=service.method,
-                    url=f"{service.endpoint}",
-                    headers=headers
-                )
-                
-                response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
-                
-                if response.status_code == service.expected_status:
-                    status = "UP"
-                elif 200 <= response.status_code < 400:
-                    status = "DEGRADED"
-                else:
-                    status = "DOWN"
-                
-                return {
-                    "status": status,
-                    "response_time": response_time,
-                    "status_code": response.status_code,
-                    "error_message": None
-                }
-                
+            response = await client.request(
+                method=target.method,
+                url=target.url,
+                headers={"X-API-Key": target.api_key},
+                timeout=target.timeout
+            )
+            return self.build_result(target, time.perf_counter() - start, response)
+        except httpx.ConnectTimeout:
+            return self.build_result(target, time.perf_counter() - start, error_message="Connection timeout", failure="connect")
         except httpx.TimeoutException:
-            return {
-                "status": "DOWN",
-                "response_time": self.timeout * 1000,
-                "status_code": None,
-                "error_message": "Service timeout"
-            }
+            return self.build_result(target, time.perf_counter() - start, error_message="Service timeout", failure="timeout")
+        except httpx.ConnectError as e:
+            return self.build_result(target, time.perf_counter() - start, error_message=str(e) or "Connection failed", failure="connect")
         except httpx.RequestError as e:
-            return {
-                "status": "DOWN",
-                "response_time": None,
-                "status_code": None,
-                "error_message": str(e)
-            }
+            return self.build_result(target, time.perf_counter() - start, error_message=str(e) or type(e).__name__, failure="request")
         except Exception as e:
-            return {
-                "status": "DOWN",
-                "response_time": None,
-                "status_code": None,
-                "error_message": f"Unexpected error: {str(e)}"
-            }
-    
-    def check_client_services_sync(self, db: Session, client_id: int):
-        """Synchronous version for Celery tasks"""
-        # Get client
-        client = db.query(Client).filter(
-            Client.id == client_id,
-            Client.is_active == True
-        ).first()
-        
-        if not client:
-            return
-        
-        # Get active services for this client
-        services = db.query(Service).filter(
-            Service.client_id == client_id,
-            Service.is_active == True
-        ).all()
-        
-        # Check each service
-        for service in services:
-            result = self.check_service_sync(service, client.api_key)
-            
-            # Save health check result
-            health_check = HealthCheck(
-                client_id=client_id,
-                service_id=service.id,
-                status=result["status"],
-                response_time=result["response_time"],
-                status_code=result["status_code"],
-                error_message=result["error_message"]
-            )
-            db.add(health_check)
-        
-        db.commit()
\ No newline at end of file
+            return self.build_result(target, time.perf_counter() - start, error_message=f"Unexpected error: {str(e)}")
+
+    def build_skipped_result(self, target: ProbeTarget) -> Dict[str, Any]:
+        """DOWN result for a target skipped because its host circuit is open"""
+        return self.build_result(target, None, error_message="Host unreachable (circuit open)", failure="circuit_open")
+
+    async def check_targets(self, client: httpx.AsyncClient, targets: List[ProbeTarget]) -> List[Dict[str, Any]]:
+        """Probe many targets concurrently, bounded by PROBE_CONCURRENCY
+
+        Results are returned in the order of ``targets``. Targets on hosts
+        with an open circuit are not sent and come back as DOWN results.
+        """
+        if self.breaker is not None:
+            to_probe, skipped = self.breaker.partition(targets, time.monotonic())
+        else:
+            to_probe, skipped = targets, []
+
+        dns_times = await self.resolve_hosts(to_probe)
+        semaphore = asyncio.Semaphore(settings.PROBE_CONCURRENCY)
+
+        async def bounded(target):
+            async with semaphore:
+                result = await self.check_endpoint(client, target)
+            dns_time = dns_times.get(target.origin[0])
+            if dns_time is not None:
+                result["extra_data"]["dns_ms"] = round(dns_time * 1000, 1)
+            if self.breaker is not None:
+                failure = result["extra_data"].get("failure")
+                self.breaker.record(target, failure == "connect", time.monotonic())
+            return result
+
+        probed = await asyncio.gather(*(bounded(target) for target in to_probe))
+        if not skipped:
+            return probed
+
+        by_key = {target.key: result for target, result in zip(to_probe, probed)}
+        for target in skipped:
+            by_key[target.key] = self.build_skipped_result(target)
+        return [by_key[target.key] for target in targets]
+
+    async def check_all_clients(self, db: AsyncSession, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Probe every active endpoint of every active client"""
+        targets = await self.load_targets(db)
+        return await self.check_targets(client, targets)
+
+
+def _as_float(value):
+    return float(value) if value is not None else None
@@ -0,0 +1,119 @@
+"""
+Incidents: runs of consecutive non-ok results of one target.
+
+An incident opens with the first warning/error/critical result of an
+(installation, endpoint), is extended by the following non-ok results and
+ends with the next ok result. It records when it started and ended, its peak
+level and how many probes failed, so incident views and MTTR reports read
+the incidents table only.
+
+Incidents are maintained as results are written, in the transaction that
+inserts the logs: one query per batch loads the open incidents of the batch's
+targets through the partial unique index on open incidents, then new ones are
+inserted and changed ones updated. Results older than what an open incident
+already covers (late pushes) do not reopen or close anything. Targets that
+are deactivated never report the ok result that would end their incident,
+so the probe runner closes those at their last failure when it reloads its
+targets.
+"""
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select, update, exists, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Incident
+from app.services.change_storage import HEARTBEAT
+
+LEVEL_RANK = {"warning": 1, "error": 2, "critical": 3}
+
+_COLUMNS = ("started_at", "last_failure_at", "ended_at", "peak_level", "samples", "last_status_code", "last_error_message")
+
+
+def _samples(row: Dict[str, Any]) -> int:
+    # Heartbeat rows of change-only storage stand for all the probes they fold
+    extra_data = row["extra_data"] or {}
+    return int(extra_data.get("count") or 1) if extra_data.get("kind") == HEARTBEAT else 1
+
+
+async def track_incidents(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """Open, extend and close incidents for a batch of results (caller commits)"""
+    by_target: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_target.setdefault((row["installation_id"], row["endpoint_id"]), []).append(row)
+
+    result = await db.execute(
+        select(Incident.id, Incident.installation_id, Incident.endpoint_id, *(getattr(Incident, c) for c in _COLUMNS))
+        .where(
+            Incident.ended_at.is_(None),
+            tuple_(Incident.installation_id, Incident.endpoint_id).in_(list(by_target))
+        )
+    )
+    open_incidents = {(row.installation_id, row.endpoint_id): dict(row._mapping) for row in result.all()}
+    loaded = {key: dict(incident) for key, incident in open_incidents.items()}
+
+    created, changed = [], []
+    for key, target_rows in by_target.items():
+        existing = incident = open_incidents.get(key)
+        for row in sorted(target_rows, key=lambda row: row["created_at"]):
+            if incident is not None and row["created_at"] < incident["last_failure_at"]:
+                continue
+            rank = LEVEL_RANK.get(row["alert_level"])
+            if rank is None:
+                if incident is not None:
+                    incident["ended_at"] = row["created_at"]
+                    incident = None
+                continue
+            if incident is None:
+                incident = {
+                    "id": uuid.uuid4(),
+                    "installation_id": key[0],
+                    "endpoint_id": key[1],
+                    "started_at": row["created_at"],
+                    "ended_at": None,
+                    "peak_level": row["alert_level"],
+                    "samples": 0,
+                }
+                created.append(incident)
+            elif rank > LEVEL_RANK[incident["peak_level"]]:
+                incident["peak_level"] = row["alert_level"]
+            incident["samples"] += _samples(row)
+            incident["last_failure_at"] = row["created_at"]
+            incident["last_status_code"] = row["status_code"]
+            incident["last_error_message"] = row["error_message"]
+        if existing is not None and existing != loaded[key]:
+            changed.append(existing)
+
+    if changed:
+        await db.execute(update(Incident), [
+            {"id": incident["id"], **{column: incident[column] for column in _COLUMNS}}
+            for incident in changed
+        ])
+    # Inserted after the updates, so an incident closed in this batch frees its
+    # target; an incident opened meanwhile by a concurrent writer wins
+    if created:
+        await db.execute(
+            pg_insert(Incident).on_conflict_do_nothing(
+                index_elements=[Incident.installation_id, Incident.endpoint_id],
+                index_where=Incident.ended_at.is_(None)
+            ),
+            created
+        )
+
+
+async def close_inactive_incidents(db: AsyncSession, active_targets) -> int:
+    """End the open incidents of targets missing from ``active_targets`` at their last failure (caller commits)"""
+    targets = active_targets.subquery()
+    result = await db.execute(
+        update(Incident)
+        .where(
+            Incident.ended_at.is_(None),
+            ~exists().where(
+                targets.c.installation_id == Incident.installation_id,
+                targets.c.endpoint_id == Incident.endpoint_id
+            )
+        )
+        .values(ended_at=Incident.last_failure_at)
+    )
+    return result.rowcount
@@ -0,0 +1,265 @@
+"""
+Rate limits and daily quotas for pushed results.
+
+Token buckets per installation and per client are kept in memory and
+charged one token per result, so a check costs a few float operations and
+never touches the database. Daily quota usage is also counted in memory
+(seeded from the database the first time an installation is seen each day);
+QuotaFlusher adds it to ingest_quotas every INGEST_QUOTA_FLUSH_INTERVAL
+seconds and reads back the day's total across all API processes.
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import IngestQuota
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until ``cost`` tokens are available (0 when they are now)"""
+        if cost <= self.tokens:
+            return 0.0
+        if cost > self.capacity:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimited(Exception):
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"{scope} rate limit exceeded")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class IngestLimiter:
+    def __init__(self):
+        self._installations: Dict[UUID, TokenBucket] = {}
+        self._clients: Dict[UUID, TokenBucket] = {}
+        # (installation_id, day) -> [total known from the database, pending accepted, pending rejected]
+        self._usage: Dict[Tuple[UUID, date], list] = {}
+
+    def _bucket(self, buckets: Dict[UUID, TokenBucket], key: UUID, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        else:
+            bucket.refill(now)
+        return bucket
+
+    async def prime(self, installation_ids):
+        """Load today's flushed usage of installations this process has not seen today"""
+        today = datetime.now(timezone.utc).date()
+        missing = [i for i in installation_ids if (i, today) not in self._usage]
+        if not missing or not settings.INGEST_DAILY_QUOTA:
+            return
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(IngestQuota.installation_id, IngestQuota.accepted)
+                .where(IngestQuota.installation_id.in_(missing), IngestQuota.day == today)
+            )).all()
+        totals = dict(rows)
+        for installation_id in missing:
+            self._usage.setdefault((installation_id, today), [totals.get(installation_id, 0), 0, 0])
+
+    def acquire(self, counts: Dict[UUID, int], clients: Dict[UUID, UUID]):
+        """Charge ``counts`` results per installation, or raise RateLimited without charging anything"""
+        now = time.monotonic()
+        today = datetime.now(timezone.utc).date()
+
+        client_counts: Dict[UUID, int] = {}
+        for installation_id, count in counts.items():
+            client_id = clients.get(installation_id)
+            if client_id is not None:
+                client_counts[client_id] = client_counts.get(client_id, 0) + count
+
+        charges = []
+        for installation_id, count in counts.items():
+            usage = self._usage.setdefault((installation_id, today), [0, 0, 0])
+            quota = settings.INGEST_DAILY_QUOTA
+            if quota and usage[0] + usage[1] + count > quota:
+                usage[2] += count
+                raise self._reject("quota", _seconds_until_tomorrow())
+            bucket = self._bucket(self._installations, installation_id,
+                                  settings.INGEST_INSTALLATION_RATE, settings.INGEST_INSTALLATION_BURST, now)
+            wait = bucket.wait_time(count)
+            if wait:
+                usage[2] += count
+                raise self._reject("installation", wait)
+            charges.append((bucket, count))
+
+        for client_id, count in client_counts.items():
+            bucket = self._bucket(self._clients, client_id,
+                                  settings.INGEST_CLIENT_RATE, settings.INGEST_CLIENT_BURST, now)
+            wait = bucket.wait_time(count)
+            if wait:
+                for installation_id, installation_count in counts.items():
+                    if clients.get(installation_id) == client_id:
+                        self._usage[(installation_id, today)][2] += installation_count
+                raise self._reject("client", wait)
+            charges.append((bucket, count))
+
+        for bucket, count in charges:
+            bucket.tokens -= count
+        for installation_id, count in counts.items():
+            self._usage[(installation_id, today)][1] += count
+
+    def release(self, counts: Dict[UUID, int], clients: Dict[UUID, UUID]):
+        """Give back what acquire() charged for results that were never stored"""
+        now = time.monotonic()
+        today = datetime.now(timezone.utc).date()
+        for installation_id, count in counts.items():
+            buckets = [(self._installations, installation_id)]
+            if clients.get(installation_id) is not None:
+                buckets.append((self._clients, clients[installation_id]))
+            for buckets_by_key, key in buckets:
+                bucket = buckets_by_key.get(key)
+                if bucket is not None:
+                    bucket.refill(now)
+                    bucket.tokens = min(bucket.capacity, bucket.tokens + count)
+            # May go negative after a flush; the next flush then subtracts it
+            usage = self._usage.get((installation_id, today))
+            if usage is not None:
+                usage[1] -= count
+
+    def _reject(self, scope: str, retry_after: float) -> RateLimited:
+        metrics.ingest_rejections_total.labels(scope).inc()
+        return RateLimited(scope, retry_after)
+
+    def take_pending(self) -> Dict[Tuple[UUID, date], Tuple[int, int]]:
+        """Pending (accepted, rejected) counts to flush; they move to the known total"""
+        pending = {}
+        for key, usage in self._usage.items():
+            if usage[1] or usage[2]:
+                pending[key] = (usage[1], usage[2])
+                usage[0] += usage[1]
+                usage[1] = usage[2] = 0
+        return pending
+
+    def restore_pending(self, pending: Dict[Tuple[UUID, date], Tuple[int, int]]):
+        """Put counts back after a failed flush"""
+        for key, (accepted, rejected) in pending.items():
+            usage = self._usage.setdefault(key, [0, 0, 0])
+            usage[0] -= accepted
+            usage[1] += accepted
+            usage[2] += rejected
+
+    def set_totals(self, totals: Dict[Tuple[UUID, date], int]):
+        """Day totals read back from the database (all processes)"""
+        for key, total in totals.items():
+            usage = self._usage.get(key)
+            if usage is not None:
+                usage[0] = total
+
+    def forget_before(self, day: date):
+        for key in [key for key in self._usage if key[1] < day]:
+            del self._usage[key]
+
+
+ingest_limiter = IngestLimiter()
+
+
+async def enforce_ingest_limits(counts: Dict[UUID, int], clients: Dict[UUID, UUID]):
+    """Charge pushed results per installation, or answer 413/429 before anything is written
+
+    Callers release() the charge when storing the results fails.
+    """
+    await ingest_limiter.prime(counts)
+    try:
+        ingest_limiter.acquire(counts, clients)
+    except RateLimited as e:
+        if math.isinf(e.retry_after):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds the {e.scope} burst size"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e) if e.scope != "quota" else "Daily ingest quota exhausted",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
+
+class QuotaFlusher:
+    """Periodically adds the in-memory quota counters to ingest_quotas"""
+
+    def __init__(self, limiter: IngestLimiter = ingest_limiter):
+        self.limiter = limiter
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_QUOTA_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        pending = self.limiter.take_pending()
+        self.limiter.forget_before(datetime.now(timezone.utc).date())
+        if not pending:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                statement = insert(IngestQuota).values([
+                    {"installation_id": installation_id, "day": day, "accepted": accepted, "rejected": rejected}
+                    for (installation_id, day), (accepted, rejected) in pending.items()
+                ])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[IngestQuota.installation_id, IngestQuota.day],
+                    set_={
+                        "accepted": IngestQuota.accepted + statement.excluded.accepted,
+                        "rejected": IngestQuota.rejected + statement.excluded.rejected,
+                        "updated_at": func.now(),
+                    }
+                ).returning(IngestQuota.installation_id, IngestQuota.day, IngestQuota.accepted)
+                totals = {(row.installation_id, row.day): row.accepted for row in (await db.execute(statement)).all()}
+                await db.commit()
+        except Exception as e:
+            self.limiter.restore_pending(pending)
+            logger.error(f"Failed to flush ingest quotas: {str(e)}")
+            return
+        self.limiter.set_totals(totals)
+
+
+def _seconds_until_tomorrow() -> float:
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (tomorrow - now).total_seconds()
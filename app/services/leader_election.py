@@ -0,0 +1,125 @@
+"""
+Scheduler leader election through a PostgreSQL advisory lock.
+
+Every API process starts a BackgroundScheduler, but only the process holding
+the session-level advisory lock SCHEDULER_LOCK_KEY probes. The lock lives on
+one dedicated connection: the leader renews it by pinging that connection
+every SCHEDULER_LEADER_RENEW_INTERVAL seconds, and followers retry
+pg_try_advisory_lock on the same interval. When the leader dies its
+connection closes and PostgreSQL releases the lock, so a follower takes over
+within one interval; a leader whose ping fails steps down at once.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+    def __init__(self, engine: AsyncEngine = async_engine, key: Optional[int] = None,
+                 interval: Optional[float] = None):
+        self.engine = engine
+        self.key = key if key is not None else settings.SCHEDULER_LOCK_KEY
+        self.interval = interval or settings.SCHEDULER_LEADER_RENEW_INTERVAL
+        self.is_leader = False
+        self._connection: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callback] = None
+        self._on_deposed: Optional[Callback] = None
+
+    def start(self, on_elected: Optional[Callback] = None, on_deposed: Optional[Callback] = None):
+        if self._task is None:
+            self._on_elected = on_elected
+            self._on_deposed = on_deposed
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop campaigning and release the lock, so a follower takes over without waiting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            released = True
+            try:
+                await asyncio.wait_for(self._execute("SELECT pg_advisory_unlock(:key)", key=self.key), self.interval)
+            except Exception as e:
+                released = False
+                logger.warning(f"Failed to release scheduler leadership: {str(e)}")
+            await self._step_down(invalidate=not released)
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    await self.renew()
+                else:
+                    await self.campaign()
+            except Exception as e:
+                logger.error(f"Scheduler leader election failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def campaign(self) -> bool:
+        """Try to take the lock once; returns whether this process now leads"""
+        connection = await self.engine.connect()
+        try:
+            acquired = (await connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            )).scalar()
+            # Commit so the held connection does not sit idle in a transaction
+            await connection.commit()
+        except BaseException:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+
+        self._connection = connection
+        self.is_leader = True
+        metrics.scheduler_leader.set(1)
+        logger.info("Scheduler leadership acquired")
+        if self._on_elected is not None:
+            await self._on_elected()
+        return True
+
+    async def renew(self):
+        """Ping the lock connection; losing it means losing the lock"""
+        try:
+            await asyncio.wait_for(self._execute("SELECT 1"), self.interval)
+        except Exception as e:
+            logger.warning(f"Scheduler leadership lost: {str(e) or type(e).__name__}")
+            await self._step_down(invalidate=True)
+
+    async def _execute(self, statement: str, **params):
+        await self._connection.execute(text(statement), params)
+        await self._connection.commit()
+
+    async def _step_down(self, invalidate: bool):
+        connection, self._connection = self._connection, None
+        self.is_leader = False
+        metrics.scheduler_leader.set(0)
+        if connection is not None:
+            # A connection in an unknown state must not go back to the pool
+            # still holding the lock
+            try:
+                if invalidate:
+                    await connection.invalidate()
+                await connection.close()
+            except Exception:
+                pass
+        if self._on_deposed is not None:
+            await self._on_deposed()
@@ -0,0 +1,222 @@
+"""
+Relay of live events between processes through PostgreSQL LISTEN/NOTIFY.
+
+Results are written by the probe runner (and by whichever API worker
+accepted a push), while SSE subscribers are connected to API workers. With
+LIVE_RELAY_ENABLED the broadcaster hands events to a LiveNotifier instead of
+its local subscribers; the notifier sends them with pg_notify on
+LIVE_RELAY_CHANNEL, and the LiveListener of every API process publishes what
+it receives to its own subscribers. Events are fire-and-forget like the
+in-process fan-out: a full queue or a lost connection drops events, it never
+holds up the writer. The same channel carries API key cache invalidations
+(see app.services.api_keys), which the listener applies instead of
+publishing.
+
+Pushed results travel the other way on ALERT_PUSHED_CHANNEL: the ingest
+endpoint notifies them in the transaction that stores them, and the probe
+runner evaluates them on its in-memory alert rule windows.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.fast_json import dumps
+from app.services.api_keys import INVALIDATE_EVENT, api_key_cache
+from app.services.live_updates import broadcaster
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads are limited to 8000 bytes
+MAX_PAYLOAD = 7900
+MAX_ERROR_MESSAGE = 500
+
+
+def encode_event(event: Dict[str, Any]) -> Optional[str]:
+    error_message = event.get("error_message")
+    if error_message and len(error_message) > MAX_ERROR_MESSAGE:
+        event = {**event, "error_message": error_message[:MAX_ERROR_MESSAGE]}
+    payload = dumps(event)
+    return payload.decode() if len(payload) <= MAX_PAYLOAD else None
+
+
+def decode_event(payload: str) -> Dict[str, Any]:
+    event = orjson.loads(payload)
+    # Subscribers are indexed by UUID
+    for key in ("client_id", "installation_id", "endpoint_id"):
+        if event.get(key) is not None:
+            event[key] = UUID(event[key])
+    return event
+
+
+# Fields of a stored pushed result the alert rules and outbox entries read
+PUSHED_FIELDS = (
+    "id", "installation_id", "endpoint_id", "alert_level", "alert_triggered",
+    "status_code", "response_time_ms", "error_message", "created_at",
+)
+
+
+async def relay_pushed_results(db, rows: List[Dict[str, Any]]):
+    """Notify pushed results to the probe runner; delivered when db commits"""
+    payloads = []
+    for row in rows:
+        payload = encode_event({key: row[key] for key in PUSHED_FIELDS})
+        if payload is not None:
+            payloads.append(payload)
+    if payloads:
+        await db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": settings.ALERT_PUSHED_CHANNEL, "payloads": payloads}
+        )
+
+
+def decode_pushed_result(event: Dict[str, Any]) -> Dict[str, Any]:
+    """A relayed pushed result as a row for the alert rule engine"""
+    event["id"] = UUID(event["id"])
+    event["created_at"] = datetime.fromisoformat(event["created_at"])
+    # The stored extra_data is left alone; rule keys are merged into it
+    event["extra_data"] = None
+    return event
+
+
+def publish_live_event(event: Dict[str, Any]):
+    if event["type"] == INVALIDATE_EVENT:
+        api_key_cache.invalidate_installation(event["installation_id"])
+        return
+    metrics.live_relay_events_total.labels("received").inc()
+    broadcaster.publish(event)
+
+
+class LiveNotifier:
+    """Sends events produced in this process to every listening process"""
+
+    def __init__(self):
+        self.channel = settings.LIVE_RELAY_CHANNEL
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LIVE_RELAY_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, events: List[Dict[str, Any]]):
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                metrics.live_relay_events_total.labels("dropped").inc()
+
+    def start(self):
+        if self._task is None:
+            broadcaster.set_sink(self.offer)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop relaying; events still queued are sent first"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        broadcaster.set_sink(None)
+        if not self.queue.empty():
+            try:
+                await self.send(self._drain())
+            except Exception as e:
+                logger.warning(f"Failed to relay remaining live events: {str(e)}")
+
+    async def _run(self):
+        while True:
+            events = [await self.queue.get()]
+            events.extend(self._drain())
+            try:
+                await self.send(events)
+            except Exception as e:
+                metrics.live_relay_events_total.labels("dropped").inc(len(events))
+                logger.warning(f"Failed to relay live events: {str(e)}")
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return events
+
+    async def send(self, events: List[Dict[str, Any]]):
+        """Notify a batch of events in one statement and transaction"""
+        payloads = []
+        for event in events:
+            payload = encode_event(event)
+            if payload is None:
+                metrics.live_relay_events_total.labels("dropped").inc()
+                continue
+            payloads.append(payload)
+        if not payloads:
+            return
+        async with async_engine.connect() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                {"channel": self.channel, "payloads": payloads}
+            )
+            await conn.commit()
+        metrics.live_relay_events_total.labels("sent").inc(len(payloads))
+
+
+class LiveListener:
+    """Hands events relayed on a channel to ``on_event``; by default publishes them to this process' subscribers"""
+
+    def __init__(self, channel: Optional[str] = None, on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.channel = channel or settings.LIVE_RELAY_CHANNEL
+        self.on_event = on_event or publish_live_event
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live relay listener disconnected: {str(e)}")
+            await asyncio.sleep(settings.LIVE_RELAY_RECONNECT_DELAY)
+
+    async def listen(self):
+        """Hold one connection in LISTEN mode until it breaks"""
+        async with async_engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+            await driver.add_listener(self.channel, self._on_notify)
+            logger.info(f"Listening for relayed events on {self.channel}")
+            try:
+                while not driver.is_closed():
+                    await asyncio.sleep(settings.LIVE_KEEPALIVE_INTERVAL)
+                    # Surfaces a dead connection instead of listening on it forever
+                    await driver.execute("SELECT 1")
+            finally:
+                # A connection still registered as a listener must not go back to the pool
+                await conn.invalidate()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.on_event(decode_event(payload))
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring malformed event on {self.channel}: {str(e)}")
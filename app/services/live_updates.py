@@ -0,0 +1,150 @@
+"""
+In-process fan-out of status transitions and alerts to live subscribers.
+
+The ResultWriter publishes each committed batch once; the broadcaster turns
+it into events (alert level transitions and alert triggered/resolved) and
+hands them to every matching subscriber queue without awaiting. A
+subscriber whose queue is full misses events instead of slowing the writer
+or other subscribers; it is told how many were dropped with its next event.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broadcaster: "Broadcaster", client_id: Optional[UUID], installation_id: Optional[UUID]):
+        self.broadcaster = broadcaster
+        self.client_id = client_id
+        self.installation_id = installation_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LIVE_SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            metrics.live_events_dropped_total.inc()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None when nothing arrived within ``timeout`` seconds"""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if self.dropped:
+            event = {**event, "dropped": self.dropped}
+            self.dropped = 0
+        return event
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    def __init__(self):
+        self._all: Set[Subscription] = set()
+        self._by_client: Dict[UUID, Set[Subscription]] = {}
+        self._by_installation: Dict[UUID, Set[Subscription]] = {}
+        self._installation_clients: Dict[UUID, UUID] = {}
+        self._levels: Dict[Tuple[UUID, UUID], str] = {}
+        self._sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+
+    def subscribe(self, client_id: Optional[UUID] = None, installation_id: Optional[UUID] = None) -> Subscription:
+        subscription = Subscription(self, client_id, installation_id)
+        if installation_id is not None:
+            self._by_installation.setdefault(installation_id, set()).add(subscription)
+        elif client_id is not None:
+            self._by_client.setdefault(client_id, set()).add(subscription)
+        else:
+            self._all.add(subscription)
+        metrics.live_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription.installation_id is not None:
+            group = self._by_installation.get(subscription.installation_id, set())
+        elif subscription.client_id is not None:
+            group = self._by_client.get(subscription.client_id, set())
+        else:
+            group = self._all
+        if subscription in group:
+            group.discard(subscription)
+            metrics.live_subscribers.dec()
+
+    def set_installation_clients(self, mapping: Dict[UUID, UUID]):
+        """installation_id -> client_id, used to route events to client subscribers"""
+        self._installation_clients = mapping
+
+    def set_sink(self, sink: Optional[Callable[[List[Dict[str, Any]]], None]]):
+        """Send events from publish_results to ``sink`` (another process) instead of local subscribers"""
+        self._sink = sink
+
+    def publish(self, event: Dict[str, Any]):
+        installation_id = event["installation_id"]
+        client_id = event.get("client_id")
+        subscribers = list(self._all)
+        subscribers.extend(self._by_installation.get(installation_id, ()))
+        if client_id is not None:
+            subscribers.extend(self._by_client.get(client_id, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
+        metrics.live_events_total.inc()
+
+    def publish_results(self, rows: Iterable[Dict[str, Any]], clients: Optional[Dict[UUID, UUID]] = None):
+        """Publish the status transitions and alerts contained in written rows
+
+        ``clients`` maps installation_id -> client_id for rows of targets this
+        process does not schedule (pushed results).
+        """
+        events = self.events_from(rows, clients)
+        if self._sink is not None:
+            if events:
+                self._sink(events)
+            return
+        for event in events:
+            self.publish(event)
+
+    def events_from(self, rows: Iterable[Dict[str, Any]], clients: Optional[Dict[UUID, UUID]] = None) -> List[Dict[str, Any]]:
+        events = []
+        for row in rows:
+            key = (row["installation_id"], row["endpoint_id"])
+            previous = self._levels.get(key)
+            self._levels[key] = row["alert_level"]
+            alert_event = (row["extra_data"] or {}).get("alert_event")
+            # The first result of a target only seeds its level
+            if alert_event is None and (previous is None or previous == row["alert_level"]):
+                continue
+            client_id = (clients or self._installation_clients).get(row["installation_id"])
+            events.append({
+                "type": "alert" if alert_event is not None else "status",
+                "alert_event": alert_event,
+                "client_id": client_id,
+                "installation_id": row["installation_id"],
+                "endpoint_id": row["endpoint_id"],
+                "alert_level": row["alert_level"],
+                "previous_level": previous,
+                "alert_triggered": row["alert_triggered"],
+                "status_code": row["status_code"],
+                "response_time_ms": row["response_time_ms"],
+                "error_message": row["error_message"],
+                "created_at": row["created_at"],
+            })
+        return events
+
+    def forget(self, keys: Iterable[Tuple[UUID, UUID]]):
+        """Drop remembered levels of targets that are no longer active"""
+        keep = set(keys)
+        for key in list(self._levels):
+            if key not in keep:
+                del self._levels[key]
+
+
+broadcaster = Broadcaster()
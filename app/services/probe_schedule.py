@@ -0,0 +1,95 @@
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+
+class ScheduleEntry:
+    __slots__ = ("interval", "next_due", "in_flight")
+
+    def __init__(self, interval: float, next_due: float):
+        self.interval = interval
+        self.next_due = next_due
+        self.in_flight = False
+
+
+class ProbeSchedule:
+    """
+    Adaptive per-target probe intervals.
+
+    Every healthy result stretches the target's interval by
+    PROBE_BACKOFF_FACTOR up to its maximum; any non-ok result (threshold
+    breach or failure) snaps it back to its minimum. Bounds come from the
+    endpoint (min/max_probe_interval_s) or the PROBE_MIN/MAX_INTERVAL
+    defaults. With PROBE_ADAPTIVE disabled every target keeps
+    HEALTH_CHECK_INTERVAL.
+    """
+
+    def __init__(self, adaptive: Optional[bool] = None, backoff: Optional[float] = None, jitter: float = 0.1):
+        self.adaptive = settings.PROBE_ADAPTIVE if adaptive is None else adaptive
+        self.backoff = backoff or settings.PROBE_BACKOFF_FACTOR
+        self.jitter = jitter
+        self._entries: Dict[Tuple[UUID, UUID], ScheduleEntry] = {}
+
+    def bounds(self, target) -> Tuple[float, float]:
+        if not self.adaptive:
+            return settings.HEALTH_CHECK_INTERVAL, settings.HEALTH_CHECK_INTERVAL
+        low = target.min_interval or settings.PROBE_MIN_INTERVAL
+        high = target.max_interval or settings.PROBE_MAX_INTERVAL
+        return low, max(low, high)
+
+    def due(self, targets: Iterable, now: float) -> List:
+        """Targets whose next probe is due; they stay reserved until recorded"""
+        due = []
+        for target in targets:
+            entry = self._entries.get(target.key)
+            if entry is None:
+                low, high = self.bounds(target)
+                entry = ScheduleEntry(min(max(settings.HEALTH_CHECK_INTERVAL, low), high), now)
+                self._entries[target.key] = entry
+            if not entry.in_flight and entry.next_due <= now:
+                entry.in_flight = True
+                due.append(target)
+        return due
+
+    def upcoming(self, targets: Iterable, now: float, horizon: float) -> List:
+        """Targets not due yet whose next probe falls within ``horizon`` seconds"""
+        upcoming = []
+        for target in targets:
+            entry = self._entries.get(target.key)
+            if entry is not None and not entry.in_flight and now < entry.next_due <= now + horizon:
+                upcoming.append(target)
+        return upcoming
+
+    def record(self, target, alert_level: str, now: float):
+        """Adjust the target's interval from the outcome of its last probe"""
+        entry = self._entries.get(target.key)
+        if entry is None:
+            return
+        low, high = self.bounds(target)
+        if alert_level == "ok":
+            entry.interval = min(max(entry.interval * self.backoff, low), high)
+        else:
+            entry.interval = low
+        entry.in_flight = False
+        # Jitter keeps targets that backed off together from firing together
+        entry.next_due = now + entry.interval * random.uniform(1 - self.jitter, 1)
+
+    def release(self, target):
+        """Give a reserved target back without changing its interval"""
+        entry = self._entries.get(target.key)
+        if entry is not None:
+            entry.in_flight = False
+
+    def retain(self, keys: Iterable[Tuple[UUID, UUID]]):
+        """Forget targets that are no longer active"""
+        keep = set(keys)
+        for key in list(self._entries):
+            if key not in keep:
+                del self._entries[key]
+
+    def mean_interval(self) -> float:
+        if not self._entries:
+            return 0.0
+        return sum(e.interval for e in self._entries.values()) / len(self._entries)
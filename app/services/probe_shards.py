@@ -0,0 +1,188 @@
+"""
+Lease-based sharding of probe targets across scheduler nodes.
+
+Targets hash into PROBE_SHARD_SLOTS fixed slots. Every node renews its row in
+probe_nodes every PROBE_SHARD_RENEW_INTERVAL seconds and places the live
+nodes on a consistent hash ring (PROBE_SHARD_VNODES points each), which
+tells it the slots it should own; adding or removing a node only moves the
+slots next to its points.
+
+Desired slots are not probed until they are claimed in probe_slots: a claim
+succeeds only when the slot is free, expired or already ours, so two nodes
+never hold the same slot. A slot a node no longer wants is drained first:
+it is not probed any more but its lease is kept for at least
+HEALTH_CHECK_TIMEOUT x PROBE_MAX_OVERLAPPING_TICKS seconds, so probes
+already in flight finish before the new owner can claim it. A node
+that cannot renew stops probing once its leases may have expired, and the
+slots of a dead node become claimable after PROBE_SHARD_LEASE_TTL seconds.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import ProbeNode, ProbeSlot
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+@lru_cache(maxsize=65536)
+def slot_of(key: Tuple[UUID, UUID], slots: int) -> int:
+    """Slot of an (installation_id, endpoint_id) pair"""
+    installation_id, endpoint_id = key
+    return _hash(f"{installation_id}:{endpoint_id}") % slots
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str], vnodes: int):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """First node clockwise from the key's point"""
+        if not self._nodes:
+            return None
+        return self._nodes[bisect.bisect(self._hashes, _hash(key)) % len(self._nodes)]
+
+
+class ShardCoordinator:
+    def __init__(self, node_id: Optional[str] = None):
+        self.hostname = socket.gethostname()
+        self.node_id = node_id or f"{self.hostname}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.slots = settings.PROBE_SHARD_SLOTS
+        self.vnodes = settings.PROBE_SHARD_VNODES
+        self.interval = settings.PROBE_SHARD_RENEW_INTERVAL
+        self.ttl = max(settings.PROBE_SHARD_LEASE_TTL, 2 * self.interval)
+        # Longest a probe started before the handover can still be running
+        self.drain_time = settings.HEALTH_CHECK_TIMEOUT * settings.PROBE_MAX_OVERLAPPING_TICKS
+        self._owned: FrozenSet[int] = frozenset()
+        self._draining: Dict[int, float] = {}  # slot -> when it stopped being probed
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def owned(self) -> FrozenSet[int]:
+        """Slots this node may probe right now"""
+        if time.monotonic() >= self._valid_until:
+            return frozenset()
+        return self._owned
+
+    def select(self, targets: Iterable, owned: Optional[FrozenSet[int]] = None) -> List:
+        owned = self.owned() if owned is None else owned
+        return [target for target in targets if slot_of(target.key, self.slots) in owned]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Probe shard node {self.node_id} started")
+
+    async def stop(self):
+        """Leave the ring and hand every slot back at once"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._owned = frozenset()
+        self._draining = {}
+        self._valid_until = 0.0
+        metrics.probe_shard_slots.set(0)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(ProbeSlot).where(ProbeSlot.node_id == self.node_id)
+                    .values(node_id=None, lease_expires_at=None)
+                )
+                await db.execute(delete(ProbeNode).where(ProbeNode.id == self.node_id))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to leave the probe shard ring: {str(e)}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Probe shard heartbeat failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def heartbeat(self):
+        """Renew the node lease, then claim, renew and release slots"""
+        started = time.monotonic()
+        lease = func.now() + timedelta(seconds=self.ttl)
+        async with AsyncSessionLocal() as db:
+            statement = insert(ProbeNode).values(id=self.node_id, hostname=self.hostname, lease_expires_at=lease)
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[ProbeNode.id],
+                set_={"heartbeat_at": func.now(), "lease_expires_at": lease}
+            ))
+            nodes = (await db.execute(
+                select(ProbeNode.id).where(ProbeNode.lease_expires_at > func.now())
+            )).scalars().all()
+            ring = HashRing(nodes, self.vnodes)
+            desired = {slot for slot in range(self.slots) if ring.owner(f"slot:{slot}") == self.node_id}
+
+            # Drained long enough that nothing of ours can still be probing them
+            release = {
+                slot for slot, since in self._draining.items()
+                if slot not in desired and started - since >= self.drain_time
+            }
+            if release:
+                await db.execute(
+                    update(ProbeSlot)
+                    .where(ProbeSlot.node_id == self.node_id, ProbeSlot.slot.in_(release))
+                    .values(node_id=None, lease_expires_at=None)
+                )
+
+            claim = desired | (self._owned - desired) | (set(self._draining) - release)
+            held: Set[int] = set()
+            if claim:
+                statement = insert(ProbeSlot).values([
+                    {"slot": slot, "node_id": self.node_id, "lease_expires_at": lease} for slot in sorted(claim)
+                ])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[ProbeSlot.slot],
+                    set_={"node_id": statement.excluded.node_id, "lease_expires_at": statement.excluded.lease_expires_at},
+                    where=or_(
+                        ProbeSlot.node_id == self.node_id,
+                        ProbeSlot.node_id.is_(None),
+                        ProbeSlot.lease_expires_at < func.now(),
+                    )
+                ).returning(ProbeSlot.slot)
+                held = set((await db.execute(statement)).scalars().all())
+
+            await db.execute(
+                delete(ProbeNode).where(ProbeNode.lease_expires_at < func.now() - timedelta(seconds=10 * self.ttl))
+            )
+            await db.commit()
+
+        owned = frozenset(held & desired)
+        if owned != self._owned:
+            logger.info(f"Probe shard node {self.node_id} owns {len(owned)} of {self.slots} slots ({len(nodes)} nodes)")
+        self._owned = owned
+        # Timed from here: ticks probed these slots until _owned dropped them above
+        now = time.monotonic()
+        self._draining = {slot: self._draining.get(slot, now) for slot in held - desired}
+        # Stop probing a round before the leases written above can expire
+        self._valid_until = started + self.ttl - self.interval
+        metrics.probe_shard_slots.set(len(owned))
+        metrics.probe_shard_nodes.set(len(nodes))
@@ -0,0 +1,182 @@
+"""
+Probe transport with a shared DNS cache and TCP pre-warming.
+
+httpx/httpcore resolve the target host on every new connection. Probe
+targets sit behind slow resolvers, so PrewarmingBackend resolves through
+DNSCache instead and can open TCP connections ahead of the scheduled probes.
+TLS still runs against the original hostname (SNI and certificate checks
+are done by httpcore on top of the stream returned here).
+"""
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DNSCache:
+    """
+    Async getaddrinfo cache shared by every probe.
+
+    getaddrinfo does not expose record TTLs, so entries live DNS_CACHE_TTL
+    seconds (keep it at or below the TTL of the monitored records). Failed
+    lookups are cached for DNS_NEGATIVE_TTL seconds, and concurrent lookups
+    of the same host share a single resolver call.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, negative_ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else settings.DNS_CACHE_TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else settings.DNS_NEGATIVE_TTL
+        self._entries: Dict[str, Tuple[float, Optional[List[str]], Optional[Exception]]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def resolve(self, host: str) -> Tuple[List[str], float]:
+        """Return (addresses, seconds spent resolving); 0 seconds on a cache hit"""
+        if _is_ip(host):
+            return [host], 0.0
+
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            metrics.dns_cache_lookups_total.labels("hit").inc()
+            if entry[2] is not None:
+                raise entry[2]
+            return entry[1], 0.0
+
+        pending = self._pending.get(host)
+        if pending is not None:
+            metrics.dns_cache_lookups_total.labels("hit").inc()
+            return await asyncio.shield(pending), 0.0
+
+        metrics.dns_cache_lookups_total.labels("miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[host] = future
+        start = time.perf_counter()
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            self._entries[host] = (time.monotonic() + self.ttl, addresses, None)
+            future.set_result(addresses)
+        except OSError as e:
+            error = httpcore.ConnectError(f"DNS resolution failed for {host}: {e}")
+            self._entries[host] = (time.monotonic() + self.negative_ttl, None, error)
+            future.set_exception(error)
+            # Mark retrieved so waiters-less failures do not warn at GC time
+            future.exception()
+            raise error
+        finally:
+            del self._pending[host]
+
+        elapsed = time.perf_counter() - start
+        metrics.probe_dns_seconds.observe(elapsed)
+        return addresses, elapsed
+
+    def invalidate(self, host: str):
+        self._entries.pop(host, None)
+
+
+class PrewarmingBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend resolving through DNSCache and handing out pre-opened sockets"""
+
+    def __init__(self, dns: DNSCache, inner: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.dns = dns
+        self.inner = inner or httpcore.AnyIOBackend()
+        self._warm: Dict[Tuple[str, int], List[Tuple[float, httpcore.AsyncNetworkStream]]] = {}
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        stream = self._take_warm(host, port)
+        if stream is not None:
+            return stream
+        return await self._connect(host, port, timeout, local_address, socket_options)
+
+    async def _connect(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses, _ = await self.dns.resolve(host)
+        last_error = None
+        for address in addresses:
+            try:
+                return await self.inner.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        self.dns.invalidate(host)
+        raise last_error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.inner.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds):
+        await self.inner.sleep(seconds)
+
+    def _take_warm(self, host: str, port: int) -> Optional[httpcore.AsyncNetworkStream]:
+        streams = self._warm.get((host, port))
+        now = time.monotonic()
+        while streams:
+            opened_at, stream = streams.pop()
+            if now - opened_at <= settings.PROBE_PREWARM_MAX_AGE and not stream.get_extra_info("is_readable"):
+                metrics.prewarmed_connections_total.labels("used").inc()
+                return stream
+            metrics.prewarmed_connections_total.labels("expired").inc()
+            asyncio.get_running_loop().create_task(stream.aclose())
+        return None
+
+    async def prewarm(self, host: str, port: int, count: int, timeout: float):
+        """Open up to ``count`` idle TCP connections to host:port for upcoming probes"""
+        streams = self._warm.setdefault((host, port), [])
+        missing = count - len(streams)
+        for _ in range(max(0, missing)):
+            try:
+                stream = await self._connect(host, port, timeout)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout, OSError) as e:
+                logger.debug(f"Pre-warm of {host}:{port} failed: {e}")
+                return
+            streams.append((time.monotonic(), stream))
+
+    async def expire(self):
+        """Close pre-opened sockets that were never used"""
+        now = time.monotonic()
+        for key, streams in list(self._warm.items()):
+            keep = []
+            for opened_at, stream in streams:
+                if now - opened_at <= settings.PROBE_PREWARM_MAX_AGE:
+                    keep.append((opened_at, stream))
+                else:
+                    metrics.prewarmed_connections_total.labels("expired").inc()
+                    await stream.aclose()
+            if keep:
+                self._warm[key] = keep
+            else:
+                del self._warm[key]
+
+    async def aclose(self):
+        for streams in self._warm.values():
+            for _, stream in streams:
+                await stream.aclose()
+        self._warm = {}
+
+
+class ProbeTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connection pool uses PrewarmingBackend"""
+
+    def __init__(self, backend: PrewarmingBackend, limits: httpx.Limits, verify: bool = True):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=backend,
+        )
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.fast_json import dumps
+from app.models import MonitoringLog, AlertOutbox
+from app.services.live_updates import broadcaster
+from app.services.incidents import track_incidents
+
+logger = logging.getLogger(__name__)
+
+# Result rows may carry an alert_outbox row under this key; it is inserted in
+# the same transaction as the monitoring log batch
+OUTBOX_KEY = "_outbox"
+
+# Rule keys are merged into whatever extra_data the client pushed
+_UPDATE_VERDICT = text(
+    "UPDATE monitoring_logs SET alert_triggered = :alert_triggered, "
+    "extra_data = (coalesce(extra_data::jsonb, '{}'::jsonb) || CAST(:rule_data AS jsonb))::json "
+    "WHERE id = :id"
+)
+
+
+class ResultWriter:
+    """
+    Buffers probe results and writes them to monitoring_logs in batches.
+
+    Probes only enqueue rows, so a slow database never stalls the probe loop;
+    a single background task drains the queue and issues one multi-row
+    INSERT per batch (plus one for the alert outbox entries of the batch, and
+    the incident updates of the batch).
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.batch_size = batch_size or settings.PROBE_WRITER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.PROBE_WRITER_FLUSH_INTERVAL
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or settings.PROBE_WRITER_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+
+    async def put(self, result: Dict[str, Any]):
+        """Enqueue one result; waits when the queue is full (backpressure)"""
+        await self.queue.put(result)
+        metrics.writer_queue_depth.set(self.queue.qsize())
+
+    async def put_many(self, results: List[Dict[str, Any]]):
+        for result in results:
+            await self.put(result)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the drain loop and flush whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        remaining = self._drain(self.queue.qsize())
+        while remaining:
+            await self.write_batch(remaining[:self.batch_size])
+            remaining = remaining[self.batch_size:]
+
+    async def _run(self):
+        while True:
+            first = await self.queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                timeout = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            metrics.writer_queue_depth.set(self.queue.qsize())
+            try:
+                await self.write_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} monitoring logs: {str(e)}")
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
+
+    async def write_batch(self, batch: List[Dict[str, Any]]):
+        """Insert one batch of monitoring logs in a single transaction"""
+        if not batch:
+            return
+        start = time.perf_counter()
+        outbox = [row.pop(OUTBOX_KEY) for row in batch if OUTBOX_KEY in row]
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(MonitoringLog), batch)
+            if settings.INCIDENTS_ENABLED:
+                await track_incidents(db, batch)
+            if outbox:
+                await db.execute(insert(AlertOutbox), outbox)
+            await db.commit()
+        metrics.writer_batch_duration_seconds.observe(time.perf_counter() - start)
+        metrics.writer_rows_total.inc(len(batch))
+        if outbox:
+            metrics.alert_outbox_entries_total.inc(len(outbox))
+        if settings.LIVE_UPDATES_ENABLED:
+            broadcaster.publish_results(batch)
+
+    async def write_verdicts(self, rows: List[Dict[str, Any]]):
+        """Store the rule verdicts of pushed results the API already wrote, with their outbox entries"""
+        outbox = [row.pop(OUTBOX_KEY) for row in rows if OUTBOX_KEY in row]
+        async with AsyncSessionLocal() as db:
+            await db.execute(_UPDATE_VERDICT, [
+                {"id": row["id"], "alert_triggered": row["alert_triggered"], "rule_data": dumps(row["extra_data"] or {}).decode()}
+                for row in rows
+            ])
+            if outbox:
+                await db.execute(insert(AlertOutbox), outbox)
+            await db.commit()
+        if outbox:
+            metrics.alert_outbox_entries_total.inc(len(outbox))
+        if settings.LIVE_UPDATES_ENABLED:
+            # Status changes were published by the API; only alert transitions are new
+            broadcaster.publish_results([row for row in rows if "alert_event" in (row["extra_data"] or {})])
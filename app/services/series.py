@@ -0,0 +1,139 @@
+"""
+Time-bucketed latency series for charts.
+
+Logs are aggregated per (installation, endpoint, bucket) in SQL, so a week of
+30-second probes comes back as a few hundred rows instead of 20k. Heartbeat
+rows of change-only storage are already aggregates of ``count`` probes and
+are weighted accordingly (their min_ms / max_ms feed the bucket extremes).
+Buckets are aligned to the Unix epoch, so the same range always yields the
+same buckets.
+
+When ``points`` is given, series with more buckets are reduced with
+Largest-Triangle-Three-Buckets on the mean latency, which keeps peaks and
+dips that plain averaging over wider buckets would flatten. Buckets without
+a latency (every probe failed) are kept as they are.
+"""
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select, func, case, literal_column, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import MonitoringLog
+from app.services.alert_rules import FAILED_LEVELS
+from app.services.change_storage import heartbeat_value
+
+# Bucket widths picked automatically, in seconds
+NICE_BUCKETS = (10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400)
+
+
+def pick_bucket(start: datetime, end: datetime, max_buckets: int) -> int:
+    """Smallest nice bucket width giving at most ``max_buckets`` buckets"""
+    span = (end - start).total_seconds()
+    for seconds in NICE_BUCKETS:
+        if span / seconds <= max_buckets:
+            return seconds
+    return int(math.ceil(span / max_buckets / 86400)) * 86400
+
+
+def series_query(
+    endpoint_ids: Sequence[UUID],
+    start: datetime,
+    end: datetime,
+    bucket: int,
+    installation_id: Optional[UUID] = None
+):
+    samples = heartbeat_value("count", 1)
+    timed = case((MonitoringLog.response_time_ms.is_not(None), samples), else_=0)
+    # Inlined (bucket is an int) so GROUP BY matches the selected expression exactly
+    width = literal_column(str(int(bucket)))
+    bucket_start = func.to_timestamp(
+        func.floor(func.extract("epoch", MonitoringLog.created_at) / width) * width
+    ).label("t")
+
+    query = select(
+        MonitoringLog.installation_id,
+        MonitoringLog.endpoint_id,
+        bucket_start,
+        func.sum(samples).label("count"),
+        func.sum(case((MonitoringLog.alert_level.in_(FAILED_LEVELS), samples), else_=0)).label("failures"),
+        (func.sum(MonitoringLog.response_time_ms * samples).cast(Float) / func.nullif(func.sum(timed), 0)).label("avg_ms"),
+        func.min(heartbeat_value("min_ms", MonitoringLog.response_time_ms)).label("min_ms"),
+        func.max(heartbeat_value("max_ms", MonitoringLog.response_time_ms)).label("max_ms"),
+    ).where(
+        MonitoringLog.endpoint_id.in_(endpoint_ids),
+        MonitoringLog.created_at >= start,
+        MonitoringLog.created_at < end,
+    )
+    if installation_id is not None:
+        query = query.where(MonitoringLog.installation_id == installation_id)
+    return query.group_by(
+        MonitoringLog.installation_id, MonitoringLog.endpoint_id, bucket_start
+    ).order_by(
+        MonitoringLog.installation_id, MonitoringLog.endpoint_id, bucket_start
+    )
+
+
+async def load_series(
+    db: AsyncSession,
+    endpoint_ids: Sequence[UUID],
+    start: datetime,
+    end: datetime,
+    bucket: int,
+    installation_id: Optional[UUID] = None
+) -> List[Dict[str, Any]]:
+    query = series_query(endpoint_ids, start, end, bucket, installation_id)
+
+    series: Dict[tuple, Dict[str, Any]] = {}
+    for row in (await db.execute(query)).all():
+        key = (row.installation_id, row.endpoint_id)
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {"installation_id": row.installation_id, "endpoint_id": row.endpoint_id, "points": []}
+        entry["points"].append({
+            "t": row.t,
+            "count": int(row.count),
+            "failures": int(row.failures),
+            "avg_ms": round(row.avg_ms, 1) if row.avg_ms is not None else None,
+            "min_ms": row.min_ms,
+            "max_ms": row.max_ms,
+        })
+    return list(series.values())
+
+
+def lttb(points: List[Dict[str, Any]], threshold: int, value: str = "avg_ms") -> List[Dict[str, Any]]:
+    """Largest-Triangle-Three-Buckets selection of ``threshold`` points
+
+    Only points with a value are downsampled. Points without one (buckets
+    where every probe failed) are outages and are always kept.
+    """
+    data = [point for point in points if point[value] is not None]
+    if threshold >= len(data) or threshold < 3:
+        return points
+
+    xs = [point["t"].timestamp() for point in data]
+    ys = [point[value] for point in data]
+    sampled = [data[0]]
+    every = (len(data) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(data))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(data[best])
+        a = best
+    sampled.append(data[-1])
+    if len(data) < len(points):
+        sampled.extend(point for point in points if point[value] is None)
+        sampled.sort(key=lambda point: point["t"])
+    return sampled
@@ -0,0 +1,306 @@
+"""
+Uptime / SLA figures per installation and endpoint.
+
+Each stored result holds its state until the next result of the same target,
+for at most SLA_MAX_GAP seconds (longer silences are not counted as observed
+time). Downtime is the time held by failed results, availability the share of
+observed time that was not downtime. Heartbeat rows of change-only storage
+count for every probe they fold.
+
+Closed UTC days (ended more than SLA_CLOSE_DELAY seconds ago) are computed
+once for all targets by the scheduler's SLA refresh job and cached in
+sla_daily, with sla_days marking the days that are complete. A window reads
+the cached days and only scans the raw logs of its own targets for its
+partial edges, the days still open and the days not cached yet. Results
+pushed with a created_at on a closed day mark that target-day in sla_stale;
+reads compute stale target-days from the logs until the refresh job has
+recomputed them.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, delete, func, case, cast, literal_column, exists, tuple_, Date, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import MonitoringLog, SlaDaily, SlaDay, SlaStale
+from app.services.alert_rules import FAILED_LEVELS
+from app.services.change_storage import heartbeat_value
+
+TargetKey = Tuple[UUID, UUID]
+
+_FIELDS = ("probes", "failures", "observed_seconds", "downtime_seconds")
+
+# Stale target-days recomputed per transaction
+STALE_BATCH_SIZE = 1000
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def closed_before(now: datetime) -> date:
+    """First day that is not closed yet"""
+    return (now - timedelta(seconds=settings.SLA_CLOSE_DELAY)).date()
+
+
+def _filters(installation_ids: Optional[Sequence[UUID]], endpoint_id: Optional[UUID]):
+    conditions = []
+    if installation_ids is not None:
+        conditions.append(MonitoringLog.installation_id.in_(installation_ids))
+    if endpoint_id is not None:
+        conditions.append(MonitoringLog.endpoint_id == endpoint_id)
+    return conditions
+
+
+def _aggregate_query(start: datetime, end: datetime, until: datetime, conditions: list):
+    """Per target and UTC day totals of the logs in [start, end)"""
+    samples = heartbeat_value("count", 1)
+    # Rows up to SLA_MAX_GAP past the end are read only so the last row in range sees its successor
+    logs = select(
+        MonitoringLog.installation_id,
+        MonitoringLog.endpoint_id,
+        MonitoringLog.created_at,
+        samples.label("samples"),
+        MonitoringLog.alert_level.in_(FAILED_LEVELS).label("failed"),
+        func.lead(MonitoringLog.created_at).over(
+            partition_by=(MonitoringLog.installation_id, MonitoringLog.endpoint_id),
+            order_by=MonitoringLog.created_at
+        ).label("next_at"),
+    ).where(
+        MonitoringLog.created_at >= start,
+        MonitoringLog.created_at < min(end + timedelta(seconds=settings.SLA_MAX_GAP), until),
+        *conditions
+    ).subquery()
+
+    held = func.least(
+        func.extract("epoch", func.coalesce(logs.c.next_at, until) - logs.c.created_at),
+        settings.SLA_MAX_GAP
+    ).cast(Float)
+    # A result held across midnight counts for the day it was taken; the zone is
+    # inlined so GROUP BY matches the selected expression exactly
+    day = cast(func.timezone(literal_column("'UTC'"), logs.c.created_at), Date).label("day")
+    return select(
+        logs.c.installation_id,
+        logs.c.endpoint_id,
+        day,
+        func.sum(logs.c.samples).label("probes"),
+        func.sum(case((logs.c.failed, logs.c.samples), else_=0)).label("failures"),
+        func.sum(held).label("observed_seconds"),
+        func.sum(case((logs.c.failed, held), else_=0.0)).label("downtime_seconds"),
+    ).where(
+        logs.c.created_at < end
+    ).group_by(logs.c.installation_id, logs.c.endpoint_id, day)
+
+
+def _add(totals: Dict[TargetKey, Dict[str, float]], key: TargetKey, row):
+    entry = totals.setdefault(key, dict.fromkeys(_FIELDS, 0))
+    for field in _FIELDS:
+        entry[field] += getattr(row, field) or 0
+
+
+async def _cached_days(db: AsyncSession, first: date, last: date) -> List[date]:
+    """Days in [first, last) that are cached, in order"""
+    result = await db.execute(
+        select(SlaDay.day).where(SlaDay.day >= first, SlaDay.day < last).order_by(SlaDay.day)
+    )
+    return list(result.scalars().all())
+
+
+def _runs(days: List[date]) -> Iterable[Tuple[date, date]]:
+    """Consecutive days as [first, last) ranges"""
+    first = previous = None
+    for day in days:
+        if first is not None and day != previous + timedelta(days=1):
+            yield first, previous + timedelta(days=1)
+            first = None
+        if first is None:
+            first = day
+        previous = day
+    if first is not None:
+        yield first, previous + timedelta(days=1)
+
+
+async def _store(db: AsyncSession, rows):
+    if rows:
+        stmt = pg_insert(SlaDaily).values([dict(row._mapping) for row in rows])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[SlaDaily.installation_id, SlaDaily.endpoint_id, SlaDaily.day],
+            set_={field: stmt.excluded[field] for field in _FIELDS}
+        ))
+
+
+async def fill_days(db: AsyncSession, first: date, last: date, now: datetime) -> int:
+    """Compute and cache the closed days in [first, last) that are missing, one day per transaction; returns how many"""
+    cached = set(await _cached_days(db, first, last))
+    missing = [first + timedelta(days=i) for i in range((last - first).days) if first + timedelta(days=i) not in cached]
+    for day in missing:
+        rows = (await db.execute(_aggregate_query(_day_start(day), _day_start(day + timedelta(days=1)), now, []))).all()
+        await _store(db, rows)
+        await db.execute(pg_insert(SlaDay).values(day=day).on_conflict_do_nothing(index_elements=[SlaDay.day]))
+        await db.commit()
+    return len(missing)
+
+
+async def mark_stale(db: AsyncSession, rows: Iterable[Dict[str, Any]], now: datetime):
+    """Mark the closed target-days that late results change (caller commits)"""
+    closed = closed_before(now)
+    stale = set()
+    for row in rows:
+        created_at = row["created_at"].astimezone(timezone.utc)
+        # The day before is changed too when its last result is now held until this one
+        for day in {created_at.date(), (created_at - timedelta(seconds=settings.SLA_MAX_GAP)).date()}:
+            if day < closed:
+                stale.add((row["installation_id"], row["endpoint_id"], day))
+    if stale:
+        # Sorted, so concurrent batches lock the same rows in the same order
+        await db.execute(pg_insert(SlaStale).values([
+            {"installation_id": installation_id, "endpoint_id": endpoint_id, "day": day}
+            for installation_id, endpoint_id, day in sorted(stale)
+        ]).on_conflict_do_nothing())
+
+
+async def refresh_stale(db: AsyncSession, now: datetime, limit: int = STALE_BATCH_SIZE) -> int:
+    """Recompute up to ``limit`` stale target-days; returns how many"""
+    claimed = select(SlaStale.installation_id, SlaStale.endpoint_id, SlaStale.day).limit(limit).with_for_update(skip_locked=True)
+    # Deleted before recomputing: a result committed meanwhile marks its target-day again
+    rows = (await db.execute(
+        delete(SlaStale)
+        .where(tuple_(SlaStale.installation_id, SlaStale.endpoint_id, SlaStale.day).in_(claimed))
+        .returning(SlaStale.installation_id, SlaStale.endpoint_id, SlaStale.day)
+    )).all()
+    by_day: Dict[date, List[TargetKey]] = {}
+    for row in rows:
+        by_day.setdefault(row.day, []).append((row.installation_id, row.endpoint_id))
+    for day, keys in by_day.items():
+        conditions = [tuple_(MonitoringLog.installation_id, MonitoringLog.endpoint_id).in_(keys)]
+        await _store(db, (await db.execute(
+            _aggregate_query(_day_start(day), _day_start(day + timedelta(days=1)), now, conditions)
+        )).all())
+    await db.commit()
+    return len(rows)
+
+
+async def refresh_cache(db: AsyncSession, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Cache the closed days of the last SLA_BACKFILL_DAYS and recompute stale target-days
+
+    Returns (days filled, target-days recomputed).
+    """
+    now = now or datetime.now(timezone.utc)
+    last = closed_before(now)
+    filled = await fill_days(db, last - timedelta(days=settings.SLA_BACKFILL_DAYS), last, now)
+    recomputed = 0
+    while True:
+        count = await refresh_stale(db, now)
+        recomputed += count
+        if count < STALE_BATCH_SIZE:
+            return filled, recomputed
+
+
+async def load_totals(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    installation_ids: Optional[Sequence[UUID]] = None,
+    endpoint_id: Optional[UUID] = None,
+    now: Optional[datetime] = None
+) -> Dict[TargetKey, Dict[str, float]]:
+    """Probe and time totals per target over [start, end)"""
+    now = now or datetime.now(timezone.utc)
+    end = min(end, now)
+    conditions = _filters(installation_ids, endpoint_id)
+
+    # Whole closed days inside the window come from the cache when it has them
+    first_day = start.date() if start == _day_start(start.date()) else start.date() + timedelta(days=1)
+    last_day = min(end.date(), closed_before(now))
+    totals: Dict[TargetKey, Dict[str, float]] = {}
+    live: List[Tuple[datetime, datetime]] = [(start, end)]
+    if first_day < last_day:
+        cached = await _cached_days(db, first_day, last_day)
+        stale_query = select(SlaStale.installation_id, SlaStale.endpoint_id, SlaStale.day).where(
+            SlaStale.day >= first_day, SlaStale.day < last_day
+        )
+        query = select(
+            SlaDaily.installation_id, SlaDaily.endpoint_id,
+            *(func.sum(getattr(SlaDaily, field)).label(field) for field in _FIELDS)
+        ).where(
+            SlaDaily.day >= first_day,
+            SlaDaily.day < last_day,
+            SlaDaily.day.in_(select(SlaDay.day).where(SlaDay.day >= first_day, SlaDay.day < last_day)),
+            ~exists().where(
+                SlaStale.installation_id == SlaDaily.installation_id,
+                SlaStale.endpoint_id == SlaDaily.endpoint_id,
+                SlaStale.day == SlaDaily.day
+            )
+        )
+        if installation_ids is not None:
+            query = query.where(SlaDaily.installation_id.in_(installation_ids))
+            stale_query = stale_query.where(SlaStale.installation_id.in_(installation_ids))
+        if endpoint_id is not None:
+            query = query.where(SlaDaily.endpoint_id == endpoint_id)
+            stale_query = stale_query.where(SlaStale.endpoint_id == endpoint_id)
+        query = query.group_by(SlaDaily.installation_id, SlaDaily.endpoint_id)
+        for row in (await db.execute(query)).all():
+            _add(totals, (row.installation_id, row.endpoint_id), row)
+
+        # Stale target-days of cached days are read from the logs of those targets only
+        stale: Dict[date, List[TargetKey]] = {}
+        cached_set = set(cached)
+        for row in (await db.execute(stale_query)).all():
+            if row.day in cached_set:
+                stale.setdefault(row.day, []).append((row.installation_id, row.endpoint_id))
+        for day, keys in stale.items():
+            day_conditions = [tuple_(MonitoringLog.installation_id, MonitoringLog.endpoint_id).in_(keys)]
+            query = _aggregate_query(_day_start(day), _day_start(day + timedelta(days=1)), now, day_conditions)
+            for row in (await db.execute(query)).all():
+                _add(totals, (row.installation_id, row.endpoint_id), row)
+
+        # Everything outside the cached days: partial edges, open days and days not cached yet
+        live, previous = [], start
+        for run_first, run_last in _runs(cached):
+            live.append((previous, _day_start(run_first)))
+            previous = _day_start(run_last)
+        live.append((previous, end))
+
+    for live_start, live_end in live:
+        if live_start >= live_end:
+            continue
+        for row in (await db.execute(_aggregate_query(live_start, live_end, now, conditions))).all():
+            _add(totals, (row.installation_id, row.endpoint_id), row)
+    return totals
+
+
+def summarize(totals: Dict[str, float], objective_pct: float) -> Dict[str, Any]:
+    """Availability, downtime and error budget of one target (or several combined)"""
+    observed = totals["observed_seconds"]
+    downtime = totals["downtime_seconds"]
+    probes = int(totals["probes"])
+    failures = int(totals["failures"])
+    # The budget is a share of the observed time, so combined targets and targets
+    # added mid-window get a budget matching the time they were watched
+    budget_minutes = observed * (100 - objective_pct) / 100 / 60
+    downtime_minutes = downtime / 60
+    return {
+        "probes": probes,
+        "failures": failures,
+        "observed_minutes": round(observed / 60, 2),
+        "downtime_minutes": round(downtime_minutes, 2),
+        "availability_pct": round(100 * (observed - downtime) / observed, 4) if observed else None,
+        "success_rate_pct": round(100 * (probes - failures) / probes, 4) if probes else None,
+        "error_budget": {
+            "objective_pct": objective_pct,
+            "budget_minutes": round(budget_minutes, 2),
+            "remaining_minutes": round(budget_minutes - downtime_minutes, 2),
+            "consumed_pct": round(100 * downtime_minutes / budget_minutes, 2) if budget_minutes else None,
+        },
+    }
+
+
+def combine(entries: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    combined = dict.fromkeys(_FIELDS, 0)
+    for entry in entries:
+        for field in _FIELDS:
+            combined[field] += entry[field]
+    return combined
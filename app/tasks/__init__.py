@@ -1,4 +1,3 @@
 from .celery_app import celery_app
-from .health_check_tasks import check_all_clients_health
 
-__all__ = ["celery_app", "check_all_clients_health"]
\ No newline at end of file
+__all__ = ["celery_app"]
\ No newline at end of file
@@ -6,7 +6,7 @@ celery_app = Celery(
     "monitoring",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=['app.tasks.health_check_tasks']
+    include=[]
 )
 
 # Configure Celery
@@ -22,13 +22,8 @@ celery_app.conf.update(
     task_soft_time_limit=240,
 )
 
-# Configure periodic tasks
-celery_app.conf.beat_schedule = {
-    'check-all-clients-health': {
-        'task': 'app.tasks.health_check_tasks.check_all_clients_health',
-        'schedule': settings.HEALTH_CHECK_INTERVAL,  # Every 30 seconds by default
-    },
-}
+# No periodic tasks: probing runs only in the probe runner (python -m app.probe_runner),
+# which owns leader election, sharding, the alert rules and the outbox
 
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+"""
+REST API load benchmark against a large seeded dataset.
+
+Two steps, usually run separately:
+
+1. Seed: fills the configured PostgreSQL database (settings.DB_*) with
+   bench-prefixed clients, instances, modules, endpoints, installations and
+   monitoring logs. Rows are generated server-side with generate_series, so
+   tens of millions of logs load without streaming them through Python.
+
+       python -m benchmarks.api_load seed --clients 2000 --instances-per-client 2 --logs 20000000
+
+2. Run: replays scripted workloads against a running API and records
+   p50/p95/p99 latency, throughput, error count and the average SQL query
+   count per request (X-DB-Query-Count), then optionally compares the
+   report with a previous one.
+
+       python -m benchmarks.api_load run --base-url http://localhost:9001 --json after.json --compare before.json
+
+Query or index changes should come with a before/after pair of reports.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import text
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import sync_engine
+
+BENCH_PREFIX = "bench-"
+MODULES = 5
+ENDPOINTS_PER_MODULE = 3
+
+
+def reset(conn):
+    """Delete previously seeded benchmark data (cascades to logs)"""
+    print("Removing previous benchmark data...")
+    conn.execute(text("DELETE FROM clients WHERE name LIKE :p"), {"p": f"{BENCH_PREFIX}%"})
+    conn.execute(text("DELETE FROM modules WHERE name LIKE :p"), {"p": f"{BENCH_PREFIX}%"})
+
+
+def seed(args):
+    started = time.perf_counter()
+    with sync_engine.begin() as conn:
+        reset(conn)
+
+        print(f"Creating {args.clients} clients x {args.instances_per_client} instances...")
+        conn.execute(text("""
+            INSERT INTO clients (id, name, email, timezone, is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), :p || 'client-' || g, 'ops' || g || '@bench.local',
+                   'America/Sao_Paulo', true, now(), now()
+            FROM generate_series(1, :n) g
+        """), {"p": BENCH_PREFIX, "n": args.clients})
+        conn.execute(text("""
+            INSERT INTO instances (id, client_id, name, host, environment, is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), c.id, c.name || '-' || g, c.name || '-' || g || '.bench.local',
+                   CASE WHEN g = 1 THEN 'production' ELSE 'staging' END, true, now(), now()
+            FROM clients c CROSS JOIN generate_series(1, :k) g
+            WHERE c.name LIKE :p || '%'
+        """), {"p": BENCH_PREFIX, "k": args.instances_per_client})
+
+        print(f"Creating {MODULES} modules x {ENDPOINTS_PER_MODULE} endpoints...")
+        conn.execute(text("""
+            INSERT INTO modules (id, name, relative_path, category, is_public, created_at, updated_at)
+            SELECT gen_random_uuid(), :p || 'module-' || g, '/m' || g, 'api', true, now(), now()
+            FROM generate_series(1, :n) g
+        """), {"p": BENCH_PREFIX, "n": MODULES})
+        conn.execute(text("""
+            INSERT INTO endpoints (id, module_id, name, relative_path, method, type,
+                                   expected_response_time_ms, timeout_ms, created_at, updated_at)
+            SELECT gen_random_uuid(), m.id, 'endpoint-' || g, '/e' || g, 'GET', 'health', 500, 5000, now(), now()
+            FROM modules m CROSS JOIN generate_series(1, :n) g
+            WHERE m.name LIKE :p || '%'
+        """), {"p": BENCH_PREFIX, "n": ENDPOINTS_PER_MODULE})
+
+        print("Creating installations...")
+        conn.execute(text("""
+            INSERT INTO installations (id, module_id, instance_id, api_key, config, is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), m.id, i.id, 'inst_' || md5(random()::text), '{"enabled": true}', true, now(), now()
+            FROM instances i
+            JOIN clients c ON c.id = i.client_id
+            CROSS JOIN modules m
+            WHERE c.name LIKE :p || '%' AND m.name LIKE :p || '%'
+        """), {"p": BENCH_PREFIX})
+        conn.execute(text("""
+            UPDATE installations SET api_key_hash = encode(sha256(convert_to(api_key, 'UTF8')), 'hex')
+            WHERE api_key_hash IS NULL
+        """))
+
+        pairs = conn.execute(text("""
+            SELECT count(*) FROM installations inst
+            JOIN endpoints e ON e.module_id = inst.module_id
+            JOIN modules m ON m.id = inst.module_id
+            WHERE m.name LIKE :p || '%'
+        """), {"p": BENCH_PREFIX}).scalar()
+
+    per_pair = max(1, math.ceil(args.logs / pairs))
+    step_seconds = max(1, int(args.days * 86400 / per_pair))
+    print(f"Creating ~{pairs * per_pair:,} monitoring logs ({per_pair} per endpoint, every {step_seconds}s)...")
+
+    # One transaction per chunk of installations keeps WAL and lock time bounded
+    with sync_engine.connect() as conn:
+        installation_ids = conn.execute(text("""
+            SELECT inst.id FROM installations inst
+            JOIN modules m ON m.id = inst.module_id
+            WHERE m.name LIKE :p || '%'
+            ORDER BY inst.id
+        """), {"p": BENCH_PREFIX}).scalars().all()
+
+    for start in range(0, len(installation_ids), args.chunk):
+        chunk = installation_ids[start:start + args.chunk]
+        with sync_engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO monitoring_logs (id, installation_id, endpoint_id, response_time_ms, status_code,
+                                             error_message, alert_level, alert_triggered, created_at)
+                SELECT gen_random_uuid(), s.installation_id, s.endpoint_id,
+                       CASE WHEN s.r < 0.97 THEN (100 + random() * 400)::int ELSE (1500 + random() * 3500)::int END,
+                       CASE WHEN s.r < 0.99 THEN 200 ELSE 503 END,
+                       CASE WHEN s.r < 0.99 THEN NULL ELSE 'HTTP 503' END,
+                       CASE WHEN s.r < 0.97 THEN 'ok' WHEN s.r < 0.99 THEN 'warning' ELSE 'error' END,
+                       s.r >= 0.97,
+                       now() - make_interval(secs => s.g * :step)
+                FROM (
+                    SELECT inst.id AS installation_id, e.id AS endpoint_id, g, random() AS r
+                    FROM installations inst
+                    JOIN endpoints e ON e.module_id = inst.module_id
+                    CROSS JOIN generate_series(1, :per_pair) g
+                    WHERE inst.id = ANY(CAST(:ids AS uuid[]))
+                ) s
+            """), {"ids": [str(i) for i in chunk], "per_pair": per_pair, "step": step_seconds})
+        done = min(start + args.chunk, len(installation_ids))
+        print(f"  {done}/{len(installation_ids)} installations")
+
+    with sync_engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM ANALYZE monitoring_logs"))
+
+    print(f"\n[OK] Seeded in {time.perf_counter() - started:.1f}s")
+
+
+def load_samples(size: int):
+    """Random ids used to parametrise the workloads"""
+    with sync_engine.connect() as conn:
+        installations = conn.execute(text(
+            "SELECT id FROM installations ORDER BY random() LIMIT :n"
+        ), {"n": size}).scalars().all()
+        endpoints = conn.execute(text(
+            "SELECT id FROM endpoints ORDER BY random() LIMIT :n"
+        ), {"n": size}).scalars().all()
+        # Block sampling avoids a full scan of the log table; small tables fall back to LIMIT
+        logs = conn.execute(text(
+            "SELECT id FROM monitoring_logs TABLESAMPLE SYSTEM (0.1) LIMIT :n"
+        ), {"n": size}).scalars().all() or conn.execute(text(
+            "SELECT id FROM monitoring_logs LIMIT :n"
+        ), {"n": size}).scalars().all()
+    if not (installations and endpoints and logs):
+        raise SystemExit("Database has no data to benchmark; run the seed step first")
+    return {
+        "installations": [str(i) for i in installations],
+        "endpoints": [str(e) for e in endpoints],
+        "logs": [str(l) for l in logs],
+    }
+
+
+def workloads(samples):
+    """Scripted request generators for the hot endpoints"""
+    pick = random.choice
+
+    def window(hours):
+        end = datetime.now(timezone.utc)
+        return (end - timedelta(hours=hours)).isoformat(), end.isoformat()
+
+    def search():
+        start, end = window(6)
+        return "/api/v1/monitoring-logs/search", {
+            "endpoint_id": pick(samples["endpoints"]), "start_date": start, "end_date": end, "limit": 100
+        }
+
+    return {
+        "logs_latest": lambda: ("/api/v1/monitoring-logs/", {"limit": 100}),
+        "logs_by_installation": lambda: (
+            "/api/v1/monitoring-logs/", {"installation_id": pick(samples["installations"]), "limit": 100}
+        ),
+        "logs_alerts": lambda: ("/api/v1/monitoring-logs/", {"alert_triggered": "true", "limit": 100}),
+        "logs_search_window": search,
+        "stats_summary": lambda: ("/api/v1/monitoring-logs/stats/summary", {"hours": 24}),
+        "stats_summary_installation": lambda: (
+            "/api/v1/monitoring-logs/stats/summary", {"installation_id": pick(samples["installations"]), "hours": 24}
+        ),
+        "health_stats": lambda: ("/api/v1/health/stats", {}),
+        "log_detail": lambda: (f"/api/v1/monitoring-logs/{pick(samples['logs'])}", {}),
+        "installation_detail": lambda: (f"/api/v1/installations/{pick(samples['installations'])}", {}),
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, duration: float, concurrency: int):
+    latencies, query_counts = [], []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path, params = make_request()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                elapsed = time.perf_counter() - start
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(elapsed * 1000)
+                if "x-db-query-count" in response.headers:
+                    query_counts.append(int(response.headers["x-db-query-count"]))
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+        "db_queries_per_request": statistics.fmean(query_counts) if query_counts else None,
+    }
+
+
+async def run_all(args):
+    samples = load_samples(args.sample_size)
+    scenarios = workloads(samples)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for name in selected:
+            if args.warmup:
+                await run_scenario(client, scenarios[name], args.warmup, args.concurrency)
+            result = await run_scenario(client, scenarios[name], args.duration, args.concurrency)
+            results[name] = result
+            if result["requests"]:
+                print(
+                    f"  {name:<28} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.1f} ms  "
+                    f"p99 {result['p99_ms']:>8.1f} ms  errors {result['errors']}"
+                )
+            else:
+                print(f"  {name:<28} no successful requests (errors {result['errors']})")
+    return results
+
+
+def compare(report, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())["scenarios"]
+    print(f"\nComparison with {baseline_path} (negative latency delta is better):")
+    for name, current in report["scenarios"].items():
+        before = baseline.get(name)
+        if not before or not before.get("requests") or not current.get("requests"):
+            continue
+
+        def delta(key):
+            return (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+        print(
+            f"  {name:<28} p50 {delta('p50_ms'):+7.1f}%  p99 {delta('p99_ms'):+7.1f}%  "
+            f"throughput {delta('throughput_rps'):+7.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = sub.add_parser("seed", help="Seed the database with benchmark data")
+    seed_parser.add_argument("--clients", type=int, default=2000)
+    seed_parser.add_argument("--instances-per-client", type=int, default=2)
+    seed_parser.add_argument("--logs", type=int, default=20_000_000, help="Approximate monitoring log rows")
+    seed_parser.add_argument("--days", type=float, default=30, help="History spread of the generated logs")
+    seed_parser.add_argument("--chunk", type=int, default=500, help="Installations per insert transaction")
+
+    run_parser = sub.add_parser("run", help="Run the workloads against a live API")
+    run_parser.add_argument("--base-url", default="http://localhost:9001")
+    run_parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=5, help="Unrecorded seconds per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--timeout", type=float, default=30)
+    run_parser.add_argument("--sample-size", type=int, default=1000)
+    run_parser.add_argument("--scenarios", help="Comma separated subset of scenarios")
+    run_parser.add_argument("--json", help="Write the report to this file")
+    run_parser.add_argument("--compare", help="Previous JSON report to compare against")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args)
+        return
+
+    print("=" * 50)
+    print(f"API LOAD: {args.base_url}, {args.concurrency} concurrent, {args.duration}s per scenario")
+    print("=" * 50)
+    report = {
+        "benchmark": "api_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": {"base_url": args.base_url, "concurrency": args.concurrency, "duration_s": args.duration},
+        "scenarios": asyncio.run(run_all(args)),
+    }
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
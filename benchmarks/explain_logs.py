@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+EXPLAIN check of the hot monitoring_logs queries.
+
+Builds the queries the API runs (log_list_query for the list and search
+endpoints, stats_summary_query, series_query and the log detail lookup) with
+ids sampled from the database, runs EXPLAIN on each and checks that
+monitoring_logs is read through one of the indexes expected for that access
+pattern, never with a sequential scan:
+
+    logs_latest                  newest first, no filter     created_at B-tree (backward scan)
+    logs_by_installation         one installation            composite or created_at B-tree
+    logs_by_target               installation + endpoint     composite (installation, endpoint, created_at)
+    logs_alerts                  alert_triggered = true      partial index on alert_triggered
+    logs_search_window           endpoint, last 6 hours      created_at B-tree or BRIN
+    stats_summary                last 24 hours               created_at B-tree or BRIN
+    stats_summary_installation   installation, last 24 hours composite, created_at B-tree or BRIN
+    series_day                   5 endpoints, last 24 hours  created_at B-tree or BRIN
+    log_detail                   by id                       primary key
+
+Plans depend on table size and statistics, so run it against a seeded
+database (python -m benchmarks.api_load seed) after ANALYZE, before and after
+an index migration:
+
+    python -m benchmarks.explain_logs
+    python -m benchmarks.explain_logs --analyze --verbose --json plans.json
+
+Exits with status 1 when a query does not use an expected index.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import select, text
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import sync_engine
+from app.models import MonitoringLog
+from app.api.v1.endpoints.monitoring_logs import log_list_query, stats_summary_query, LOG_FIELDS
+from app.services.series import series_query
+
+TABLE = "monitoring_logs"
+CREATED_BTREE = "ix_monitoring_logs_created_at"
+CREATED_BRIN = "ix_monitoring_logs_created_brin"
+COMPOSITE = "ix_monitoring_logs_installation_endpoint_created"
+ALERTS = "ix_monitoring_logs_alerts"
+PRIMARY_KEY = "monitoring_logs_pkey"
+
+
+def load_sample():
+    """One recent log of a busy target, so filters match real rows"""
+    with sync_engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT id, installation_id, endpoint_id FROM monitoring_logs ORDER BY created_at DESC LIMIT 1"
+        )).one_or_none()
+        endpoints = conn.execute(text(
+            "SELECT id FROM endpoints ORDER BY random() LIMIT 5"
+        )).scalars().all()
+    if row is None:
+        raise SystemExit("monitoring_logs is empty; run python -m benchmarks.api_load seed first")
+    return {"log": row.id, "installation": row.installation_id, "endpoint": row.endpoint_id, "endpoints": endpoints}
+
+
+def checks(sample):
+    """(name, query, expected indexes) for every hot query"""
+    now = datetime.now(timezone.utc)
+    columns = [MonitoringLog.__table__.c[name] for name in LOG_FIELDS]
+    return [
+        ("logs_latest", log_list_query(columns).limit(100), {CREATED_BTREE}),
+        ("logs_by_installation", log_list_query(columns, installation_id=sample["installation"]).limit(100),
+         {COMPOSITE, CREATED_BTREE}),
+        ("logs_by_target", log_list_query(
+            columns, installation_id=sample["installation"], endpoint_id=sample["endpoint"]
+        ).limit(100), {COMPOSITE}),
+        ("logs_alerts", log_list_query(columns, alert_triggered=True).limit(100), {ALERTS}),
+        ("logs_search_window", log_list_query(
+            columns, endpoint_id=sample["endpoint"], start_date=now - timedelta(hours=6), end_date=now
+        ).limit(100), {CREATED_BTREE, CREATED_BRIN}),
+        ("stats_summary", stats_summary_query(now - timedelta(hours=24), now), {CREATED_BTREE, CREATED_BRIN}),
+        ("stats_summary_installation", stats_summary_query(
+            now - timedelta(hours=24), now, installation_id=sample["installation"]
+        ), {COMPOSITE, CREATED_BTREE, CREATED_BRIN}),
+        ("series_day", series_query(sample["endpoints"], now - timedelta(hours=24), now, 300),
+         {CREATED_BTREE, CREATED_BRIN}),
+        ("log_detail", select(*columns).where(MonitoringLog.id == sample["log"]), {PRIMARY_KEY}),
+    ]
+
+
+def explain(conn, query, analyze: bool):
+    compiled = query.compile(dialect=sync_engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = {key: str(value) if isinstance(value, UUID) else value for key, value in compiled.params.items()}
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def table_access(node, found=None):
+    """(node type, index name) of every plan node reading monitoring_logs"""
+    found = [] if found is None else found
+    if node.get("Relation Name") == TABLE or node.get("Index Name", "").startswith(("ix_monitoring_logs", TABLE)):
+        found.append((node["Node Type"], node.get("Index Name")))
+    for child in node.get("Plans", []):
+        table_access(child, found)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN check of the hot monitoring_logs queries")
+    parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE (executes the queries)")
+    parser.add_argument("--verbose", action="store_true", help="Print the access nodes of every plan")
+    parser.add_argument("--json", help="Write the plans to this file")
+    args = parser.parse_args()
+
+    sample = load_sample()
+    report = {}
+    failures = 0
+    print(f"{'query':<28} {'result':<6} {'cost':>12} {'ms':>10}  indexes")
+    with sync_engine.connect() as conn:
+        for name, query, expected in checks(sample):
+            plan = explain(conn, query, args.analyze)
+            access = table_access(plan["Plan"])
+            used = {index for _, index in access if index}
+            seq_scan = any(node_type == "Seq Scan" for node_type, _ in access)
+            ok = bool(used & expected) and not seq_scan
+            failures += not ok
+            elapsed = plan.get("Execution Time")
+            print(
+                f"{name:<28} {'ok' if ok else 'FAIL':<6} {plan['Plan']['Total Cost']:>12.1f} "
+                f"{elapsed if elapsed is not None else '-':>10}  {', '.join(sorted(used)) or 'none'}"
+                f"{' + Seq Scan' if seq_scan else ''}"
+            )
+            if args.verbose or not ok:
+                for node_type, index in access:
+                    print(f"    {node_type}{f' using {index}' if index else ''}")
+                if not ok:
+                    print(f"    expected one of: {', '.join(sorted(expected))}")
+            report[name] = {"ok": ok, "expected": sorted(expected), "used": sorted(used), "plan": plan}
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str))
+        print(f"\nPlans written to {args.json}")
+    if failures:
+        print(f"\n{failures} queries do not use an expected index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+Local mock of a fleet of monitored module endpoints.
+
+A minimal asyncio HTTP/1.1 server (keep-alive, no third-party dependencies)
+that answers GET/POST/HEAD on /ep/<n>. Each endpoint number is mapped
+deterministically to a behaviour profile, so a run with the same seed always
+sees the same mix of:
+
+  - healthy endpoints answering after a delay drawn from the configured
+    latency distribution (fixed, uniform, exponential or lognormal)
+  - per-request errors (HTTP 500/502/503) at --error-rate
+  - endpoints that never answer (probe timeouts) at --timeout-rate
+  - endpoints that stream their body slowly at --slow-body-rate
+
+Every response carries X-Mock-Delay-Ms with the delay the server injected,
+so the benchmark driver can separate server time from probe overhead.
+
+Usage:
+    python -m benchmarks.mock_fleet --port 18080 --hosts 4 --latency-ms 50
+"""
+import argparse
+import asyncio
+import random
+import signal
+from dataclasses import dataclass
+from typing import List, Optional
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+@dataclass
+class FleetConfig:
+    latency_dist: str = "lognormal"
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.01
+    timeout_rate: float = 0.005
+    slow_body_rate: float = 0.005
+    slow_body_chunks: int = 10
+    slow_body_chunk_delay_ms: float = 50.0
+    body_bytes: int = 64
+    seed: int = 42
+
+
+def endpoint_profile(config: FleetConfig, number: int) -> str:
+    """Stable profile for an endpoint number: healthy, timeout or slow_body"""
+    draw = random.Random(config.seed * 1_000_003 + number).random()
+    if draw < config.timeout_rate:
+        return "timeout"
+    if draw < config.timeout_rate + config.slow_body_rate:
+        return "slow_body"
+    return "healthy"
+
+
+def sample_latency_ms(config: FleetConfig, rng: random.Random) -> float:
+    if config.latency_dist == "fixed":
+        return config.latency_ms
+    if config.latency_dist == "uniform":
+        return rng.uniform(0, 2 * config.latency_ms)
+    if config.latency_dist == "exponential":
+        return rng.expovariate(1 / config.latency_ms) if config.latency_ms > 0 else 0.0
+    # lognormal with the configured median
+    return rng.lognormvariate(0, config.latency_sigma) * config.latency_ms
+
+
+class MockFleetServer:
+    def __init__(self, config: FleetConfig, host: str = "127.0.0.1", port: int = 18080, hosts: int = 1):
+        self.config = config
+        self.host = host
+        self.ports = list(range(port, port + hosts))
+        self.rng = random.Random(config.seed)
+        self.servers: List[asyncio.base_events.Server] = []
+        self.requests_served = 0
+
+    async def start(self):
+        for port in self.ports:
+            server = await asyncio.start_server(self._handle_connection, self.host, port, backlog=4096)
+            self.servers.append(server)
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, keep_alive = request
+                await self._respond(writer, method, path, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        if len(head) > MAX_HEADER_BYTES:
+            return None
+
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length:
+            await reader.readexactly(length)
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, path, keep_alive
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str, keep_alive: bool):
+        self.requests_served += 1
+        number = _endpoint_number(path)
+        if number is None:
+            await self._write(writer, 404, b"not found", 0.0, keep_alive)
+            return
+
+        profile = endpoint_profile(self.config, number)
+        if profile == "timeout":
+            # Hold the connection open without answering; the prober gives up
+            await asyncio.sleep(3600)
+            return
+
+        delay_ms = sample_latency_ms(self.config, self.rng)
+        await asyncio.sleep(delay_ms / 1000)
+
+        status = 200
+        if self.rng.random() < self.config.error_rate:
+            status = self.rng.choice([500, 502, 503])
+
+        body = b"" if method == "HEAD" else b"x" * self.config.body_bytes
+        if profile == "slow_body":
+            await self._write_slow(writer, status, body, delay_ms, keep_alive)
+        else:
+            await self._write(writer, status, body, delay_ms, keep_alive)
+
+    def _head(self, status: int, delay_ms: float, keep_alive: bool, extra: str) -> bytes:
+        return (
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"X-Mock-Delay-Ms: {delay_ms:.3f}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"{extra}\r\n"
+        ).encode("latin-1")
+
+    async def _write(self, writer, status, body, delay_ms, keep_alive):
+        writer.write(self._head(status, delay_ms, keep_alive, f"Content-Length: {len(body)}\r\n") + body)
+        await writer.drain()
+
+    async def _write_slow(self, writer, status, body, delay_ms, keep_alive):
+        chunks = self.config.slow_body_chunks
+        total_delay = delay_ms + chunks * self.config.slow_body_chunk_delay_ms
+        writer.write(self._head(status, total_delay, keep_alive, "Transfer-Encoding: chunked\r\n"))
+        piece = max(1, len(body) // chunks)
+        for start in range(0, len(body), piece):
+            await asyncio.sleep(self.config.slow_body_chunk_delay_ms / 1000)
+            chunk = body[start:start + piece]
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _endpoint_number(path: str) -> Optional[int]:
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "ep" and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+def add_fleet_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("mock fleet")
+    group.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal")
+    group.add_argument("--latency-ms", type=float, default=50.0, help="Median/mean injected latency")
+    group.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal shape parameter")
+    group.add_argument("--error-rate", type=float, default=0.01, help="Fraction of requests answered with 5xx")
+    group.add_argument("--timeout-rate", type=float, default=0.005, help="Fraction of endpoints that never answer")
+    group.add_argument("--slow-body-rate", type=float, default=0.005, help="Fraction of endpoints with a dribbled body")
+    group.add_argument("--slow-body-chunk-delay-ms", type=float, default=50.0)
+    group.add_argument("--body-bytes", type=int, default=64)
+    group.add_argument("--seed", type=int, default=42)
+
+
+def config_from_args(args) -> FleetConfig:
+    return FleetConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        slow_body_rate=args.slow_body_rate,
+        slow_body_chunk_delay_ms=args.slow_body_chunk_delay_ms,
+        body_bytes=args.body_bytes,
+        seed=args.seed,
+    )
+
+
+def serve(config: FleetConfig, host: str, port: int, hosts: int, ready=None):
+    """Run the fleet until SIGINT/SIGTERM (or until the process is terminated)"""
+    async def run():
+        server = MockFleetServer(config, host, port, hosts)
+        await server.start()
+        if ready is not None:
+            ready.set()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock fleet of module endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--hosts", type=int, default=1, help="Number of consecutive ports, one per simulated host")
+    add_fleet_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"Mock fleet listening on {args.host}:{args.port}-{args.port + args.hosts - 1}")
+    serve(config_from_args(args), args.host, args.port, args.hosts)
+
+
+if __name__ == "__main__":
+    main()
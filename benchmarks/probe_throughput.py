@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+"""
+Probe-throughput benchmark for HealthChecker.
+
+Starts the mock fleet (benchmarks/mock_fleet.py) in a child process so its
+CPU time does not pollute the measurements, builds in-memory ProbeTargets
+pointing at it and drives the real probe pipeline (HealthChecker.check_targets,
+threshold evaluation, metrics and the ResultWriter queue) for a number of
+cycles. No database is needed: the writer's batch insert is replaced by a
+no-op so only the probe path is measured.
+
+Reported per cycle and overall:
+  - throughput (probes/s)
+  - latency overhead: measured response time minus the delay the mock
+    server injected (p50/p99)
+  - CPU time per probe (process_time of the driver)
+  - memory: peak traced allocation per in-flight probe (--trace-memory)
+    and max RSS
+
+Usage:
+    python -m benchmarks.probe_throughput --endpoints 5000 --cycles 5 --concurrency 500
+    python -m benchmarks.probe_throughput --json bench_output.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.health_checker import HealthChecker, ProbeTarget
+from app.services.result_writer import ResultWriter
+from benchmarks.mock_fleet import add_fleet_arguments, config_from_args, serve
+
+
+class NullResultWriter(ResultWriter):
+    """ResultWriter that keeps the queue but skips the database insert"""
+
+    async def write_batch(self, batch):
+        return None
+
+
+def build_targets(args):
+    targets = []
+    for n in range(args.endpoints):
+        port = args.port + n % args.hosts
+        targets.append(ProbeTarget(
+            installation_id=uuid.uuid4(),
+            endpoint_id=uuid.uuid4(),
+            client_id=uuid.uuid4(),
+            host=f"{args.host}:{port}",
+            url=f"http://{args.host}:{port}/ep/{n}",
+            method="GET",
+            api_key="bench",
+            timeout=args.timeout,
+            module_name=f"module-{n % 10}",
+            endpoint_name=f"endpoint-{n % 5}",
+            expected_response_time_ms=int(args.latency_ms),
+            thresholds={
+                "response_time": {
+                    "warning_min": None,
+                    "warning_max": args.latency_ms * 3,
+                    "error_min": None,
+                    "error_max": args.latency_ms * 10,
+                    "expected_values": None,
+                },
+            },
+        ))
+    return targets
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_benchmark(args):
+    settings.PROBE_CONCURRENCY = args.concurrency
+    checker = HealthChecker()
+    checker.timeout = args.timeout
+    writer = NullResultWriter()
+    writer.start()
+
+    injected = {}
+
+    async def capture_delay(response):
+        delay = response.headers.get("x-mock-delay-ms")
+        if delay is not None:
+            injected[str(response.request.url)] = float(delay)
+
+    targets = build_targets(args)
+    cycles = []
+
+    async with checker.create_client(event_hooks={"response": [capture_delay]}) as client:
+        for cycle in range(args.warmup + args.cycles):
+            injected.clear()
+            if args.trace_memory:
+                tracemalloc.start()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+
+            results = await checker.check_targets(client, targets)
+            await writer.put_many(results)
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak = None
+            if args.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            if cycle < args.warmup:
+                continue
+
+            overheads = [
+                result["response_time_ms"] - injected[url]
+                for result, url in ((r, r["extra_data"]["url"]) for r in results)
+                if url in injected and result["status_code"] is not None
+            ]
+            outcomes = {}
+            for result in results:
+                outcomes[result["alert_level"]] = outcomes.get(result["alert_level"], 0) + 1
+
+            in_flight = min(args.concurrency, len(targets))
+            cycles.append({
+                "probes": len(results),
+                "wall_s": wall,
+                "probes_per_s": len(results) / wall,
+                "cpu_ms_per_probe": cpu * 1000 / len(results),
+                "overhead_ms_p50": percentile(overheads, 50),
+                "overhead_ms_p99": percentile(overheads, 99),
+                "peak_bytes_per_inflight_probe": peak / in_flight if peak is not None else None,
+                "outcomes": outcomes,
+            })
+            print(
+                f"  cycle {cycle - args.warmup + 1}: {len(results)} probes in {wall:.2f}s "
+                f"({len(results) / wall:,.0f}/s), cpu {cpu * 1000 / len(results):.3f} ms/probe, "
+                f"overhead p50 {percentile(overheads, 50) or 0:.1f} ms p99 {percentile(overheads, 99) or 0:.1f} ms"
+            )
+
+    await writer.stop()
+    return cycles
+
+
+def summarize(args, cycles):
+    def median(key):
+        values = [c[key] for c in cycles if c[key] is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        "benchmark": "probe_throughput",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": {
+            "endpoints": args.endpoints,
+            "hosts": args.hosts,
+            "concurrency": args.concurrency,
+            "timeout_s": args.timeout,
+            "cycles": args.cycles,
+            "latency_dist": args.latency_dist,
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "timeout_rate": args.timeout_rate,
+            "slow_body_rate": args.slow_body_rate,
+        },
+        "probes_per_s": median("probes_per_s"),
+        "cpu_ms_per_probe": median("cpu_ms_per_probe"),
+        "overhead_ms_p50": median("overhead_ms_p50"),
+        "overhead_ms_p99": median("overhead_ms_p99"),
+        "peak_bytes_per_inflight_probe": median("peak_bytes_per_inflight_probe"),
+        # ru_maxrss is KiB on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "cycles": cycles,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure HealthChecker probe throughput against a mock fleet")
+    parser.add_argument("--endpoints", type=int, default=2000, help="Simulated module endpoints")
+    parser.add_argument("--hosts", type=int, default=4, help="Simulated instance hosts (one port each)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--concurrency", type=int, default=settings.PROBE_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=2.0, help="Probe timeout in seconds")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="Unreported cycles to open connections first")
+    parser.add_argument("--trace-memory", action="store_true", help="Trace allocations (slows the run)")
+    parser.add_argument("--json", help="Write the report to this file")
+    add_fleet_arguments(parser)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    fleet = multiprocessing.Process(
+        target=serve,
+        args=(config_from_args(args), args.host, args.port, args.hosts, ready),
+        daemon=True
+    )
+    fleet.start()
+    if not ready.wait(10):
+        fleet.terminate()
+        raise SystemExit("Mock fleet did not start")
+
+    print("=" * 50)
+    print(f"PROBE THROUGHPUT: {args.endpoints} endpoints on {args.hosts} hosts, concurrency {args.concurrency}")
+    print("=" * 50)
+
+    try:
+        cycles = asyncio.run(run_benchmark(args))
+    finally:
+        fleet.terminate()
+        fleet.join()
+
+    report = summarize(args, cycles)
+    print("\nSummary:")
+    for key in ("probes_per_s", "cpu_ms_per_probe", "overhead_ms_p50", "overhead_ms_p99",
+                "peak_bytes_per_inflight_probe", "max_rss_mb"):
+        value = report[key]
+        print(f"  - {key}: {value:,.3f}" if value is not None else f"  - {key}: n/a")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
 #!/usr/bin/env python
 """
 Seed database with mock data for the new monitoring structure
+
+Default mode creates a small, hand-written dataset through the ORM.
+
+Scale mode (--scale) generates a production-sized dataset and streams it
+into PostgreSQL with COPY, using several worker processes for the
+monitoring logs:
+
+    python scripts/seed_database.py --scale --clients 1000 --instances-per-client 3 \
+        --days 30 --interval 30 --workers 8 --defer-indexes
 """
 import sys
 import os
+import argparse
+import io
+import math
+import multiprocessing
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
 import uuid
 
@@ -13,17 +27,21 @@ import uuid
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, sync_engine
 from app.models import (
     Client, Instance, Module, Installation, 
-    Endpoint, Threshold, MonitoringLog
+    Endpoint, Threshold, MonitoringLog, SlaDay
 )
+from app.models.installation import hash_api_key
 
 
 def clear_database(db):
     """Clear all existing data"""
     print("Clearing existing data...")
     db.query(MonitoringLog).delete()
+    # Tables referencing the ones below are emptied by ON DELETE CASCADE; the
+    # SLA day markers reference nothing and would mark empty days as complete
+    db.query(SlaDay).delete()
     db.query(Threshold).delete()
     db.query(Installation).delete()
     db.query(Endpoint).delete()
@@ -345,8 +363,343 @@ def create_monitoring_logs(db, installations, endpoints):
     return logs
 
 
+# ---------------------------------------------------------------------------
+# High-volume generator (--scale)
+# ---------------------------------------------------------------------------
+
+# Per-probe Markov transitions between endpoint states; keeps failures bursty
+# (incidents lasting several probes) instead of independent coin flips
+STATE_OK, STATE_DEGRADED, STATE_DOWN = 0, 1, 2
+TRANSITIONS = {
+    STATE_OK: ((STATE_DEGRADED, 0.0005), (STATE_DOWN, 0.0002)),
+    STATE_DEGRADED: ((STATE_OK, 0.05), (STATE_DOWN, 0.01)),
+    STATE_DOWN: ((STATE_OK, 0.1),),
+}
+ISOLATED_ERROR_RATE = 0.002
+ENVIRONMENT_MODULES = {"production": None, "staging": 4, "development": 2}
+
+
+class CopyStream(io.RawIOBase):
+    """File-like object feeding COPY from a generator of text lines"""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = "".join(next(self._lines, "") for _ in range(1000))
+            if not chunk:
+                break
+            self._buffer += chunk.encode()
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_rows(cursor, table, columns, lines):
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        CopyStream(iter(lines)),
+        size=1 << 20
+    )
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _copy_line(values):
+    return "\t".join(_copy_value(v) for v in values) + "\n"
+
+
+def _connect():
+    import psycopg2
+    return psycopg2.connect(settings.SYNC_DATABASE_URL)
+
+
+def scale_clear(cursor):
+    print("Truncating existing data...")
+    # Derived tables are listed so sla_days does not outlive the logs it summarizes;
+    # CASCADE covers any other table referencing these
+    cursor.execute(
+        "TRUNCATE monitoring_logs, thresholds, installations, endpoints, instances, modules, clients, "
+        "alert_outbox, ingest_quotas, sla_daily, sla_days, sla_stale, anomaly_baselines, incidents CASCADE"
+    )
+
+
+def scale_create_metadata(args):
+    """Create clients, instances, modules, endpoints, installations and thresholds"""
+    db = SessionLocal()
+    try:
+        modules = create_modules(db)
+        endpoints = create_endpoints(db, modules)
+        module_ids = [m.id for m in modules]
+        endpoint_rows = [
+            (e.id, e.module_id, e.expected_response_time_ms, e.timeout_ms, e.type) for e in endpoints
+        ]
+    finally:
+        db.close()
+
+    now = datetime.now(timezone.utc).isoformat()
+    environments = ["production", "staging", "development"]
+    clients, instances, installations = [], [], []
+    for c in range(args.clients):
+        client_id = uuid.uuid4()
+        clients.append((client_id, f"Client {c:06d}", f"ops{c}@client{c}.example.com", "America/Sao_Paulo", True, now, now))
+        for i in range(args.instances_per_client):
+            env = environments[min(i, len(environments) - 1)]
+            instance_id = uuid.uuid4()
+            instances.append((
+                instance_id, client_id, f"client{c}-{env}-{i}", f"client{c}-{env}-{i}.example.com",
+                env, "1.0.0", True, now, now
+            ))
+            limit = ENVIRONMENT_MODULES[env]
+            for module_id in module_ids[:limit]:
+                api_key = f"inst_{uuid.uuid4().hex}"
+                installations.append((
+                    uuid.uuid4(), module_id, instance_id, api_key, hash_api_key(api_key),
+                    '{"enabled": true, "retry_attempts": 3}', True, now, now
+                ))
+
+    endpoints_by_module = {}
+    for endpoint in endpoint_rows:
+        endpoints_by_module.setdefault(endpoint[1], []).append(endpoint)
+
+    thresholds, pairs = [], []
+    for installation in installations:
+        installation_id, module_id = installation[0], installation[1]
+        for endpoint_id, _, expected_ms, timeout_ms, ep_type in endpoints_by_module.get(module_id, []):
+            pairs.append((str(installation_id), str(endpoint_id), expected_ms, timeout_ms))
+            thresholds.append((
+                uuid.uuid4(), installation_id, endpoint_id, "response_time", None, expected_ms * 1.5,
+                None, expected_ms * 3, '{"unit": "milliseconds"}', True, now, now
+            ))
+            if ep_type == "health":
+                thresholds.append((
+                    uuid.uuid4(), installation_id, endpoint_id, "status_code", None, None,
+                    None, None, '{"codes": [200, 204]}', True, now, now
+                ))
+
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            copy_rows(cursor, "clients", ["id", "name", "email", "timezone", "is_active", "created_at", "updated_at"],
+                      (_copy_line(r) for r in clients))
+            copy_rows(cursor, "instances", ["id", "client_id", "name", "host", "environment", "version",
+                                            "is_active", "created_at", "updated_at"],
+                      (_copy_line(r) for r in instances))
+            copy_rows(cursor, "installations", ["id", "module_id", "instance_id", "api_key", "api_key_hash",
+                                                "config", "is_active", "created_at", "updated_at"],
+                      (_copy_line(r) for r in installations))
+            copy_rows(cursor, "thresholds", ["id", "installation_id", "endpoint_id", "metric_type",
+                                             "warning_min", "warning_max", "error_min", "error_max",
+                                             "expected_values", "is_active", "created_at", "updated_at"],
+                      (_copy_line(r) for r in thresholds))
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"[OK] Created {len(clients)} clients, {len(instances)} instances, "
+          f"{len(installations)} installations, {len(thresholds)} thresholds")
+    return pairs
+
+
+def generate_log_lines(pairs, slot_times, interval, seed):
+    """
+    Yield COPY lines for every pair at every slot, in time order.
+
+    Time is the outer loop so rows land on disk roughly ordered by
+    created_at, like real probe traffic (which matters for BRIN indexes
+    and partition tests).
+    """
+    rng = random.Random(seed)
+    rand, lognorm, getrandbits = rng.random, rng.lognormvariate, rng.getrandbits
+    states = [STATE_OK] * len(pairs)
+    # Fixed sub-interval phase per pair, pre-rendered as the timestamp suffix
+    suffixes = [f".{rng.randrange(1000):03d}+00" for _ in pairs]
+    offsets = min(interval, 60)
+    pair_offsets = [rng.randrange(offsets) for _ in pairs]
+
+    for slot_start, diurnal in slot_times:
+        # Render each distinct second of the slot once instead of once per row
+        stamps = [(slot_start + timedelta(seconds=o)).strftime("%Y-%m-%d %H:%M:%S") for o in range(offsets)]
+        for index, (installation_id, endpoint_id, expected_ms, timeout_ms) in enumerate(pairs):
+            state = states[index]
+            draw = rand()
+            for next_state, probability in TRANSITIONS[state]:
+                if draw < probability:
+                    state = next_state
+                    break
+                draw -= probability
+            states[index] = state
+
+            base = expected_ms * 0.6 * diurnal
+            status_code, error_message = "200", r"\N"
+            if state == STATE_DOWN:
+                if rand() < 0.4:
+                    response_time, status_code, error_message, level = timeout_ms, r"\N", "Service timeout", "critical"
+                else:
+                    response_time, status_code, level = int(base * 0.2) + 1, "503", "error"
+                    error_message = "HTTP 503"
+            elif rand() < ISOLATED_ERROR_RATE:
+                response_time, status_code, level = int(base * lognorm(0, 0.5)), "500", "error"
+                error_message = "HTTP 500"
+            else:
+                response_time = int(base * (4 if state == STATE_DEGRADED else 1) * lognorm(0, 0.35))
+                if response_time > expected_ms * 3:
+                    level = "error"
+                elif response_time > expected_ms * 1.5:
+                    level = "warning"
+                else:
+                    level = "ok"
+
+            yield (
+                f"{getrandbits(128):032x}\t{installation_id}\t{endpoint_id}\t{response_time}\t{status_code}\t"
+                f"\\N\t{error_message}\t{level}\t{'f' if level == 'ok' else 't'}\t\\N\t{stamps[pair_offsets[index]]}{suffixes[index]}\n"
+            )
+
+
+def load_log_shard(job):
+    """Worker process: stream one shard of pairs through COPY, committing per chunk of slots"""
+    shard, slot_times, interval, seed, slots_per_commit = job
+    conn = _connect()
+    columns = ["id", "installation_id", "endpoint_id", "response_time_ms", "status_code", "response_body",
+               "error_message", "alert_level", "alert_triggered", "extra_data", "created_at"]
+    rows = 0
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET synchronous_commit = off")
+            lines = generate_log_lines(shard, slot_times, interval, seed)
+            for start in range(0, len(slot_times), slots_per_commit):
+                count = len(slot_times[start:start + slots_per_commit]) * len(shard)
+                copy_rows(cursor, "monitoring_logs", columns, (next(lines) for _ in range(count)))
+                conn.commit()
+                rows += count
+    finally:
+        conn.close()
+    return rows
+
+
+def scale_monitoring_logs(args, pairs):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    slots = int(args.days * 86400 // args.interval)
+    start = now - timedelta(seconds=slots * args.interval)
+    slot_times = []
+    for n in range(slots):
+        slot_start = start + timedelta(seconds=n * args.interval)
+        # Slower responses during business hours (UTC-3)
+        hour = (slot_start.hour - 3) % 24
+        slot_times.append((slot_start, 1.0 + 0.3 * math.sin(math.pi * (hour - 6) / 12) if 6 <= hour <= 18 else 1.0))
+
+    total = slots * len(pairs)
+    print(f"\nStreaming {total:,} monitoring logs ({len(pairs)} endpoints x {slots} probes) "
+          f"with {args.workers} workers...")
+
+    workers = max(1, min(args.workers, len(pairs)))
+    shard_size = math.ceil(len(pairs) / workers)
+    slots_per_commit = max(1, args.rows_per_commit // max(shard_size, 1))
+    jobs = [
+        (pairs[i:i + shard_size], slot_times, args.interval, args.seed + i, slots_per_commit)
+        for i in range(0, len(pairs), shard_size)
+    ]
+
+    # Forked workers open their own connections; do not share pooled ones
+    sync_engine.dispose()
+    started = time.perf_counter()
+    loaded = 0
+    with multiprocessing.Pool(len(jobs)) as pool:
+        for rows in pool.imap_unordered(load_log_shard, jobs):
+            loaded += rows
+            elapsed = time.perf_counter() - started
+            print(f"  {loaded:,}/{total:,} rows ({loaded / elapsed:,.0f} rows/s)")
+    return loaded
+
+
+def drop_log_indexes(cursor):
+    """Drop secondary indexes on monitoring_logs and return their definitions"""
+    cursor.execute("""
+        SELECT i.indexname, i.indexdef FROM pg_indexes i
+        WHERE i.tablename = 'monitoring_logs'
+          AND i.indexname NOT IN (
+              SELECT conname FROM pg_constraint WHERE conrelid = 'monitoring_logs'::regclass
+          )
+    """)
+    definitions = cursor.fetchall()
+    for name, _ in definitions:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return [definition for _, definition in definitions]
+
+
+def scale_seed(args):
+    print("=" * 50)
+    print("SEEDING DATABASE AT SCALE (COPY)")
+    print("=" * 50)
+    started = time.perf_counter()
+
+    conn = _connect()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            scale_clear(cursor)
+            index_definitions = drop_log_indexes(cursor) if args.defer_indexes else []
+    finally:
+        conn.close()
+
+    pairs = scale_create_metadata(args)
+    rows = scale_monitoring_logs(args, pairs)
+
+    conn = _connect()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            if index_definitions:
+                print(f"\nRebuilding {len(index_definitions)} monitoring_logs indexes...")
+                cursor.execute("SET maintenance_work_mem = '1GB'")
+                for definition in index_definitions:
+                    cursor.execute(definition)
+            print("Analyzing...")
+            cursor.execute("VACUUM ANALYZE monitoring_logs")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print("\n" + "=" * 50)
+    print(f"LOADED {rows:,} MONITORING LOGS IN {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print("=" * 50)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the monitoring database")
+    parser.add_argument("--scale", action="store_true", help="Generate a large dataset with COPY")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--instances-per-client", type=int, default=2)
+    parser.add_argument("--days", type=float, default=7, help="Days of monitoring history")
+    parser.add_argument("--interval", type=int, default=30, help="Probe interval in seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--rows-per-commit", type=int, default=1_000_000)
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="Drop monitoring_logs indexes during the load and rebuild them afterwards")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    return parser.parse_args()
+
+
 def main():
     """Main seed function"""
+    args = parse_args()
+    if args.scale:
+        scale_seed(args)
+        return
+
     print("=" * 50)
     print("SEEDING DATABASE WITH NEW MONITORING STRUCTURE")
     print("=" * 50)
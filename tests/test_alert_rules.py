@@ -0,0 +1,46 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.services.alert_rules import AlertRuleEngine, FailureWindow, client_extra_data
+
+Target = namedtuple("Target", ["key", "thresholds"])
+
+
+def feed(window, outcomes):
+    return [window.add(failed) for failed in outcomes]
+
+
+def test_fires_when_enough_of_the_window_failed():
+    window = FailureWindow(failures=3, window=5, recovery=2)
+    assert feed(window, [True, False, True, False, True]) == [False, False, False, False, True]
+
+
+def test_old_failures_slide_out_of_the_window():
+    window = FailureWindow(failures=3, window=3, recovery=1)
+    assert feed(window, [True, True, False, True]) == [False, False, False, False]
+
+
+def test_recovers_after_consecutive_successes():
+    window = FailureWindow(failures=2, window=5, recovery=2)
+    assert feed(window, [True, True, False, True, False, False]) == [False, True, True, True, True, False]
+
+
+def test_engine_reports_transitions_once():
+    key = (uuid4(), uuid4())
+    engine = AlertRuleEngine()
+    engine.sync([Target(key, {"availability": {"expected_values": {"failures": 2, "window": 3, "recovery": 1}}})])
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    levels = ["error", "error", "error", "ok"]
+    rows = engine.evaluate_many([
+        {"installation_id": key[0], "endpoint_id": key[1], "alert_level": level, "response_time_ms": None,
+         "extra_data": None, "created_at": start + timedelta(seconds=i)}
+        for i, level in enumerate(levels)
+    ])
+    assert [row["alert_triggered"] for row in rows] == [False, True, True, False]
+    assert [(row["extra_data"] or {}).get("alert_event") for row in rows] == [None, "triggered", None, "resolved"]
+
+
+def test_client_extra_data_drops_reserved_keys():
+    assert client_extra_data({"kind": "heartbeat", "count": 9, "alert_event": "resolved", "region": "eu"}) == {"region": "eu"}
+    assert client_extra_data(None) is None
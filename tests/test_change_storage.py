@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.change_storage import (
+    HEARTBEAT, ChangeOnlyFilter, expand_heartbeat, expand_logs, heartbeat_value, is_heartbeat
+)
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+KEY = (uuid4(), uuid4())
+
+
+def result(seconds, latency=100, status_code=200, alert_level="ok"):
+    return {
+        "installation_id": KEY[0],
+        "endpoint_id": KEY[1],
+        "response_time_ms": latency,
+        "status_code": status_code,
+        "response_body": None,
+        "error_message": None,
+        "alert_level": alert_level,
+        "alert_triggered": alert_level != "ok",
+        "extra_data": {"url": "http://svc/health", "dns_ms": 1.5},
+        "created_at": START + timedelta(seconds=seconds),
+    }
+
+
+def change_filter():
+    return ChangeOnlyFilter(heartbeat_interval=300, band_pct=50, band_min_ms=20)
+
+
+def test_unchanged_results_are_folded():
+    rows = change_filter().filter([result(0), result(30, 110), result(60, 90)])
+    assert len(rows) == 1
+    assert rows[0]["created_at"] == START
+
+
+def test_state_change_stores_pending_heartbeat_then_result():
+    rows = change_filter().filter([result(0), result(30, 110), result(60, 500, 500, "error")])
+    assert [row["status_code"] for row in rows] == [200, 200, 500]
+    heartbeat = rows[1]
+    assert heartbeat["extra_data"]["kind"] == HEARTBEAT
+    assert heartbeat["extra_data"]["count"] == 1
+    assert "dns_ms" not in heartbeat["extra_data"]
+
+
+def test_latency_outside_the_band_is_a_change():
+    rows = change_filter().filter([result(0, 100), result(30, 140), result(60, 200)])
+    assert [row["response_time_ms"] for row in rows][-1] == 200
+    assert rows[-2]["extra_data"]["kind"] == HEARTBEAT
+
+
+def test_heartbeat_every_interval():
+    rows = change_filter().filter([result(seconds) for seconds in range(0, 331, 30)])
+    heartbeats = [row for row in rows if (row["extra_data"] or {}).get("kind") == HEARTBEAT]
+    assert len(heartbeats) == 1
+    summary = heartbeats[0]["extra_data"]
+    assert summary["count"] == 10
+    assert summary["min_ms"] == summary["max_ms"] == 100
+    assert heartbeats[0]["created_at"] == START + timedelta(seconds=300)
+
+
+def test_retain_returns_heartbeats_of_dropped_targets():
+    change = change_filter()
+    change.filter([result(0), result(30)])
+    assert change.retain([KEY]) == []
+    rows = change.retain([])
+    assert len(rows) == 1 and rows[0]["extra_data"]["count"] == 1
+
+
+def test_expand_heartbeat_spreads_probes_over_the_window():
+    log = SimpleNamespace(
+        id=uuid4(), installation_id=KEY[0], endpoint_id=KEY[1], response_time_ms=100, status_code=200,
+        error_message=None, alert_level="ok", alert_triggered=False, created_at=START + timedelta(seconds=90),
+        extra_data={"kind": HEARTBEAT, "count": 3, "window_start": START.isoformat()},
+    )
+    assert is_heartbeat(log)
+    entries = expand_heartbeat(log)
+    assert [entry["created_at"] for entry in entries] == [START + timedelta(seconds=s) for s in (90, 60, 30)]
+    assert len({entry["id"] for entry in entries}) == 3
+    plain = SimpleNamespace(extra_data=None)
+    assert expand_logs([plain, log])[0] is plain
+    assert len(expand_logs([plain, log])) == 4
+
+
+def test_heartbeat_value_only_reads_heartbeat_rows():
+    sql = str(heartbeat_value("count", 1).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("CASE WHEN")
+    assert "ELSE" in sql
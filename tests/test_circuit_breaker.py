@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+from app.core.config import settings
+from app.services.circuit_breaker import HostCircuitBreaker
+
+Target = namedtuple("Target", ["host", "key"])
+
+A1, A2, A3 = Target("a", 1), Target("a", 2), Target("a", 3)
+B1 = Target("b", 4)
+
+
+def opened(now=0.0):
+    breaker = HostCircuitBreaker(failure_threshold=2, canary_interval=10)
+    breaker.record(A1, True, now)
+    breaker.record(A2, True, now)
+    return breaker
+
+
+def test_opens_after_consecutive_connect_failures():
+    breaker = HostCircuitBreaker(failure_threshold=2, canary_interval=10)
+    breaker.record(A1, True, 0)
+    assert not breaker.is_open("a")
+    breaker.record(A2, True, 0)
+    assert breaker.is_open("a")
+    assert breaker.open_hosts() == 1
+
+
+def test_success_resets_failure_count():
+    breaker = HostCircuitBreaker(failure_threshold=2, canary_interval=10)
+    breaker.record(A1, True, 0)
+    breaker.record(A2, False, 0)
+    breaker.record(A1, True, 0)
+    assert not breaker.is_open("a")
+
+
+def test_open_host_is_skipped_until_canary_is_due():
+    breaker = opened()
+    probe, skipped = breaker.partition([A1, A2, B1], 5)
+    assert probe == [B1]
+    assert skipped == [A1, A2]
+
+
+def test_single_canary_per_host():
+    breaker = opened()
+    probe, skipped = breaker.partition([A1, A2, A3], 10)
+    assert probe == [A1]
+    assert skipped == [A2, A3]
+
+
+def test_successful_canary_closes_circuit():
+    breaker = opened()
+    breaker.partition([A1, A2], 10)
+    breaker.record(A1, False, 11)
+    assert not breaker.is_open("a")
+    assert breaker.partition([A1, A2], 12) == ([A1, A2], [])
+
+
+def test_failed_canary_keeps_circuit_open():
+    breaker = opened()
+    breaker.partition([A1, A2], 10)
+    breaker.record(A1, True, 11)
+    assert breaker.is_open("a")
+    assert breaker.partition([A1, A2], 20) == ([], [A1, A2])
+    assert breaker.partition([A1, A2], 21)[0] == [A1]
+
+
+def test_lost_canary_is_replaced_after_its_deadline():
+    breaker = opened()
+    breaker.partition([A1, A2], 10)
+    deadline = 10 + breaker.canary_interval + settings.HEALTH_CHECK_TIMEOUT
+    # The canary's result never comes back
+    assert breaker.partition([A2], deadline - 1) == ([], [A2])
+    assert breaker.partition([A2], deadline) == ([A2], [])
+    breaker.record(A2, False, deadline + 1)
+    assert not breaker.is_open("a")
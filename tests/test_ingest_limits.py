@@ -0,0 +1,90 @@
+import math
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.services.ingest_limits import IngestLimiter, RateLimited, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_INSTALLATION_RATE", 10.0)
+    monkeypatch.setattr(settings, "INGEST_INSTALLATION_BURST", 100)
+    monkeypatch.setattr(settings, "INGEST_CLIENT_RATE", 20.0)
+    monkeypatch.setattr(settings, "INGEST_CLIENT_BURST", 150)
+    monkeypatch.setattr(settings, "INGEST_DAILY_QUOTA", 0)
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate=10, capacity=100, now=0)
+    assert bucket.wait_time(100) == 0
+    bucket.tokens = 40
+    assert bucket.wait_time(60) == pytest.approx(2.0)
+    assert math.isinf(bucket.wait_time(101))
+    bucket.refill(1.0)
+    assert bucket.tokens == 50
+    bucket.refill(100.0)
+    assert bucket.tokens == 100
+
+
+def test_acquire_charges_installation_and_client():
+    limiter = IngestLimiter()
+    installation, client = uuid4(), uuid4()
+    limiter.acquire({installation: 60}, {installation: client})
+    with pytest.raises(RateLimited) as e:
+        limiter.acquire({installation: 60}, {installation: client})
+    assert e.value.scope == "installation"
+    assert 0 < e.value.retry_after < math.inf
+
+
+def test_batch_larger_than_burst_never_fits():
+    limiter = IngestLimiter()
+    installation = uuid4()
+    with pytest.raises(RateLimited) as e:
+        limiter.acquire({installation: 101}, {})
+    assert math.isinf(e.value.retry_after)
+
+
+def test_client_rejection_charges_nothing_and_counts_as_rejected():
+    limiter = IngestLimiter()
+    first, second, client = uuid4(), uuid4(), uuid4()
+    clients = {first: client, second: client}
+    limiter.acquire({first: 100}, clients)
+    with pytest.raises(RateLimited) as e:
+        limiter.acquire({second: 80}, clients)
+    assert e.value.scope == "client"
+    # The installation bucket of the rejected batch was left untouched
+    limiter.acquire({second: 100}, {})
+    pending = limiter.take_pending()
+    assert pending[next(key for key in pending if key[0] == second)] == (100, 80)
+
+
+def test_release_refunds_tokens_and_accepted_count():
+    limiter = IngestLimiter()
+    installation, client = uuid4(), uuid4()
+    limiter.acquire({installation: 100}, {installation: client})
+    limiter.release({installation: 100}, {installation: client})
+    limiter.acquire({installation: 100}, {installation: client})
+    assert list(limiter.take_pending().values()) == [(100, 0)]
+
+
+def test_daily_quota(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_DAILY_QUOTA", 150)
+    limiter = IngestLimiter()
+    installation = uuid4()
+    limiter.acquire({installation: 100}, {})
+    limiter.take_pending()
+    with pytest.raises(RateLimited) as e:
+        limiter.acquire({installation: 60}, {})
+    assert e.value.scope == "quota"
+
+
+def test_restore_pending_after_failed_flush():
+    limiter = IngestLimiter()
+    installation = uuid4()
+    limiter.acquire({installation: 30}, {})
+    pending = limiter.take_pending()
+    assert limiter.take_pending() == {}
+    limiter.restore_pending(pending)
+    assert limiter.take_pending() == pending
@@ -0,0 +1,58 @@
+import time
+from collections import namedtuple
+from uuid import uuid4
+
+from app.services.probe_shards import HashRing, ShardCoordinator, slot_of
+
+Target = namedtuple("Target", ["key"])
+
+SLOTS = 256
+
+
+def owners(ring):
+    return {slot: ring.owner(f"slot:{slot}") for slot in range(SLOTS)}
+
+
+def test_slot_of_is_stable_and_in_range():
+    key = (uuid4(), uuid4())
+    assert slot_of(key, SLOTS) == slot_of(key, SLOTS)
+    assert all(0 <= slot_of((uuid4(), uuid4()), SLOTS) < SLOTS for _ in range(100))
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([], 8).owner("slot:1") is None
+
+
+def test_every_node_gets_a_share():
+    ring = HashRing(["a", "b", "c"], 64)
+    counts = {}
+    for node in owners(ring).values():
+        counts[node] = counts.get(node, 0) + 1
+    assert set(counts) == {"a", "b", "c"}
+    assert min(counts.values()) > SLOTS / 3 / 2
+
+
+def test_adding_a_node_only_moves_slots_to_it():
+    before = owners(HashRing(["a", "b", "c"], 64))
+    after = owners(HashRing(["a", "b", "c", "d"], 64))
+    moved = [slot for slot in range(SLOTS) if before[slot] != after[slot]]
+    assert moved
+    assert all(after[slot] == "d" for slot in moved)
+
+
+def test_select_keeps_targets_of_owned_slots():
+    coordinator = ShardCoordinator(node_id="test")
+    targets = [Target((uuid4(), uuid4())) for _ in range(50)]
+    owned = frozenset(slot_of(target.key, coordinator.slots) for target in targets[:10])
+    selected = coordinator.select(targets, owned)
+    assert targets[:10] == selected[:10]
+    assert all(slot_of(target.key, coordinator.slots) in owned for target in selected)
+
+
+def test_owned_is_empty_once_leases_may_have_expired():
+    coordinator = ShardCoordinator(node_id="test")
+    coordinator._owned = frozenset({1, 2})
+    coordinator._valid_until = time.monotonic() + 60
+    assert coordinator.owned() == {1, 2}
+    coordinator._valid_until = time.monotonic() - 1
+    assert coordinator.owned() == frozenset()
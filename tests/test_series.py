@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.series import lttb, pick_bucket
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def points(values):
+    return [{"t": START + timedelta(minutes=i), "avg_ms": value} for i, value in enumerate(values)]
+
+
+def test_pick_bucket_smallest_nice_width():
+    assert pick_bucket(START, START + timedelta(hours=1), 360) == 10
+    assert pick_bucket(START, START + timedelta(days=1), 300) == 300
+    assert pick_bucket(START, START + timedelta(days=7), 200) == 3600
+
+
+def test_pick_bucket_beyond_a_day_uses_whole_days():
+    assert pick_bucket(START, START + timedelta(days=365), 10) == 37 * 86400
+
+
+def test_lttb_keeps_short_series():
+    series = points([10, 20, 30])
+    assert lttb(series, 5) is series
+    assert lttb(series, 2) is series
+
+
+def test_lttb_keeps_ends_and_peaks():
+    values = [10] * 100
+    values[37] = 900
+    values[71] = 1
+    sampled = lttb(points(values), 10)
+    assert len(sampled) == 10
+    assert sampled[0]["t"] == START
+    assert sampled[-1]["t"] == START + timedelta(minutes=99)
+    assert {point["avg_ms"] for point in sampled} >= {900, 1}
+
+
+def test_lttb_keeps_buckets_without_latency_in_order():
+    values = [float(i % 7) for i in range(50)]
+    values[10] = values[30] = None
+    sampled = lttb(points(values), 8)
+    outages = [point for point in sampled if point["avg_ms"] is None]
+    assert [point["t"] for point in outages] == [START + timedelta(minutes=10), START + timedelta(minutes=30)]
+    assert len(sampled) == 8 + 2
+    assert [point["t"] for point in sampled] == sorted(point["t"] for point in sampled)